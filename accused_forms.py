@@ -0,0 +1,147 @@
+import hashlib
+import json
+from datetime import date, datetime
+
+from case_numbers import publish_case_number_edit
+from extensions import db
+from models import Accused, AccusedChangeLog
+
+ACCUSED_TEXT_FIELDS = (
+    'username',
+    'relative_name',
+    'relation',
+    'gender',
+    'nationality',
+    'occupation',
+    'education',
+    'height',
+    'weight',
+    'waist_size',
+    'foot_size',
+    'special_mark_cut',
+    'skin_color',
+    'tattoo',
+    'accessories_wearing',
+    'blood_group',
+    'special_key_point',
+    'disability',
+    'permanent_address',
+    'temporary_address',
+    'pincode',
+    'mobile',
+    'email_id',
+    'aadhaar_no',
+    'fir_no',
+    'case_type',
+    'ps',
+    'case_no',
+    'sections',
+    'place_of_arrest',
+    'warrant_arrest',
+    'confession_statement',
+    'remand_custody',
+    'bail_status',
+    'previous_criminal_record',
+)
+
+# Free-text columns (statements, addresses, descriptions) are logged as a
+# length and digest rather than their full old and new values.
+ACCUSED_LONG_TEXT_FIELDS = frozenset(
+    field for field in ACCUSED_TEXT_FIELDS if isinstance(Accused.__table__.c[field].type, db.Text)
+)
+
+DATE_FORMATS = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y')
+DATETIME_FORMATS = ('%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M', '%d-%m-%Y %H:%M')
+
+ACCUSED_DATE_FIELDS = ('dob', 'date_of_arrest')
+ACCUSED_DATETIME_FIELDS = ('court_forward_date_time',)
+
+
+def parse_form_date(value, formats=DATE_FORMATS):
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_form_datetime(value, formats=DATETIME_FORMATS):
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def diff_accused_form(accused, form):
+    # Fields missing from the form (or unparseable dates) keep their current value,
+    # so only what the officer actually changed ends up in the diff.
+    changes = {}
+
+    for field in ACCUSED_TEXT_FIELDS:
+        if field not in form:
+            continue
+        new_value = form.get(field)
+        old_value = getattr(accused, field)
+        # Templates render NULL columns as empty inputs; posting them back is not an edit.
+        if new_value == old_value or (old_value is None and new_value == ''):
+            continue
+        changes[field] = (old_value, new_value)
+
+    for fields, parser in ((ACCUSED_DATE_FIELDS, parse_form_date), (ACCUSED_DATETIME_FIELDS, parse_form_datetime)):
+        for field in fields:
+            raw = form.get(field, '')
+            if not raw:
+                continue
+            new_value = parser(raw)
+            if new_value is None:
+                continue
+            old_value = getattr(accused, field)
+            if new_value != old_value:
+                changes[field] = (old_value, new_value)
+
+    return changes
+
+
+def _serialize_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _summarize_text(value):
+    if value is None:
+        return None
+    return {'length': len(value), 'sha256': hashlib.sha256(value.encode('utf-8')).hexdigest()[:16]}
+
+
+def serialize_changes(changes):
+    payload = {}
+    for field, (old, new) in changes.items():
+        if field in ACCUSED_LONG_TEXT_FIELDS:
+            payload[field] = [_summarize_text(old), _summarize_text(new)]
+        else:
+            payload[field] = [_serialize_value(old), _serialize_value(new)]
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False)
+
+
+def apply_accused_form(accused, form, changed_by=None):
+    changes = diff_accused_form(accused, form)
+    if not changes:
+        return changes
+
+    for field, (_old, new_value) in changes.items():
+        setattr(accused, field, new_value)
+    if 'case_no' in changes:
+        publish_case_number_edit(changes['case_no'][1])
+
+    db.session.add(
+        AccusedChangeLog(
+            accused_id=accused.id,
+            changed_by=changed_by,
+            changes=serialize_changes(changes),
+        )
+    )
+    return changes
@@ -0,0 +1,43 @@
+from sqlalchemy.orm import Bundle
+
+from extensions import db
+from models import Accused
+
+# What the accused tables render. Listings select these as plain rows, which
+# still read as person.username in templates but skip the ORM instance and
+# identity-map entry per accused (about 0.7 KB a row instead of 4 KB).
+LISTING_COLUMNS = (
+    Accused.id,
+    Accused.username,
+    Accused.relative_name,
+    Accused.dob,
+    Accused.gender,
+    Accused.nationality,
+    Accused.occupation,
+    Accused.mobile,
+    Accused.email_id,
+    Accused.pincode,
+    Accused.aadhaar_no,
+    Accused.permanent_address,
+    Accused.fir_no,
+    Accused.case_type,
+    Accused.ps,
+    Accused.case_no,
+    Accused.sections,
+    Accused.date_of_arrest,
+    Accused.place_of_arrest,
+    Accused.remand_custody,
+    Accused.bail_status,
+)
+
+# The detail modals on the officer and judge listings also show these.
+CARD_COLUMNS = (Accused.confession_statement, Accused.accused_photo)
+
+
+def accused_rows(*extra_columns):
+    return db.session.query(*LISTING_COLUMNS, *extra_columns).order_by(Accused.id)
+
+
+def accused_bundle(*extra_columns):
+    # For queries that pair each accused with another entity, e.g. (person, decision).
+    return Bundle('accused', *LISTING_COLUMNS, *extra_columns)
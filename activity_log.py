@@ -0,0 +1,171 @@
+import atexit
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import has_request_context, session
+from sqlalchemy import insert
+
+from extensions import db
+from models import ActivityLog
+
+NOTIFICATION_ENTITIES = ('complaint', 'decision', 'meeting')
+ACTIVITY_PAGE_SIZE = 25
+
+_QUEUE = queue.Queue()
+_FEED = deque(maxlen=50)
+_FEED_LOCK = threading.Lock()
+_WRITER = {'thread': None, 'app': None, 'batch_size': 100, 'flush_seconds': 2.0}
+
+
+def _current_actor():
+    if not has_request_context():
+        return 'System'
+    for key in ('super_admin_username', 'judge_username', 'admin_username'):
+        if session.get(key):
+            return session[key]
+    return 'Public'
+
+
+def record_activity(action, entity, description, entity_ref=None):
+    entry = {
+        'action': action,
+        'entity': entity,
+        'entity_ref': entity_ref,
+        'description': description[:255],
+        'actor': _current_actor(),
+        'created_at': datetime.now(),
+    }
+    with _FEED_LOCK:
+        _FEED.appendleft(entry)
+    _QUEUE.put(entry)
+
+
+def _write_batch(app, batch):
+    with app.app_context():
+        try:
+            db.session.execute(insert(ActivityLog), batch)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            app.logger.exception('Failed to write %d activity log entries', len(batch))
+        finally:
+            db.session.remove()
+
+
+def _writer_loop():
+    # Settings are read per batch, so a later init_activity_log (a second app
+    # in the same process, as in the tests) takes over the running thread.
+    while True:
+        batch = [_QUEUE.get()]
+        app, batch_size = _WRITER['app'], _WRITER['batch_size']
+        deadline = time.monotonic() + _WRITER['flush_seconds']
+        while len(batch) < batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(_QUEUE.get(timeout=timeout))
+            except queue.Empty:
+                break
+        _write_batch(app, batch)
+        for _ in batch:
+            _QUEUE.task_done()
+
+
+def flush_activity_log(timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while _QUEUE.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return _QUEUE.unfinished_tasks == 0
+
+
+def _warm_feed(feed_size):
+    try:
+        rows = ActivityLog.query.order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc()).limit(feed_size).all()
+    except Exception:
+        db.session.rollback()
+        return
+    with _FEED_LOCK:
+        _FEED.extend(
+            {
+                'action': row.action,
+                'entity': row.entity,
+                'entity_ref': row.entity_ref,
+                'description': row.description,
+                'actor': row.actor,
+                'created_at': row.created_at,
+            }
+            for row in rows
+        )
+
+
+def init_activity_log(app):
+    global _FEED
+    feed_size = app.config['ACTIVITY_FEED_SIZE']
+    with _FEED_LOCK:
+        _FEED = deque(maxlen=feed_size)
+    _warm_feed(feed_size)
+
+    _WRITER.update(
+        app=app,
+        batch_size=app.config['ACTIVITY_BATCH_SIZE'],
+        flush_seconds=app.config['ACTIVITY_FLUSH_SECONDS'],
+    )
+    if _WRITER['thread'] is None or not _WRITER['thread'].is_alive():
+        _WRITER['thread'] = threading.Thread(
+            target=_writer_loop,
+            name='activity-log-writer',
+            daemon=True,
+        )
+        _WRITER['thread'].start()
+        atexit.register(flush_activity_log)
+
+
+def activity_page(page=1, entity=None, per_page=ACTIVITY_PAGE_SIZE):
+    query = ActivityLog.query
+    if entity:
+        query = query.filter_by(entity=entity)
+    return query.order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc()).paginate(
+        page=page, per_page=per_page, error_out=False
+    )
+
+
+def _time_ago(moment):
+    seconds = int((datetime.now() - moment).total_seconds())
+    if seconds < 60:
+        return 'just now'
+    if seconds < 3600:
+        return f'{seconds // 60} min ago'
+    if seconds < 86400:
+        return f'{seconds // 3600} hours ago'
+    return f'{seconds // 86400} days ago'
+
+
+def recent_activities(limit=10):
+    with _FEED_LOCK:
+        entries = list(_FEED)[:limit]
+    return [
+        {
+            'date': entry['created_at'].strftime('%Y-%m-%d %H:%M'),
+            'description': entry['description'],
+            'user': entry['actor'],
+            'status': 'Completed',
+        }
+        for entry in entries
+    ]
+
+
+def recent_notifications(limit=5):
+    with _FEED_LOCK:
+        entries = [entry for entry in _FEED if entry['entity'] in NOTIFICATION_ENTITIES][:limit]
+    return [
+        {
+            'title': f"{entry['entity'].title()} {entry['action']}",
+            'message': entry['description'],
+            'time': _time_ago(entry['created_at']),
+        }
+        for entry in entries
+    ]
@@ -0,0 +1,126 @@
+import base64
+import binascii
+from datetime import date, datetime
+
+from sqlalchemy import inspect
+
+from accused_listing import LISTING_COLUMNS
+from extensions import db
+from models import Accused, ComplaintDescription, JudgeDecision, MeetingLink, SectionPunishment
+
+
+class ApiError(ValueError):
+    pass
+
+
+def _columns(model, exclude=()):
+    return {attr.key: attr.class_attribute for attr in inspect(model).column_attrs if attr.key not in exclude}
+
+
+# Each resource lists the columns a client may ask for with fields=, the ones
+# sent when it does not, and the filters it accepts. Filters are limited to
+# columns that lead an index, so every page is an index range scan on id plus
+# an indexed lookup, however large the table grows.
+RESOURCES = {
+    'accused': {
+        'fields': _columns(Accused, exclude=('aadhaar_key',)),
+        'default_fields': tuple(column.key for column in LISTING_COLUMNS),
+        'filters': ('case_no', 'case_type', 'dob', 'person_id'),
+    },
+    'complaints': {
+        'fields': _columns(ComplaintDescription),
+        'default_fields': ('id', 'case_no', 'complain_type', 'description', 'status'),
+        'filters': ('case_no',),
+    },
+    'decisions': {
+        'fields': _columns(JudgeDecision),
+        'default_fields': (
+            'id', 'case_no', 'status', 'decided_at', 'total_fine', 'imprisonment', 'fine_paise', 'imprisonment_days',
+        ),
+        'filters': ('case_no',),
+    },
+    'meetings': {
+        'fields': _columns(MeetingLink),
+        'default_fields': ('id', 'case_no', 'link', 'status', 'created_at', 'ended_at'),
+        'filters': ('case_no',),
+    },
+    'sections': {
+        'fields': _columns(SectionPunishment),
+        'default_fields': ('id', 'category', 'article_section', 'offense', 'possible_punishments', 'minimum_fine'),
+        'filters': ('category',),
+    },
+}
+
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(str(last_id).encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii'))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ApiError('Invalid cursor') from None
+
+
+def _selected_fields(resource, requested):
+    if not requested:
+        return resource['default_fields']
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = [name for name in names if name not in resource['fields']]
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}")
+    # id is always sent, it is what the cursor points at.
+    return tuple(dict.fromkeys(['id'] + names))
+
+
+def _filter_value(column, raw):
+    python_type = column.type.python_type
+    if python_type is date:
+        try:
+            return date.fromisoformat(raw)
+        except ValueError:
+            raise ApiError(f'{column.key} must be a YYYY-MM-DD date') from None
+    if python_type is int:
+        try:
+            return int(raw)
+        except ValueError:
+            raise ApiError(f'{column.key} must be a number') from None
+    return raw
+
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def list_page(name, args, default_limit, max_limit):
+    resource = RESOURCES[name]
+    fields = _selected_fields(resource, args.get('fields'))
+    columns = [resource['fields'][field] for field in fields]
+    id_column = resource['fields']['id']
+
+    try:
+        limit = int(args.get('limit', default_limit))
+    except ValueError:
+        raise ApiError('limit must be a number') from None
+    limit = min(max(limit, 1), max_limit)
+
+    query = db.session.query(*columns)
+    for field in resource['filters']:
+        if args.get(field):
+            column = resource['fields'][field]
+            query = query.filter(column == _filter_value(column, args[field]))
+    unknown = sorted(set(args) - set(resource['filters']) - {'fields', 'limit', 'cursor'})
+    if unknown:
+        raise ApiError(f"Unsupported filters: {', '.join(unknown)}")
+    if args.get('cursor'):
+        query = query.filter(id_column > decode_cursor(args['cursor']))
+
+    # Plain rows, one extra to tell whether another page follows; no
+    # ORM instances are built.
+    rows = query.order_by(id_column).limit(limit + 1).all()
+    items = [{field: _json_value(value) for field, value in zip(fields, row)} for row in rows[:limit]]
+    next_cursor = encode_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+    return {'success': True, 'items': items, 'fields': list(fields), 'next_cursor': next_cursor}
@@ -2,25 +2,70 @@ import os
 
 from flask import Flask
 
+from activity_log import init_activity_log
+from case_numbers import build_case_number_filter
+from compression import init_compression
 from config import Config
-from db_init import run_startup_schema_checks
+from crime_stats import configure_stats_cache
+from db_init import run_startup_schema_checks, run_startup_seeding
+from db_pool import build_engine_options, configure_sqlite
+from db_replica import init_replica, sync_replica_command
+from events import init_event_broker
 from extensions import csrf, db
+from facets import configure_facet_cache
+from identity import cluster_persons_command, start_identity_clustering
+from inbox import rebuild_inbox_counters_command
+from lifecycle import rebuild_lifecycle_command
+from meetings import configure_meeting_cache, start_meeting_sweeper
+from metrics import init_metrics
+from page_cache import configure_page_cache
+from rollups import rebuild_rollups_command
 from routes import register_all_routes
+from sentencing import backfill_sentencing_command
+from sql_profiler import init_sql_profiler
 
 
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', build_engine_options(app.config))
 
     db.init_app(app)
+    init_metrics(app)
+    init_sql_profiler(app)
     csrf.init_app(app)
+    init_compression(app)
+    init_event_broker(app)
+    configure_meeting_cache(app.config['MEETING_LINK_CACHE_SECONDS'])
+    configure_facet_cache(app.config['FACET_CACHE_SECONDS'])
+    configure_stats_cache(app.config['ANALYTICS_CACHE_SECONDS'])
+    configure_page_cache(app.config['PAGE_CACHE_ENABLED'], app.config['PAGE_CACHE_MAX_AGE'])
 
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
     with app.app_context():
+        for engine in db.engines.values():
+            configure_sqlite(engine, app.config['SQLITE_BUSY_TIMEOUT_MS'], app.config['SQLITE_MMAP_SIZE'])
         db.create_all()
         run_startup_schema_checks()
+        init_replica(app)
+        init_activity_log(app)
+        start_meeting_sweeper(app)
+        start_identity_clustering(app)
+        build_case_number_filter(
+            app.config['CASE_NUMBER_FILTER_CAPACITY'],
+            app.config['CASE_NUMBER_FILTER_ERROR_RATE'],
+            app.config['CASE_NUMBER_FILTER_REFRESH_SECONDS'],
+        )
+        run_startup_seeding()
+
+    app.cli.add_command(rebuild_rollups_command)
+    app.cli.add_command(rebuild_lifecycle_command)
+    app.cli.add_command(cluster_persons_command)
+    app.cli.add_command(sync_replica_command)
+    app.cli.add_command(backfill_sentencing_command)
+    app.cli.add_command(rebuild_inbox_counters_command)
 
     register_all_routes(app)
 
@@ -0,0 +1,114 @@
+"""Times the accused statistics engine on synthetic data.
+
+Run from the project root:
+
+    python benchmarks/bench_crime_stats.py --rows 1000000
+    python benchmarks/bench_crime_stats.py --rows 1000000 --sqlite
+
+--sqlite also loads the rows into a temporary SQLite file and times the
+projected query that feeds the arrays.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+
+from crime_stats import (  # noqa: E402
+    CATEGORY_FIELDS,
+    age_statistics,
+    build_columns,
+    category_breakdown,
+    load_accused_columns,
+)
+from models import Accused  # noqa: E402
+
+CASE_TYPES = ['Theft', 'Fraud', 'Assault', 'Murder', 'Cyber Crime', 'Narcotics', 'Robbery', '']
+GENDERS = ['Male', 'Female', 'Other']
+NATIONALITIES = ['Indian', 'Nepali', 'Bangladeshi', 'Other']
+OCCUPATIONS = [f'Occupation {i}' for i in range(40)]
+EDUCATIONS = ['None', 'Primary', '10th', '12th', 'Graduate', 'Post Graduate']
+
+
+def synthetic_rows(count, seed=7):
+    rng = random.Random(seed)
+    start = date(2015, 1, 1)
+    rows = []
+    for _ in range(count):
+        arrested = start + timedelta(days=rng.randrange(3650))
+        dob = arrested - timedelta(days=rng.randrange(14 * 365, 80 * 365))
+        rows.append(
+            (
+                rng.choice(CASE_TYPES),
+                dob,
+                arrested if rng.random() > 0.01 else None,
+                rng.choice(GENDERS),
+                rng.choice(NATIONALITIES),
+                rng.choice(OCCUPATIONS),
+                rng.choice(EDUCATIONS),
+            )
+        )
+    return rows
+
+
+def python_loop_baseline(rows):
+    histogram = Counter()
+    for case_type, dob, arrested, *_ in rows:
+        if dob and arrested:
+            histogram[(case_type, int((arrested - dob).days / 365.2425) // 5)] += 1
+    return histogram
+
+
+def timed(label, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    print(f'{label:<34} {(time.perf_counter() - started) * 1000:10.1f} ms')
+    return result
+
+
+def load_into_sqlite(rows):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    engine = create_engine(f'sqlite:///{path}')
+    Accused.__table__.create(engine)
+    names = ('case_type', 'dob', 'date_of_arrest', 'gender', 'nationality', 'occupation', 'education')
+    filler = {
+        'username': 'x', 'relative_name': 'x', 'relation': 'x', 'permanent_address': 'x', 'mobile': '0', 'email_id': 'x',
+    }
+    with engine.begin() as connection:
+        for offset in range(0, len(rows), 50000):
+            connection.execute(
+                insert(Accused.__table__),
+                [dict(filler, **dict(zip(names, row))) for row in rows[offset:offset + 50000]],
+            )
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--sqlite', action='store_true')
+    args = parser.parse_args()
+
+    rows = timed(f'generate {args.rows} rows', synthetic_rows, args.rows)
+    if args.sqlite:
+        engine = timed('load into sqlite', load_into_sqlite, rows)
+        with engine.connect() as connection:
+            columns = timed('projected query -> arrays', load_accused_columns, connection)
+    else:
+        columns = timed('rows -> arrays', build_columns, rows)
+
+    timed('age statistics (vectorized)', age_statistics, columns)
+    for field in CATEGORY_FIELDS:
+        timed(f'{field} breakdown', category_breakdown, columns, field)
+    timed('age histogram (python loop)', python_loop_baseline, rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Mixed read/write load against a SQLite file, default vs tuned settings.
+
+Run from the project root:
+
+    python benchmarks/bench_db_concurrency.py --readers 8 --writers 2 --seconds 10
+
+"default" is a plain engine with SQLite's rollback journal. "tuned" uses the
+app's pool options and connection pragmas (WAL, synchronous=NORMAL,
+busy_timeout, mmap). Each reader looks up random case numbers; each writer
+inserts accused rows one transaction at a time.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from config import Config  # noqa: E402
+from db_pool import build_engine_options, configure_sqlite  # noqa: E402
+from models import Accused  # noqa: E402
+
+_ACCUSED = Accused.__table__
+FILLER = {
+    'username': 'x', 'relative_name': 'x', 'relation': 'x', 'permanent_address': 'x', 'mobile': '0', 'email_id': 'x',
+    'dob': date(1990, 1, 1), 'ps': 'PS1', 'case_type': 'Theft', 'gender': 'Male', 'nationality': 'Indian',
+    'occupation': 'x', 'education': 'x',
+}
+
+
+def make_engine(path, tuned):
+    url = f'sqlite:///{path}'
+    if not tuned:
+        return create_engine(url)
+    config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+    config['SQLALCHEMY_DATABASE_URI'] = url
+    engine = create_engine(url, **build_engine_options(config))
+    configure_sqlite(engine, Config.SQLITE_BUSY_TIMEOUT_MS, Config.SQLITE_MMAP_SIZE)
+    return engine
+
+
+def seed(engine, rows):
+    _ACCUSED.create(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(_ACCUSED), [dict(FILLER, case_no=f'SEED-{index}') for index in range(rows)])
+
+
+def reader(engine, rows, stop, results):
+    rng = random.Random()
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            with engine.connect() as connection:
+                connection.execute(select(_ACCUSED.c.id, _ACCUSED.c.username).where(
+                    _ACCUSED.c.case_no == f'SEED-{rng.randrange(rows)}'
+                )).first()
+        except OperationalError:
+            results['errors'] += 1
+            continue
+        results['reads'].append(time.perf_counter() - started)
+
+
+def writer(engine, name, stop, results):
+    counter = 0
+    while not stop.is_set():
+        counter += 1
+        started = time.perf_counter()
+        try:
+            with engine.begin() as connection:
+                connection.execute(insert(_ACCUSED).values(**FILLER, case_no=f'{name}-{counter}'))
+        except OperationalError:
+            results['errors'] += 1
+            continue
+        results['writes'].append(time.perf_counter() - started)
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run(mode, args):
+    path = os.path.join(tempfile.mkdtemp(), f'{mode}.db')
+    engine = make_engine(path, mode == 'tuned')
+    seed(engine, args.rows)
+
+    stop = threading.Event()
+    results = {'reads': [], 'writes': [], 'errors': 0}
+    threads = [threading.Thread(target=reader, args=(engine, args.rows, stop, results)) for _ in range(args.readers)]
+    threads += [
+        threading.Thread(target=writer, args=(engine, f'W{index}', stop, results)) for index in range(args.writers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    for kind in ('reads', 'writes'):
+        latencies = results[kind]
+        print(
+            f'{mode:<8} {kind:<7} {len(latencies) / args.seconds:10.1f} ops/s'
+            f'   p50 {percentile(latencies, 0.5) * 1000:7.2f} ms'
+            f'   p99 {percentile(latencies, 0.99) * 1000:8.2f} ms'
+        )
+    print(f'{mode:<8} errors  {results["errors"]}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--rows', type=int, default=10000)
+    args = parser.parse_args()
+    for mode in ('default', 'tuned'):
+        run(mode, args)
+
+
+if __name__ == '__main__':
+    main()
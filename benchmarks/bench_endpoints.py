@@ -0,0 +1,253 @@
+"""Latency and peak-memory benchmark for the main routes.
+
+Run from the project root against a database filled by synthetic_data.py:
+
+    python benchmarks/synthetic_data.py --database sqlite:///bench.db
+    python benchmarks/bench_endpoints.py --database sqlite:///bench.db --output baseline.json
+    # ... change something ...
+    python benchmarks/bench_endpoints.py --database sqlite:///bench.db --compare baseline.json
+
+--generate N builds a throwaway SQLite database with N accused rows first.
+Requests go through the Flask test client, so the numbers cover routing,
+queries and template rendering but not the WSGI server or network. Each
+route is warmed up, timed --iterations times, then run once more under
+tracemalloc for peak memory. --compare exits with status 1 when a route's
+p50 or p95 latency or its peak memory grew by more than --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+# Milliseconds below which a latency change is treated as noise.
+NOISE_FLOOR_MS = 2.0
+
+
+def scenarios(sample):
+    # (name, role, method, path, form data)
+    month_start = sample['arrested'].replace(day=1)
+    return [
+        ('admin_dashboard', 'admin', 'GET', '/admin-dashboard', None),
+        ('super_admin_dashboard', 'super', 'GET', '/super-admin-dashboard', None),
+        ('judge_dashboard', 'judge', 'GET', '/judge-dashboard', None),
+        ('judge_pending', 'judge', 'GET', '/judge/pending', None),
+        ('judge_solved', 'judge', 'GET', '/judge/solved', None),
+        ('accused_listing', 'admin', 'GET', '/admin/accused-details', None),
+        ('super_accused_listing', 'super', 'GET', '/super_accused', None),
+        ('user_details', 'admin', 'GET', '/user_details', None),
+        ('criminal_records', None, 'GET', '/criminal_records', None),
+        ('complaint_listing', 'admin', 'GET', '/admin/complaint-description', None),
+        ('section_listing', 'admin', 'GET', '/manage_sections', None),
+        ('super_admin_messages', 'super', 'GET', '/super-admin/messages', None),
+        ('get_punishment_details', None, 'POST', '/get_punishment_details', {'section_id': sample['section']}),
+        (
+            'submit_search',
+            None,
+            'POST',
+            '/submit_search',
+            {'username': sample['username'], 'dob': sample['dob'].isoformat(), 'aadhaar_no': sample['aadhaar_no']},
+        ),
+        (
+            'fetch_report',
+            'admin',
+            'POST',
+            '/fetch_report',
+            {'from_date': month_start.isoformat(), 'to_date': sample['arrested'].isoformat()},
+        ),
+        ('rollup_report', 'admin', 'GET', '/reports/rollups?dimension=ps&period=week', None),
+        ('age_at_arrest', 'admin', 'GET', '/analytics/age-at-arrest', None),
+        ('case_type_facets', None, 'GET', '/case_types/facets', None),
+    ]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    position = q * (len(ordered) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def make_client(app, role):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        if role == 'admin':
+            session.update(admin_logged_in=True, admin_username='bench', admin_id=1)
+        elif role == 'super':
+            session.update(super_admin_logged_in=True, super_admin_username='Super Admin')
+        elif role == 'judge':
+            session.update(judge_logged_in=True, judge_username='Judge')
+    return client
+
+
+def call(client, method, path, data):
+    # Consume the body chunk by chunk, as a WSGI server would, so streamed
+    # pages are not buffered whole by the benchmark itself.
+    response = client.open(path, method=method, data=data, buffered=False)
+    size = sum(len(chunk) for chunk in response.iter_encoded())
+    response.close()
+    return response.status_code, size
+
+
+def run_scenario(app, scenario, iterations, warmup):
+    name, role, method, path, data = scenario
+    client = make_client(app, role)
+    for _ in range(warmup):
+        call(client, method, path, data)
+
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        status, size = call(client, method, path, data)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    call(client, method, path, data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'method': method,
+        'path': path,
+        'status': status,
+        'bytes': size,
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 0.5), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'mean_ms': round(statistics.fmean(latencies), 2),
+        'max_ms': round(max(latencies), 2),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def compare(baseline, current, threshold):
+    regressions = []
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            print(f'{name:<26} new route, no baseline')
+            continue
+        notes = []
+        for metric in ('p50_ms', 'p95_ms'):
+            if result[metric] > before[metric] * (1 + threshold) and result[metric] - before[metric] > NOISE_FLOOR_MS:
+                notes.append(f'{metric} {before[metric]} -> {result[metric]}')
+        if result['peak_memory_kb'] > before['peak_memory_kb'] * (1 + threshold):
+            notes.append(f'peak_memory_kb {before["peak_memory_kb"]} -> {result["peak_memory_kb"]}')
+        change = (result['p50_ms'] / before['p50_ms'] - 1) * 100 if before['p50_ms'] else 0.0
+        print(f'{name:<26} p50 {before["p50_ms"]:>9.2f} -> {result["p50_ms"]:>9.2f} ms ({change:+6.1f}%)'
+              + ('   REGRESSION: ' + '; '.join(notes) if notes else ''))
+        if notes:
+            regressions.append(name)
+    return regressions
+
+
+def load_app(database):
+    os.environ['DATABASE_URL'] = database
+    os.environ.setdefault('UPLOAD_FOLDER', tempfile.mkdtemp())
+    # Keep background work out of the timings.
+    os.environ['PERSON_CLUSTER_INTERVAL_SECONDS'] = '0'
+    os.environ['MEETING_MAX_AGE_HOURS'] = '0'
+    from app import app
+
+    app.config.update(WTF_CSRF_ENABLED=False, TESTING=True)
+    return app
+
+
+def sample_inputs(app):
+    from extensions import db
+    from models import Accused, SectionPunishment
+
+    with app.app_context():
+        accused = (
+            db.session.query(Accused.username, Accused.dob, Accused.aadhaar_no, Accused.date_of_arrest)
+            .filter(Accused.aadhaar_no.isnot(None), Accused.date_of_arrest.isnot(None))
+            .order_by(Accused.id)
+            .first()
+        )
+        section = db.session.query(SectionPunishment.article_section).order_by(SectionPunishment.id).first()
+        count = db.session.query(db.func.count(Accused.id)).scalar()
+    if accused is None or section is None:
+        sys.exit('The database has no accused or section rows; run benchmarks/synthetic_data.py first.')
+    return count, {
+        'username': accused.username,
+        'dob': accused.dob,
+        'aadhaar_no': accused.aadhaar_no,
+        'arrested': accused.date_of_arrest,
+        'section': section.article_section.split(',')[0].strip(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--database', help='SQLAlchemy URL of a database filled by synthetic_data.py')
+    parser.add_argument('--generate', type=int, metavar='N', help='build a temporary database with N accused rows')
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--only', nargs='*', help='scenario names to run')
+    parser.add_argument('--output', help='write results as JSON')
+    parser.add_argument('--compare', help='baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed growth before flagging (0.2 = 20%%)')
+    args = parser.parse_args()
+
+    database = args.database
+    if args.generate:
+        from sqlalchemy import create_engine
+
+        from synthetic_data import generate
+
+        database = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+        generate(create_engine(database), accused=args.generate, complaints=args.generate * 4)
+    if not database:
+        parser.error('pass --database or --generate')
+
+    app = load_app(database)
+    accused_count, sample = sample_inputs(app)
+    results = {}
+    for scenario in scenarios(sample):
+        if args.only and scenario[0] not in args.only:
+            continue
+        result = run_scenario(app, scenario, args.iterations, args.warmup)
+        results[scenario[0]] = result
+        print(
+            f'{scenario[0]:<26} {result["status"]}  p50 {result["p50_ms"]:>9.2f}  p95 {result["p95_ms"]:>9.2f}'
+            f'  p99 {result["p99_ms"]:>9.2f} ms  peak {result["peak_memory_kb"]:>10.1f} KiB  {result["bytes"]:>9} B'
+        )
+
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'accused_rows': accused_count,
+            'python': platform.python_version(),
+            'iterations': args.iterations,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        if baseline['meta'].get('accused_rows') != accused_count:
+            print(f'note: baseline has {baseline["meta"].get("accused_rows")} accused rows, this run {accused_count}')
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} regression(s): {", ".join(regressions)}')
+            sys.exit(1)
+        print('no regressions')
+
+
+if __name__ == '__main__':
+    main()
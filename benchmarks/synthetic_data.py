@@ -0,0 +1,264 @@
+"""Deterministic synthetic data at production-like volumes.
+
+Run from the project root:
+
+    python benchmarks/synthetic_data.py --database sqlite:///bench.db
+    python benchmarks/synthetic_data.py --database sqlite:///bench.db --accused 50000 --complaints 200000
+
+The same --seed always produces the same rows. Rows go in through Core bulk
+inserts, so the rollup, lifecycle and identity tables are left empty; the app
+rebuilds the first two on startup (or run `flask --app app rebuild-rollups`
+and `rebuild-lifecycle`), and `flask --app app cluster-persons` links people.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, insert, inspect, select  # noqa: E402
+
+from case_numbers import format_case_number, station_code  # noqa: E402
+from extensions import db  # noqa: E402
+from models import (  # noqa: E402
+    Accused,
+    CaseNumberCounter,
+    ComplaintDescription,
+    JudgeDecision,
+    MeetingLink,
+    SectionPunishment,
+    SuperAdminMessage,
+)
+
+CHUNK_SIZE = 20000
+START_DATE = date(2018, 1, 1)
+DAYS = 8 * 365
+
+CASE_TYPES = [
+    ('Theft', 24), ('Assault', 14), ('Fraud', 12), ('Cyber Crime', 9), ('Narcotics', 8), ('Domestic Violence', 8),
+    ('Robbery', 6), ('Traffic Violation', 6), ('Murder', 2), ('Kidnapping', 2), ('Extortion', 3), ('Arson', 1),
+]
+STATIONS = [f'{area} PS' for area in (
+    'Central', 'North', 'South', 'East', 'West', 'Harbour', 'Airport', 'Railway', 'Market', 'Old Town',
+    'Lake View', 'Hill Side', 'Industrial', 'University', 'Cantonment', 'River Side', 'Fort', 'Civil Lines',
+    'Mill Road', 'Bus Stand', 'Sector 9', 'Sector 14', 'Sector 21', 'Sector 33', 'Ring Road',
+)]
+FIRST_NAMES = [
+    'Ravi', 'Amit', 'Suresh', 'Rahul', 'Vikram', 'Arjun', 'Manoj', 'Deepak', 'Sanjay', 'Rakesh', 'Anil', 'Sunil',
+    'Priya', 'Pooja', 'Neha', 'Anita', 'Sunita', 'Kavita', 'Meena', 'Rekha', 'Imran', 'Salman', 'Joseph', 'Thomas',
+    'Gurpreet', 'Harjeet', 'Mohan', 'Gopal', 'Kiran', 'Lakshmi', 'Ajay', 'Vijay', 'Ramesh', 'Dinesh', 'Naveen',
+]
+LAST_NAMES = [
+    'Kumar', 'Sharma', 'Verma', 'Singh', 'Yadav', 'Gupta', 'Patel', 'Reddy', 'Nair', 'Das', 'Khan', 'Ali',
+    'Mishra', 'Pandey', 'Joshi', 'Mehta', 'Chauhan', 'Rao', 'Iyer', 'Pillai', 'Bose', 'Ghosh', 'Jain', 'Shah',
+]
+OCCUPATIONS = [
+    'Farmer', 'Driver', 'Labourer', 'Shopkeeper', 'Student', 'Unemployed', 'Mechanic', 'Clerk', 'Electrician',
+    'Carpenter', 'Vendor', 'Security Guard', 'Software Engineer', 'Teacher', 'Contractor', 'Tailor',
+]
+EDUCATIONS = ['None', 'Primary', '10th', '12th', 'Graduate', 'Post Graduate']
+COMPLAINT_TYPES = ['Harassment', 'Threat', 'Property Damage', 'Theft', 'Fraud', 'Missing Person', 'Noise', 'Other']
+RELATIONS = ['Son', 'Daughter', 'Wife', 'Husband']
+BLOOD_GROUPS = ['A+', 'A-', 'B+', 'B-', 'O+', 'O-', 'AB+', 'AB-']
+REPEAT_OFFENDER_SHARE = 0.08
+
+
+def weighted_case_types():
+    return [case_type for case_type, weight in CASE_TYPES for _ in range(weight)]
+
+
+def section_catalog(rng):
+    rows = []
+    section = 100
+    for category, weight in CASE_TYPES:
+        for _ in range(weight * 6):
+            section += rng.randint(1, 3)
+            fine = rng.choice((500, 1000, 2000, 5000, 10000, 25000, 50000))
+            years = rng.choice((1, 2, 3, 5, 7, 10, 14))
+            rows.append({
+                'category': category,
+                'article_section': ', '.join(str(section + offset) for offset in range(rng.randint(1, 3))),
+                'offense': f'{category} offence under section {section}',
+                'possible_punishments': f'Imprisonment up to {years} years, or fine, or both',
+                'minimum_fine': f'Rs. {fine:,} or imprisonment up to {years} years',
+            })
+    return rows
+
+
+def accused_rows(rng, count, sequences):
+    case_types = weighted_case_types()
+    identities = []
+    for _ in range(count):
+        if identities and rng.random() < REPEAT_OFFENDER_SHARE:
+            # Repeat offenders reuse a person; some records lose the Aadhaar number.
+            name, relative_name, dob, aadhaar = rng.choice(identities)
+            if rng.random() < 0.3:
+                aadhaar = None
+        else:
+            name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+            relative_name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+            dob = START_DATE - timedelta(days=rng.randrange(16 * 365, 70 * 365))
+            aadhaar = ' '.join(f'{rng.randrange(10000):04d}' for _ in range(3)) if rng.random() < 0.85 else None
+            identities.append((name, relative_name, dob, aadhaar))
+
+        arrested = START_DATE + timedelta(days=rng.randrange(DAYS))
+        ps = rng.choice(STATIONS)
+        key = (station_code(ps), arrested.year)
+        sequences[key] = sequences.get(key, 0) + 1
+        case_type = rng.choice(case_types)
+        yield {
+            'username': name,
+            'relative_name': relative_name,
+            'relation': rng.choice(RELATIONS),
+            'dob': dob,
+            'gender': 'Male' if rng.random() < 0.85 else 'Female',
+            'nationality': 'Indian' if rng.random() < 0.97 else rng.choice(('Nepali', 'Bangladeshi')),
+            'occupation': rng.choice(OCCUPATIONS),
+            'education': rng.choice(EDUCATIONS),
+            'height': f'{rng.randint(150, 190)} cm',
+            'weight': f'{rng.randint(45, 100)} kg',
+            'blood_group': rng.choice(BLOOD_GROUPS),
+            'skin_color': rng.choice(('Fair', 'Wheatish', 'Dark')),
+            'pincode': f'{rng.randint(110001, 855999)}',
+            'aadhaar_no': aadhaar,
+            'permanent_address': f'{rng.randint(1, 999)}, {rng.choice(LAST_NAMES)} Nagar, {ps[:-3]}',
+            'mobile': f'9{rng.randrange(10 ** 9):09d}',
+            'email_id': f'{name.lower().replace(" ", ".")}{rng.randrange(1000)}@example.com',
+            'fir_no': f'FIR/{arrested.year}/{sequences[key]:05d}',
+            'case_type': case_type,
+            'ps': ps,
+            'case_no': format_case_number(ps, arrested.year, sequences[key]),
+            'sections': str(rng.randint(100, 600)),
+            'date_of_arrest': arrested,
+            'place_of_arrest': f'{rng.choice(LAST_NAMES)} Chowk',
+            'warrant_arrest': rng.choice(('Yes', 'No')),
+            'confession_statement': rng.choice(('Yes', 'No')),
+            'court_forward_date_time': datetime.combine(arrested, datetime.min.time())
+            + timedelta(hours=rng.randint(6, 72)),
+            'remand_custody': rng.choice(('Police', 'Judicial')),
+            'bail_status': rng.choice(('Granted', 'Rejected', 'Pending')),
+            'previous_criminal_record': rng.choice(('None', 'Yes')),
+        }
+
+
+def _insert_chunks(connection, table, rows, label):
+    batch = []
+    total = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= CHUNK_SIZE:
+            connection.execute(insert(table), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        connection.execute(insert(table), batch)
+        total += len(batch)
+    print(f'{label:<24} {total:>10} rows')
+    return total
+
+
+def generate(engine, accused=500000, complaints=2000000, decided_share=0.4, meeting_share=0.3, seed=7):
+    rng = random.Random(seed)
+    db.metadata.create_all(engine)
+    sequences = {}
+    with engine.begin() as connection:
+        _insert_chunks(connection, SectionPunishment.__table__, section_catalog(rng), 'section_punishment')
+        _insert_chunks(connection, Accused.__table__, accused_rows(rng, accused, sequences), 'accused')
+        connection.execute(
+            insert(CaseNumberCounter.__table__),
+            [{'ps_code': ps_code, 'year': year, 'next_value': last + 1} for (ps_code, year), last in sequences.items()],
+        )
+
+    with engine.connect() as connection:
+        cases = connection.execute(
+            select(Accused.case_no, Accused.case_type, Accused.court_forward_date_time).order_by(Accused.id)
+        ).all()
+
+    def complaint_rows():
+        for _ in range(complaints):
+            case_no = cases[rng.randrange(len(cases))].case_no
+            yield {
+                'complain_type': rng.choice(COMPLAINT_TYPES),
+                'description': f'Complaint regarding case {case_no}',
+                'case_no': case_no,
+                'status': 'Active' if rng.random() < 0.7 else 'Closed',
+            }
+
+    def decision_rows():
+        for case in cases:
+            if rng.random() >= decided_share:
+                continue
+            solved = rng.random() < 0.6
+            yield {
+                'case_no': case.case_no,
+                'status': 'Solved' if solved else 'Pending',
+                'decided_at': case.court_forward_date_time + timedelta(days=rng.randint(7, 700)),
+                'total_fine': f'{rng.choice((1000, 5000, 10000, 50000))}' if solved and rng.random() < 0.6 else None,
+                'imprisonment': f'{rng.randint(1, 84)} months' if solved and rng.random() < 0.5 else None,
+            }
+
+    def meeting_rows():
+        for case in cases:
+            if rng.random() >= meeting_share:
+                continue
+            hearings = rng.randint(1, 4)
+            start = case.court_forward_date_time + timedelta(days=rng.randint(1, 60))
+            for index in range(hearings):
+                ongoing = index == hearings - 1 and rng.random() < 0.05
+                yield {
+                    'case_no': case.case_no,
+                    'link': f'https://meet.example.com/{case.case_no.lower()}-{index}',
+                    'status': 'Ongoing' if ongoing else 'Ended',
+                    'created_at': start,
+                    'ended_at': None if ongoing else start + timedelta(minutes=rng.randint(15, 180)),
+                }
+                start += timedelta(days=rng.randint(14, 90))
+
+    def message_rows():
+        for _ in range(max(1, len(cases) // 100)):
+            case = cases[rng.randrange(len(cases))]
+            replied = rng.random() < 0.5
+            created = case.court_forward_date_time + timedelta(days=rng.randint(1, 30))
+            yield {
+                'case_type': case.case_type,
+                'case_no': case.case_no,
+                'message': f'Requesting an update on case {case.case_no}',
+                'reply': 'Hearing scheduled' if replied else None,
+                'status': 'Replied' if replied else 'Pending',
+                'created_at': created,
+                'replied_at': created + timedelta(days=2) if replied else None,
+            }
+
+    with engine.begin() as connection:
+        _insert_chunks(connection, ComplaintDescription.__table__, complaint_rows(), 'complaint_description')
+        _insert_chunks(connection, JudgeDecision.__table__, decision_rows(), 'judge_decision')
+        _insert_chunks(connection, MeetingLink.__table__, meeting_rows(), 'meeting_link')
+        _insert_chunks(connection, SuperAdminMessage.__table__, message_rows(), 'super_admin_message')
+
+
+def row_count(engine):
+    with engine.connect() as connection:
+        return connection.execute(select(func.count(Accused.id))).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--database', required=True, help='SQLAlchemy URL of an empty database')
+    parser.add_argument('--accused', type=int, default=500000)
+    parser.add_argument('--complaints', type=int, default=2000000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database)
+    if inspect(engine).has_table('accused') and row_count(engine):
+        parser.error('the database already has accused rows')
+    started = time.perf_counter()
+    generate(engine, accused=args.accused, complaints=args.complaints, seed=args.seed)
+    print(f'done in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+import hashlib
+import math
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, or_
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from metrics import record_cache
+from models import Accused, CaseNumberCounter, CaseNumberEdit, CaseNumberReservation
+
+ALLOCATE_ATTEMPTS = 5
+
+# Each source of taken case numbers, with the column the filter syncs it by.
+_SOURCES = {
+    'max_id': (Accused.id, Accused.case_no),
+    'max_reservation_id': (CaseNumberReservation.id, CaseNumberReservation.case_no),
+    'max_edit_id': (CaseNumberEdit.id, CaseNumberEdit.case_no),
+}
+
+_FILTER = {
+    'instance': None,
+    'max_id': 0,
+    'max_reservation_id': 0,
+    'max_edit_id': 0,
+    'synced_at': 0.0,
+    'refresh_seconds': 30.0,
+}
+_FILTER_LOCK = threading.Lock()
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+def station_code(ps):
+    code = re.sub(r'[^A-Za-z0-9]', '', ps or '').upper()
+    return code[:20] or 'PS'
+
+
+def format_case_number(ps, year, sequence):
+    return f'{station_code(ps)}-{year}-{sequence:05d}'
+
+
+def build_case_number_filter(capacity, error_rate, refresh_seconds=30.0):
+    case_filter = BloomFilter(capacity, error_rate)
+    max_ids = {}
+    for key, (id_column, case_no_column) in _SOURCES.items():
+        max_ids[key] = 0
+        rows = db.session.query(id_column, case_no_column).yield_per(5000)
+        for row_id, case_no in rows:
+            if case_no:
+                case_filter.add(case_no)
+            max_ids[key] = max(max_ids[key], row_id)
+    with _FILTER_LOCK:
+        _FILTER.update(
+            instance=case_filter,
+            synced_at=time.monotonic(),
+            refresh_seconds=refresh_seconds,
+            **max_ids,
+        )
+    return case_filter
+
+
+def _sync_filter():
+    # Picks up accused rows, reservations and case-number edits written by
+    # other workers since the last sync, with one primary-key range scan each.
+    with _FILTER_LOCK:
+        if time.monotonic() - _FILTER['synced_at'] < _FILTER['refresh_seconds']:
+            return
+        _FILTER['synced_at'] = time.monotonic()
+        max_ids = {key: _FILTER[key] for key in _SOURCES}
+
+    new_rows = {
+        key: db.session.query(id_column, case_no_column).filter(id_column > max_ids[key]).all()
+        for key, (id_column, case_no_column) in _SOURCES.items()
+    }
+    with _FILTER_LOCK:
+        for key, rows in new_rows.items():
+            for row_id, case_no in rows:
+                if case_no:
+                    _FILTER['instance'].add(case_no)
+                _FILTER[key] = max(_FILTER[key], row_id)
+
+
+def remember_case_number(case_no):
+    if not case_no:
+        return
+    with _FILTER_LOCK:
+        if _FILTER['instance'] is not None:
+            _FILTER['instance'].add(case_no)
+
+
+def publish_case_number_edit(case_no):
+    # Records, in the caller's transaction, a case number given to an existing
+    # accused; the mapper event below only reaches this worker's filter.
+    if case_no:
+        db.session.add(CaseNumberEdit(case_no=case_no))
+
+
+@event.listens_for(Accused, 'after_insert')
+@event.listens_for(Accused, 'after_update')
+def _remember_written_case_number(_mapper, _connection, target):
+    remember_case_number(target.case_no)
+
+
+def _reserved_elsewhere(case_no, reserved_by):
+    reservations = CaseNumberReservation.query.filter(
+        CaseNumberReservation.case_no == case_no,
+        CaseNumberReservation.expires_at > datetime.now(),
+    )
+    if reserved_by:
+        reservations = reservations.filter(CaseNumberReservation.reserved_by != reserved_by)
+    return reservations.first() is not None
+
+
+def case_number_taken(case_no, reserved_by=None):
+    # Returns ('accused', row) or ('reserved', None) for someone else's live
+    # reservation when taken, else None. The filter holds every accused,
+    # reserved and edited case number, so a miss answers without a query; only
+    # a possible hit is checked against the database. Numbers taken on other
+    # workers reach the filter within the refresh interval, and the unique
+    # index on accused.case_no stays the final check when the record is saved.
+    if _FILTER['instance'] is not None:
+        _sync_filter()
+        with _FILTER_LOCK:
+            if case_no not in _FILTER['instance']:
+                record_cache('case_number_filter', hits=1)
+                return None
+        record_cache('case_number_filter', misses=1)
+
+    accused = Accused.query.with_entities(Accused.id, Accused.username).filter_by(case_no=case_no).first()
+    if accused:
+        return 'accused', accused
+    if _reserved_elsewhere(case_no, reserved_by):
+        return 'reserved', None
+    return None
+
+
+def _next_sequence(ps_code, year):
+    updated = (
+        CaseNumberCounter.query.filter_by(ps_code=ps_code, year=year)
+        .update({'next_value': CaseNumberCounter.next_value + 1}, synchronize_session=False)
+    )
+    if not updated:
+        db.session.add(CaseNumberCounter(ps_code=ps_code, year=year, next_value=2))
+        db.session.flush()
+        return 1
+    # The UPDATE above holds the row lock, so this read sees our own increment.
+    return db.session.query(CaseNumberCounter.next_value).filter_by(ps_code=ps_code, year=year).scalar() - 1
+
+
+def allocate_case_number(ps, reserve_seconds=0, reserved_by=None, year=None):
+    ps_code = station_code(ps)
+    year = year or datetime.now().year
+
+    for attempt in range(ALLOCATE_ATTEMPTS):
+        try:
+            if reserve_seconds:
+                CaseNumberReservation.query.filter(CaseNumberReservation.expires_at <= datetime.now()).delete(
+                    synchronize_session=False
+                )
+            case_no = format_case_number(ps_code, year, _next_sequence(ps_code, year))
+            # Skip numbers an officer already typed in by hand.
+            while case_number_taken(case_no):
+                case_no = format_case_number(ps_code, year, _next_sequence(ps_code, year))
+
+            expires_at = None
+            if reserve_seconds:
+                expires_at = datetime.now() + timedelta(seconds=reserve_seconds)
+                db.session.add(
+                    CaseNumberReservation(
+                        case_no=case_no,
+                        ps_code=ps_code,
+                        reserved_by=reserved_by,
+                        expires_at=expires_at,
+                    )
+                )
+            db.session.commit()
+        except IntegrityError:
+            # Another worker created the same counter row first; retry the increment.
+            db.session.rollback()
+            if attempt == ALLOCATE_ATTEMPTS - 1:
+                raise
+            continue
+
+        remember_case_number(case_no)
+        return case_no, expires_at
+
+
+def release_reservation(case_no, reserved_by=None):
+    # Drops the officer's own reservation (and any expired one) on the number;
+    # a live reservation of another officer is left alone. Runs in the caller's
+    # transaction, so it only takes effect with the insert that uses the number.
+    CaseNumberReservation.query.filter(
+        CaseNumberReservation.case_no == case_no,
+        or_(CaseNumberReservation.reserved_by == reserved_by, CaseNumberReservation.expires_at <= datetime.now()),
+    ).delete(synchronize_session=False)
+
@@ -0,0 +1,169 @@
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import request
+
+from metrics import record_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'application/manifest+json',
+    'image/svg+xml',
+)
+# Streamed responses that are compressed on the fly. Server-Sent Events stay
+# uncompressed so proxies pass each event straight through.
+STREAMED_TYPES = ('text/html',)
+# Pages whose output only changes with a deploy, plus the static files. Their
+# compressed bodies are kept and reused, so they are compressed once, at the
+# highest level, instead of on every request.
+PRECOMPRESSED_ENDPOINTS = ('home', 'about_us', 'auth_center', 'pwa_test', 'base', 'static')
+
+_SETTINGS = {'enabled': True, 'level': 6, 'brotli_quality': 4, 'min_bytes': 500, 'cache_entries': 64}
+_CACHE = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(body, encoding, level=None):
+    if encoding == 'br':
+        return brotli.compress(body, quality=_SETTINGS['brotli_quality'] if level is None else level)
+    return gzip_bytes(body, _SETTINGS['level'] if level is None else level)
+
+
+def gzip_bytes(body, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+def gzip_stream(chunks, level):
+    # Each chunk is compressed and sync-flushed on its own, so the browser can
+    # start parsing the page while the rest is still being rendered.
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def clear_compression_cache():
+    with _CACHE_LOCK:
+        _CACHE.clear()
+
+
+def _cached_compress(key, encoding, load_body):
+    # The key identifies the uncompressed body (ETag of a static file, or a
+    # digest of a rendered page), so a changed page or file gets a new entry.
+    cache_key = (key, encoding)
+    with _CACHE_LOCK:
+        body = _CACHE.get(cache_key)
+        if body is not None:
+            _CACHE.move_to_end(cache_key)
+    if body is not None:
+        record_cache('compressed_responses', hits=1)
+        return body
+    record_cache('compressed_responses', misses=1)
+    body = compress(load_body(), encoding, level=11 if encoding == 'br' else 9)
+    with _CACHE_LOCK:
+        _CACHE[cache_key] = body
+        while len(_CACHE) > _SETTINGS['cache_entries']:
+            _CACHE.popitem(last=False)
+    return body
+
+
+def _negotiate(response, streamed):
+    if (
+        'Content-Encoding' in response.headers
+        or response.status_code not in (200, 201, 203)
+        or request.method == 'HEAD'
+        or response.cache_control.no_transform
+    ):
+        return None
+    return request.accept_encodings.best_match(('gzip',) if streamed else available_encodings())
+
+
+def _read_body(response):
+    # send_file responses are file wrappers in passthrough mode.
+    response.direct_passthrough = False
+    return response.get_data()
+
+
+def _compress_buffered(response, encoding):
+    precompressed = request.endpoint in PRECOMPRESSED_ENDPOINTS
+    if precompressed and request.endpoint == 'static' and response.get_etag()[0]:
+        if response.content_length is not None and response.content_length < _SETTINGS['min_bytes']:
+            return
+        key = ('static', request.path, response.get_etag()[0])
+        body = _cached_compress(key, encoding, lambda: _read_body(response))
+        close = getattr(response.response, 'close', None)
+        if close is not None:
+            close()
+    else:
+        data = _read_body(response)
+        if len(data) < _SETTINGS['min_bytes']:
+            return
+        if precompressed:
+            body = _cached_compress((request.endpoint, hashlib.sha1(data).hexdigest()), encoding, lambda: data)
+        else:
+            body = compress(data, encoding)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # Same content, different bytes: a weak validator still answers
+        # If-None-Match with 304.
+        response.set_etag(etag, weak=True)
+
+
+def init_compression(app):
+    _SETTINGS.update(
+        enabled=app.config['COMPRESSION_ENABLED'],
+        level=app.config['COMPRESSION_LEVEL'],
+        brotli_quality=app.config['COMPRESSION_BROTLI_QUALITY'],
+        min_bytes=app.config['COMPRESSION_MIN_BYTES'],
+        cache_entries=app.config['COMPRESSION_CACHE_ENTRIES'],
+    )
+    if not _SETTINGS['enabled']:
+        return
+
+    @app.after_request
+    def _compress_response(response):
+        if response.mimetype not in COMPRESSIBLE_TYPES:
+            return response
+        # Generator bodies; send_file's passthrough file wrappers are read whole.
+        streamed = response.is_streamed and not response.direct_passthrough
+        if streamed and response.mimetype not in STREAMED_TYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = _negotiate(response, streamed)
+        if encoding is None:
+            return response
+        if streamed:
+            response.response = gzip_stream(response.response, _SETTINGS['level'])
+            response.headers['Content-Encoding'] = 'gzip'
+            response.headers.remove('Content-Length')
+        else:
+            _compress_buffered(response, encoding)
+        return response
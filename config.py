@@ -9,9 +9,58 @@ class Config:
         'sqlite:///criminology.db'
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL', '')
+    SQLALCHEMY_BINDS = {'replica': DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', '30'))
+    REPLICA_HEARTBEAT_SECONDS = float(os.getenv('REPLICA_HEARTBEAT_SECONDS', '5'))
+    REPLICA_LAG_CHECK_SECONDS = float(os.getenv('REPLICA_LAG_CHECK_SECONDS', '2'))
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = os.getenv('SESSION_COOKIE_SAMESITE', 'Lax')
     SESSION_COOKIE_SECURE = os.getenv('SESSION_COOKIE_SECURE', 'false').lower() in ('1', 'true', 'yes')
     PERMANENT_SESSION_LIFETIME = timedelta(hours=int(os.getenv('SESSION_LIFETIME_HOURS', '8')))
+    ACTIVITY_FEED_SIZE = int(os.getenv('ACTIVITY_FEED_SIZE', '50'))
+    ACTIVITY_BATCH_SIZE = int(os.getenv('ACTIVITY_BATCH_SIZE', '100'))
+    ACTIVITY_FLUSH_SECONDS = float(os.getenv('ACTIVITY_FLUSH_SECONDS', '2'))
+    EVENTS_BACKEND = os.getenv('EVENTS_BACKEND', 'local')
+    EVENTS_RELAY_PATH = os.getenv('EVENTS_RELAY_PATH', 'events_relay.db')
+    EVENTS_MAX_CONNECTIONS = int(os.getenv('EVENTS_MAX_CONNECTIONS', '100'))
+    EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', '100'))
+    EVENTS_HEARTBEAT_SECONDS = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', '15'))
+    MEETING_LINK_CACHE_SECONDS = float(os.getenv('MEETING_LINK_CACHE_SECONDS', '30'))
+    MEETING_MAX_AGE_HOURS = float(os.getenv('MEETING_MAX_AGE_HOURS', '12'))
+    MEETING_SWEEP_INTERVAL_SECONDS = float(os.getenv('MEETING_SWEEP_INTERVAL_SECONDS', '300'))
+    CASE_NUMBER_RESERVATION_SECONDS = int(os.getenv('CASE_NUMBER_RESERVATION_SECONDS', '900'))
+    CASE_NUMBER_FILTER_CAPACITY = int(os.getenv('CASE_NUMBER_FILTER_CAPACITY', '1000000'))
+    CASE_NUMBER_FILTER_ERROR_RATE = float(os.getenv('CASE_NUMBER_FILTER_ERROR_RATE', '0.01'))
+    CASE_NUMBER_FILTER_REFRESH_SECONDS = float(os.getenv('CASE_NUMBER_FILTER_REFRESH_SECONDS', '30'))
+    FACET_CACHE_SECONDS = float(os.getenv('FACET_CACHE_SECONDS', '60'))
+    PERSON_CLUSTER_INTERVAL_SECONDS = float(os.getenv('PERSON_CLUSTER_INTERVAL_SECONDS', '300'))
+    ANALYTICS_CACHE_SECONDS = float(os.getenv('ANALYTICS_CACHE_SECONDS', '10'))
+    METRICS_DIR = os.getenv('METRICS_DIR', '')
+    METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '5'))
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    SQL_PROFILER_ENABLED = os.getenv('SQL_PROFILER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    SQL_PROFILER_N_PLUS_ONE_THRESHOLD = int(os.getenv('SQL_PROFILER_N_PLUS_ONE_THRESHOLD', '5'))
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '100'))
+    SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', '')
+    SLOW_QUERY_LOG_PARAMETERS = os.getenv('SLOW_QUERY_LOG_PARAMETERS', 'false').lower() in ('1', 'true', 'yes')
+    SQL_RAISE_ON_LAZY_LOAD = os.getenv('SQL_RAISE_ON_LAZY_LOAD', 'false').lower() in ('1', 'true', 'yes')
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', '6'))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+    COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', '500'))
+    COMPRESSION_CACHE_ENTRIES = int(os.getenv('COMPRESSION_CACHE_ENTRIES', '64'))
+    PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    PAGE_CACHE_MAX_AGE = int(os.getenv('PAGE_CACHE_MAX_AGE', '300'))
+    API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', '50'))
+    API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '500'))
+    INBOX_PAGE_SIZE = int(os.getenv('INBOX_PAGE_SIZE', '50'))
@@ -0,0 +1,234 @@
+import threading
+import time
+from datetime import date
+
+import numpy as np
+from sqlalchemy import func, select
+
+from extensions import db
+from metrics import record_cache
+from models import Accused, AccusedChangeLog
+
+CATEGORY_FIELDS = ('gender', 'nationality', 'occupation', 'education')
+AGE_BIN_EDGES = np.arange(0, 105, 5)
+AGE_QUANTILES = (('p10', 0.1), ('median', 0.5), ('p90', 0.9))
+MAX_AGE_YEARS = 120
+MAX_CATEGORIES = 12
+UNSPECIFIED = 'Unspecified'
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_NAT = np.iinfo(np.int64).min
+
+_PROJECTION = (
+    Accused.case_type,
+    Accused.dob,
+    Accused.date_of_arrest,
+    Accused.gender,
+    Accused.nationality,
+    Accused.occupation,
+    Accused.education,
+)
+
+_CACHE = {'key': None, 'columns': None, 'results': {}, 'checked_at': 0.0, 'ttl_seconds': 10.0}
+_CACHE_LOCK = threading.Lock()
+
+
+def configure_stats_cache(ttl_seconds):
+    with _CACHE_LOCK:
+        _CACHE.update(key=None, columns=None, results={}, checked_at=0.0, ttl_seconds=ttl_seconds)
+
+
+def factorize(values):
+    # Categorical column -> (int32 codes, labels). Codes are assigned per distinct
+    # raw value at C speed; normalisation (blanks share one label) then only runs
+    # over the handful of distinct values.
+    raw = {value: index for index, value in enumerate(dict.fromkeys(values))}
+    codes = np.fromiter(map(raw.__getitem__, values), dtype=np.int32, count=len(values))
+    lookup = {}
+    remap = np.array(
+        [lookup.setdefault((value or '').strip() or UNSPECIFIED, len(lookup)) for value in raw],
+        dtype=np.int32,
+    )
+    return remap[codes] if remap.size else codes, list(lookup)
+
+
+def date_array(values):
+    # Much faster than np.array(values, dtype='datetime64[D]') on date objects.
+    days = np.fromiter(
+        (value.toordinal() - _EPOCH_ORDINAL if value is not None else _NAT for value in values),
+        dtype=np.int64,
+        count=len(values),
+    )
+    return days.view('datetime64[D]')
+
+
+def build_columns(rows):
+    fields = list(zip(*rows)) if rows else [()] * len(_PROJECTION)
+    case_type, dob, date_of_arrest, gender, nationality, occupation, education = fields
+    return {
+        'size': len(rows),
+        'case_type': factorize(case_type),
+        'dob': date_array(dob),
+        'date_of_arrest': date_array(date_of_arrest),
+        'gender': factorize(gender),
+        'nationality': factorize(nationality),
+        'occupation': factorize(occupation),
+        'education': factorize(education),
+    }
+
+
+def load_accused_columns(executor=None):
+    executor = executor or db.session
+    return build_columns(executor.execute(select(*_PROJECTION)).all())
+
+
+def ages_at_arrest(columns):
+    dob, arrested = columns['dob'], columns['date_of_arrest']
+    valid = ~np.isnat(dob) & ~np.isnat(arrested)
+    ages = np.full(columns['size'], np.nan)
+    ages[valid] = (arrested[valid] - dob[valid]).astype(np.int64) / 365.2425
+    valid &= (ages >= 0) & (ages < MAX_AGE_YEARS)
+    return ages, valid
+
+
+def _group_quantiles(values, counts, quantile):
+    # Linear-interpolated quantile per group over values sorted by (group, value).
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    position = starts + quantile * np.maximum(counts - 1, 0)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.ceil(position).astype(np.int64)
+    result = np.full(len(counts), np.nan)
+    present = counts > 0
+    if values.size:
+        low, high = values[lower[present]], values[upper[present]]
+        result[present] = low + (high - low) * (position[present] - lower[present])
+    return result
+
+
+def _rounded(value):
+    return None if np.isnan(value) else round(float(value), 1)
+
+
+def age_statistics(columns):
+    ages, valid = ages_at_arrest(columns)
+    groups, group_labels = columns['case_type']
+    groups, ages = groups[valid], ages[valid]
+    group_count = len(group_labels)
+    bin_count = len(AGE_BIN_EDGES) - 1
+
+    bins = np.clip(np.searchsorted(AGE_BIN_EDGES, ages, side='right') - 1, 0, bin_count - 1)
+    histogram = np.bincount(groups * bin_count + bins, minlength=group_count * bin_count).reshape(group_count, bin_count)
+    counts = np.bincount(groups, minlength=group_count)
+    sums = np.bincount(groups, weights=ages, minlength=group_count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+
+    # One float sort orders by (case type, age) because ages stay below MAX_AGE_YEARS.
+    offsets = groups * float(MAX_AGE_YEARS)
+    sorted_ages = np.sort(offsets + ages) - np.repeat(np.arange(group_count) * float(MAX_AGE_YEARS), counts)
+    quantiles = {name: _group_quantiles(sorted_ages, counts, q) for name, q in AGE_QUANTILES}
+
+    overall = {'count': int(ages.size), 'mean': _rounded(ages.mean()) if ages.size else None}
+    for name, q in AGE_QUANTILES:
+        overall[name] = _rounded(np.quantile(ages, q)) if ages.size else None
+
+    result_groups = []
+    for index in np.argsort(-counts, kind='stable'):
+        if not counts[index]:
+            continue
+        entry = {'case_type': group_labels[index], 'count': int(counts[index]), 'mean': _rounded(means[index])}
+        for name, _ in AGE_QUANTILES:
+            entry[name] = _rounded(quantiles[name][index])
+        entry['histogram'] = histogram[index].tolist()
+        result_groups.append(entry)
+
+    return {
+        'bin_edges': AGE_BIN_EDGES.tolist(),
+        'labels': [f'{low}-{high - 1}' for low, high in zip(AGE_BIN_EDGES[:-1], AGE_BIN_EDGES[1:])],
+        'overall': overall,
+        'groups': result_groups,
+        'excluded': int(columns['size'] - ages.size),
+    }
+
+
+def category_breakdown(columns, field, limit=MAX_CATEGORIES):
+    groups, group_labels = columns['case_type']
+    codes, labels = columns[field]
+    table = np.bincount(
+        groups * len(labels) + codes, minlength=len(group_labels) * len(labels)
+    ).reshape(len(group_labels), len(labels))
+
+    # Keep the most common categories and fold the long tail into 'Other'.
+    order = np.argsort(-table.sum(axis=0), kind='stable')
+    kept = table[:, order[:limit]]
+    categories = [labels[index] for index in order[:limit]]
+    if order.size > limit:
+        kept = np.column_stack([kept, table[:, order[limit:]].sum(axis=1)])
+        categories.append('Other')
+
+    totals = kept.sum(axis=1)
+    return {
+        'field': field,
+        'categories': categories,
+        'totals': kept.sum(axis=0).tolist(),
+        'groups': [
+            {'case_type': group_labels[index], 'counts': kept[index].tolist(), 'total': int(totals[index])}
+            for index in np.argsort(-totals, kind='stable')
+        ],
+    }
+
+
+def data_version():
+    # Inserts and deletes move the count or max id; edits always add a change-log row.
+    count, max_id = db.session.query(func.count(Accused.id), func.max(Accused.id)).one()
+    last_change = db.session.query(func.max(AccusedChangeLog.id)).scalar()
+    return count, max_id or 0, last_change or 0
+
+
+def _current_columns():
+    # The version key is re-checked at most once per ttl; a new key reloads the
+    # arrays and drops every statistic computed from the old ones.
+    now = time.monotonic()
+    with _CACHE_LOCK:
+        if _CACHE['columns'] is not None and now - _CACHE['checked_at'] < _CACHE['ttl_seconds']:
+            return _CACHE['key'], _CACHE['columns'], _CACHE['results']
+
+    key = data_version()
+    with _CACHE_LOCK:
+        if _CACHE['columns'] is not None and _CACHE['key'] == key:
+            _CACHE['checked_at'] = now
+            return key, _CACHE['columns'], _CACHE['results']
+
+    columns = load_accused_columns()
+    with _CACHE_LOCK:
+        _CACHE.update(key=key, columns=columns, results={}, checked_at=now)
+        return key, columns, _CACHE['results']
+
+
+def _cached(name, compute):
+    _, columns, results = _current_columns()
+    with _CACHE_LOCK:
+        if name in results:
+            record_cache('analytics', hits=1)
+            return results[name]
+    record_cache('analytics', misses=1)
+    value = compute(columns)
+    with _CACHE_LOCK:
+        results[name] = value
+    return value
+
+
+def age_distribution():
+    return _cached('age', age_statistics)
+
+
+def breakdown(field):
+    return _cached(field, lambda columns: category_breakdown(columns, field))
+
+
+def chartjs_data(labels, series):
+    return {'labels': labels, 'datasets': [{'label': name, 'data': values} for name, values in series]}
+
+
+def uplot_data(x_values, series):
+    return {'series': [name for name, _ in series], 'data': [x_values] + [values for _, values in series]}
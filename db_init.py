@@ -1,4 +1,157 @@
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import inspect
+
 from extensions import db
+from inbox import ensure_inbox_counters
+from job_locks import job_lock
+from lifecycle import ensure_lifecycle
+from models import SchemaVersion
+from rollups import ensure_rollups
+from sentencing import ensure_sentencing
+
+# Bump whenever run_startup_schema_checks learns a new step. /health reports the
+# app as not ready while the database is behind this version.
+SCHEMA_VERSION = 5
+
+SEED_LOCK = 'startup-seeding'
+SEED_LOCK_SECONDS = 900
+STARTUP_SEEDS = (ensure_rollups, ensure_lifecycle, ensure_sentencing, ensure_inbox_counters)
+
+# Unique indexes the code relies on as its final check. Legacy duplicates keep
+# them from being built; /health reports the app as not ready until they exist.
+# They are only built on startup, so the check runs once there.
+UNIQUE_INDEXES = (
+    ('ux_accused_case_no', 'accused', 'case_no'),
+    ('ux_judge_decision_case_no', 'judge_decision', 'case_no'),
+)
+
+_MISSING_INDEXES = {'names': []}
+
+
+def _ensure_index(name, table, columns):
+    inspector = inspect(db.engine)
+    if table not in inspector.get_table_names():
+        return
+    if any(index['name'] == name for index in inspector.get_indexes(table)):
+        return
+    db.session.execute(db.text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+    db.session.commit()
+
+
+def _ensure_column(table, column, ddl_type):
+    inspector = inspect(db.engine)
+    if table not in inspector.get_table_names():
+        return
+    if any(existing['name'] == column for existing in inspector.get_columns(table)):
+        return
+    db.session.execute(db.text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl_type} NULL'))
+    db.session.commit()
+
+
+def _needs_unique_index(name, table, column):
+    inspector = inspect(db.engine)
+    if table not in inspector.get_table_names():
+        return False
+    for index in inspector.get_indexes(table):
+        if index['name'] == name or (index.get('unique') and index['column_names'] == [column]):
+            return False
+    return not any(constraint['column_names'] == [column] for constraint in inspector.get_unique_constraints(table))
+
+
+def _ensure_unique_index(name, table, column):
+    if not _needs_unique_index(name, table, column):
+        return
+    duplicates = db.session.execute(
+        db.text(
+            f"""
+            SELECT COUNT(*) FROM (
+              SELECT {column} FROM {table} WHERE {column} IS NOT NULL GROUP BY {column} HAVING COUNT(*) > 1
+            ) AS duplicated
+            """
+        )
+    ).scalar()
+    if duplicates:
+        current_app.logger.warning('Not building %s: %d values of %s.%s are duplicated', name, duplicates, table, column)
+        return
+    db.session.execute(db.text(f'CREATE UNIQUE INDEX {name} ON {table} ({column})'))
+    db.session.commit()
+
+
+def _ensure_single_ongoing_meeting_index():
+    name = 'ux_meeting_link_one_ongoing'
+    inspector = inspect(db.engine)
+    if 'meeting_link' not in inspector.get_table_names():
+        return
+    if any(index['name'] == name for index in inspector.get_indexes('meeting_link')):
+        return
+
+    # End older duplicates first so the unique index can be built on legacy data.
+    db.session.execute(
+        db.text(
+            """
+            UPDATE meeting_link SET status = 'Ended', ended_at = CURRENT_TIMESTAMP
+            WHERE status = 'Ongoing'
+              AND id NOT IN (
+                SELECT keep_id FROM (
+                  SELECT MAX(id) AS keep_id FROM meeting_link WHERE status = 'Ongoing' GROUP BY case_no
+                ) AS latest
+              )
+            """
+        )
+    )
+
+    if db.engine.dialect.name == 'mysql':
+        # MySQL has no partial indexes; NULL keys are not unique-checked, so index
+        # an expression that is only non-NULL for ongoing rows (MySQL 8.0.13+).
+        ddl = f"CREATE UNIQUE INDEX {name} ON meeting_link ((CASE WHEN status = 'Ongoing' THEN case_no END))"
+    else:
+        ddl = f"CREATE UNIQUE INDEX {name} ON meeting_link (case_no) WHERE status = 'Ongoing'"
+    db.session.execute(db.text(ddl))
+    db.session.commit()
+
+
+def _ensure_single_decision_per_case():
+    name = 'ux_judge_decision_case_no'
+    if not _needs_unique_index(name, 'judge_decision', 'case_no'):
+        return
+
+    # Legacy data may hold several decisions for one case. Those are court
+    # records, so they are left for an operator to resolve and the index waits.
+    duplicates = db.session.execute(
+        db.text('SELECT case_no FROM judge_decision GROUP BY case_no HAVING COUNT(*) > 1 ORDER BY case_no')
+    ).scalars().all()
+    if duplicates:
+        current_app.logger.warning(
+            'Not building %s: %d cases have more than one judge decision: %s',
+            name,
+            len(duplicates),
+            ', '.join(duplicates),
+        )
+        return
+    db.session.execute(db.text(f'CREATE UNIQUE INDEX {name} ON judge_decision (case_no)'))
+    db.session.commit()
+
+
+def _ensure_message_read_at():
+    inspector = inspect(db.engine)
+    if 'super_admin_message' not in inspector.get_table_names():
+        return
+    if any(column['name'] == 'read_at' for column in inspector.get_columns('super_admin_message')):
+        return
+    _ensure_column('super_admin_message', 'read_at', 'DATETIME')
+    # Messages answered before read tracking existed were obviously read.
+    db.session.execute(
+        db.text(
+            """
+            UPDATE super_admin_message
+            SET read_at = COALESCE(replied_at, created_at)
+            WHERE status = 'Replied' AND read_at IS NULL
+            """
+        )
+    )
+    db.session.commit()
 
 
 def run_startup_schema_checks():
@@ -81,3 +234,133 @@ def run_startup_schema_checks():
             db.create_all()
         except Exception:
             pass
+
+    try:
+        _ensure_index('ix_meeting_link_case_status', 'meeting_link', ('case_no', 'status'))
+    except Exception:
+        db.session.rollback()
+
+    try:
+        _ensure_single_ongoing_meeting_index()
+    except Exception:
+        db.session.rollback()
+
+    try:
+        _ensure_index('ix_accused_case_type_case_no', 'accused', ('case_type', 'case_no'))
+    except Exception:
+        db.session.rollback()
+
+    try:
+        _ensure_unique_index('ux_accused_case_no', 'accused', 'case_no')
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception('Could not build ux_accused_case_no')
+
+    try:
+        _ensure_column('accused', 'aadhaar_key', 'VARCHAR(12)')
+        _ensure_column('accused', 'person_id', 'INTEGER')
+        _ensure_index('ix_accused_aadhaar_key', 'accused', ('aadhaar_key',))
+        _ensure_index('ix_accused_person_id', 'accused', ('person_id',))
+        _ensure_index('ix_accused_dob', 'accused', ('dob',))
+    except Exception:
+        db.session.rollback()
+
+    try:
+        _ensure_index('ix_complaint_description_case_no', 'complaint_description', ('case_no',))
+        _ensure_index('ix_section_punishment_category', 'section_punishment', ('category',))
+    except Exception:
+        db.session.rollback()
+
+    try:
+        _ensure_single_decision_per_case()
+    except Exception:
+        db.session.rollback()
+
+    try:
+        _ensure_column('judge_decision', 'fine_paise', 'BIGINT')
+        _ensure_column('judge_decision', 'imprisonment_days', 'INTEGER')
+        _ensure_column('section_punishment', 'min_fine_paise', 'BIGINT')
+        _ensure_column('section_punishment', 'max_fine_paise', 'BIGINT')
+        _ensure_column('section_punishment', 'min_imprisonment_days', 'INTEGER')
+        _ensure_column('section_punishment', 'max_imprisonment_days', 'INTEGER')
+    except Exception:
+        db.session.rollback()
+
+    try:
+        _ensure_message_read_at()
+        _ensure_index('ix_super_admin_message_created_at', 'super_admin_message', ('created_at',))
+        _ensure_index('ix_super_admin_message_status_created', 'super_admin_message', ('status', 'created_at'))
+        _ensure_index('ix_super_admin_message_case_created', 'super_admin_message', ('case_no', 'created_at'))
+    except Exception:
+        db.session.rollback()
+
+    try:
+        _record_schema_version()
+    except Exception:
+        db.session.rollback()
+
+    try:
+        check_unique_indexes()
+    except Exception:
+        db.session.rollback()
+
+
+def run_startup_seeding():
+    # Every worker calls this on start. Two of them seeding the derived tables
+    # at once collide on their keys, so only the lease holder runs the steps;
+    # the others start without waiting. Each step only seeds empty tables, so
+    # one that fails is retried on the next start.
+    db.session.commit()
+    with job_lock(SEED_LOCK, SEED_LOCK_SECONDS) as holder:
+        if holder is None:
+            return
+        for seed in STARTUP_SEEDS:
+            try:
+                seed()
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception('Startup step %s failed', seed.__name__)
+
+
+def missing_schema():
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            missing.append(table.name)
+            continue
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        missing.extend(f'{table.name}.{column.name}' for column in table.columns if column.name not in columns)
+    return missing
+
+
+def check_unique_indexes():
+    missing = [name for name, table, column in UNIQUE_INDEXES if _needs_unique_index(name, table, column)]
+    _MISSING_INDEXES['names'] = missing
+    if missing:
+        current_app.logger.warning('Unique indexes missing, reporting not ready: %s', ', '.join(missing))
+    return missing
+
+
+def missing_unique_indexes():
+    return list(_MISSING_INDEXES['names'])
+
+
+def _record_schema_version():
+    # Only recorded once every model table and column exists, so a half-applied
+    # upgrade keeps reporting the older version.
+    if missing_schema():
+        return
+    row = db.session.get(SchemaVersion, 1)
+    if row is None:
+        db.session.add(SchemaVersion(id=1, version=SCHEMA_VERSION, applied_at=datetime.now()))
+    elif row.version < SCHEMA_VERSION:
+        row.version = SCHEMA_VERSION
+        row.applied_at = datetime.now()
+    db.session.commit()
+
+
+def schema_version():
+    row = db.session.get(SchemaVersion, 1)
+    return row.version if row else None
@@ -0,0 +1,83 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+_WAIT_STATS = {'checkouts': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0, 'timeouts': 0}
+_WAIT_LOCK = threading.Lock()
+
+
+class TimedQueuePool(QueuePool):
+    # QueuePool that records how long each checkout waited for a free connection.
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeout:
+            with _WAIT_LOCK:
+                _WAIT_STATS['timeouts'] += 1
+            raise
+        waited = time.perf_counter() - started
+        with _WAIT_LOCK:
+            _WAIT_STATS['checkouts'] += 1
+            _WAIT_STATS['wait_seconds'] += waited
+            _WAIT_STATS['max_wait_seconds'] = max(_WAIT_STATS['max_wait_seconds'], waited)
+        return connection
+
+
+def _is_sqlite_memory(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def build_engine_options(config):
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+    if _is_sqlite_memory(url):
+        # Flask-SQLAlchemy pins in-memory SQLite to a single shared connection.
+        return options
+
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=config['DB_POOL_SIZE'],
+        max_overflow=config['DB_MAX_OVERFLOW'],
+        pool_timeout=config['DB_POOL_TIMEOUT'],
+        pool_recycle=config['DB_POOL_RECYCLE'],
+    )
+    if url.get_backend_name() == 'sqlite':
+        # The busy timeout below does the waiting; sqlite3's own default is 5s.
+        options['connect_args'] = {'timeout': config['SQLITE_BUSY_TIMEOUT_MS'] / 1000}
+    return options
+
+
+def configure_sqlite(engine, busy_timeout_ms, mmap_size):
+    if engine.dialect.name != 'sqlite' or _is_sqlite_memory(engine.url):
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL lets readers keep reading while one writer commits.
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute(f'PRAGMA busy_timeout={int(busy_timeout_ms)}')
+        cursor.execute(f'PRAGMA mmap_size={int(mmap_size)}')
+        cursor.close()
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    with _WAIT_LOCK:
+        stats.update(_WAIT_STATS)
+    stats['mean_wait_seconds'] = stats['wait_seconds'] / stats['checkouts'] if stats['checkouts'] else 0.0
+    return stats
@@ -0,0 +1,178 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import click
+from flask import g, has_request_context, request, session
+from flask.cli import with_appcontext
+from sqlalchemy import event, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from db_routing import REPLICA_BIND, RoutingSession
+from extensions import db
+from metrics import inc
+from models import ReplicaHeartbeat
+
+PRIMARY_UNTIL_KEY = 'read_primary_until'
+READ_METHODS = ('GET', 'HEAD')
+
+_SETTINGS = {'max_lag_seconds': 30.0, 'check_seconds': 2.0}
+_STATE = {'checked_at': None, 'lag_seconds': None, 'error': None}
+_LOCK = threading.Lock()
+
+
+def read_only(view):
+    # Lets a non-GET route read from the replica, e.g. a search form that POSTs.
+    view.read_only = True
+    return view
+
+
+def primary_only(view):
+    # Keeps a GET route on the primary, e.g. one that writes or must not read stale data.
+    view.primary_only = True
+    return view
+
+
+def write_heartbeat():
+    now = datetime.utcnow()
+    if not db.session.query(ReplicaHeartbeat).filter_by(id=1).update({'beat_at': now}):
+        db.session.add(ReplicaHeartbeat(id=1, beat_at=now))
+    db.session.commit()
+
+
+def _measure_lag():
+    try:
+        with db.engines[REPLICA_BIND].connect() as connection:
+            beat_at = connection.execute(select(ReplicaHeartbeat.beat_at).where(ReplicaHeartbeat.id == 1)).scalar()
+    except SQLAlchemyError as exc:
+        return None, str(exc.__class__.__name__)
+    if beat_at is None:
+        return None, 'no heartbeat'
+    # The heartbeat is rewritten every REPLICA_HEARTBEAT_SECONDS, so an
+    # up-to-date replica still reads as up to that many seconds behind.
+    return max((datetime.utcnow() - beat_at).total_seconds(), 0.0), None
+
+
+def replica_lag():
+    # Cached for REPLICA_LAG_CHECK_SECONDS; requests arriving while one thread
+    # measures use the previous value.
+    now = time.monotonic()
+    with _LOCK:
+        checked_at = _STATE['checked_at']
+        if checked_at is not None and now - checked_at < _SETTINGS['check_seconds']:
+            return _STATE['lag_seconds']
+        _STATE['checked_at'] = now
+    lag, error = _measure_lag()
+    with _LOCK:
+        _STATE.update(lag_seconds=lag, error=error)
+    return lag
+
+
+def replica_usable():
+    lag = replica_lag()
+    return lag is not None and lag <= _SETTINGS['max_lag_seconds']
+
+
+def replica_status():
+    if REPLICA_BIND not in db.engines:
+        return {'configured': False}
+    lag = replica_lag()
+    with _LOCK:
+        error = _STATE['error']
+    return {
+        'configured': True,
+        'lag_seconds': None if lag is None else round(lag, 3),
+        'max_lag_seconds': _SETTINGS['max_lag_seconds'],
+        'serving_reads': lag is not None and lag <= _SETTINGS['max_lag_seconds'],
+        'error': error,
+    }
+
+
+def _read_target(view):
+    if request.method not in READ_METHODS and not getattr(view, 'read_only', False):
+        return None
+    if getattr(view, 'primary_only', False):
+        return 'marked_primary'
+    # Read-your-writes: a client that just committed keeps reading the primary
+    # until the replica has had time to catch up.
+    if session.get(PRIMARY_UNTIL_KEY, 0) > time.time():
+        return 'recent_write'
+    if not replica_usable():
+        return 'replica_lagging'
+    return 'replica'
+
+
+def _pin_to_primary(_db_session):
+    if has_request_context() and g.get('db_wrote'):
+        session[PRIMARY_UNTIL_KEY] = time.time() + _SETTINGS['max_lag_seconds']
+
+
+def _heartbeat_loop(app, interval_seconds):
+    while True:
+        time.sleep(interval_seconds)
+        with app.app_context():
+            try:
+                write_heartbeat()
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Replica heartbeat failed')
+
+
+def init_replica(app):
+    if REPLICA_BIND not in app.config['SQLALCHEMY_BINDS']:
+        return
+    _SETTINGS.update(
+        max_lag_seconds=app.config['REPLICA_MAX_LAG_SECONDS'],
+        check_seconds=app.config['REPLICA_LAG_CHECK_SECONDS'],
+    )
+    if not event.contains(RoutingSession, 'after_commit', _pin_to_primary):
+        event.listen(RoutingSession, 'after_commit', _pin_to_primary)
+
+    @app.before_request
+    def _route_reads():
+        if request.endpoint == 'static':
+            return
+        target = _read_target(app.view_functions.get(request.endpoint))
+        if target is None:
+            return
+        g.db_use_replica = target == 'replica'
+        inc('db_read_routing_total', {'target': 'replica' if g.db_use_replica else 'primary', 'reason': target})
+
+    write_heartbeat()
+    if app.config['REPLICA_HEARTBEAT_SECONDS'] > 0:
+        threading.Thread(
+            target=_heartbeat_loop,
+            args=(app, app.config['REPLICA_HEARTBEAT_SECONDS']),
+            name='replica-heartbeat',
+            daemon=True,
+        ).start()
+
+
+def _sqlite_path(engine):
+    if engine.dialect.name != 'sqlite' or engine.url.database in (None, '', ':memory:'):
+        raise click.ClickException('sync-replica only copies file-based SQLite databases.')
+    return engine.url.database
+
+
+@click.command('sync-replica', help='Copy the primary SQLite file over the replica file (local testing).')
+@click.option('--interval', type=float, default=0, help='Keep copying every N seconds instead of once.')
+@with_appcontext
+def sync_replica_command(interval):
+    if REPLICA_BIND not in db.engines:
+        raise click.ClickException('Set DATABASE_REPLICA_URL first.')
+    primary_path = _sqlite_path(db.engines[None])
+    replica_path = _sqlite_path(db.engines[REPLICA_BIND])
+    while True:
+        write_heartbeat()
+        source = sqlite3.connect(primary_path)
+        target = sqlite3.connect(replica_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        click.echo(f'{datetime.now():%H:%M:%S} copied {primary_path} -> {replica_path}')
+        if interval <= 0:
+            return
+        time.sleep(interval)
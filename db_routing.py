@@ -0,0 +1,20 @@
+from flask import g
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(Session):
+    # SELECTs go to the replica engine while the request allows it (see
+    # db_replica.init_replica); flushes, DML and anything else use the primary.
+    # The first write turns replica reads off for the rest of the request.
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase):
+                g.db_wrote = True
+                g.db_use_replica = False
+            elif g.get('db_use_replica') and isinstance(clause, Select):
+                return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,92 @@
+from datetime import datetime
+
+from extensions import db
+from lifecycle import refresh_case_lifecycles
+from models import Accused, JudgeDecision
+from rollups import count_decision_changes
+from security import is_valid_case_no
+from sentencing import parse_fine_paise, parse_imprisonment_days
+from upserts import upsert
+
+DECISION_STATUSES = ('Pending', 'Solved')
+MAX_BATCH_DECISIONS = 200
+# Length of the judge_decision.total_fine and imprisonment columns.
+MAX_TERM_LENGTH = 50
+
+
+def _entry_error(entry, seen):
+    case_no = entry['case_no']
+    if not is_valid_case_no(case_no):
+        return 'Invalid case number'
+    if case_no in seen:
+        return 'Case listed more than once'
+    if entry['status'] not in DECISION_STATUSES:
+        return 'Decision must be Pending or Solved'
+    for name in ('total_fine', 'imprisonment'):
+        if len(entry.get(name) or '') > MAX_TERM_LENGTH:
+            return f'{name} is longer than {MAX_TERM_LENGTH} characters'
+    return None
+
+
+def _decision_row(entry, decided_at):
+    # The upsert skips the mapper events, so the typed sentencing columns are
+    # filled in here.
+    row = dict(entry, decided_at=decided_at)
+    if 'total_fine' in entry:
+        row['fine_paise'] = parse_fine_paise(entry['total_fine'])
+    if 'imprisonment' in entry:
+        row['imprisonment_days'] = parse_imprisonment_days(entry['imprisonment'])
+    return row
+
+
+def record_decisions(entries):
+    # Writes many decisions in one transaction with a single upsert keyed on
+    # the unique judge_decision.case_no, so a re-decided case is overwritten
+    # in place. Entries carrying only case_no and status leave the fine and
+    # imprisonment of an existing decision as they are; every entry must have
+    # the same keys. Returns one {'case_no', 'success', 'message'} per entry,
+    # in order; invalid entries are reported and skipped.
+    results = []
+    valid = {}
+    for entry in entries:
+        error = _entry_error(entry, valid)
+        results.append({'case_no': entry['case_no'], 'success': error is None, 'message': error or ''})
+        if error is None:
+            valid[entry['case_no']] = entry
+
+    if not valid:
+        return results
+
+    arrest_days = dict(
+        db.session.query(Accused.case_no, Accused.date_of_arrest).filter(Accused.case_no.in_(valid)).all()
+    )
+    for result in results:
+        if result['success'] and result['case_no'] not in arrest_days:
+            result.update(success=False, message='Case not found')
+            valid.pop(result['case_no'])
+    if not valid:
+        return results
+
+    previous = dict(
+        db.session.query(JudgeDecision.case_no, JudgeDecision.status).filter(JudgeDecision.case_no.in_(valid)).all()
+    )
+    now = datetime.now()
+    rows = [_decision_row(entry, now) for entry in valid.values()]
+    try:
+        upsert(db.session, db.session.get_bind().dialect.name, JudgeDecision.__table__, ('case_no',), rows)
+        # The upsert bypasses the mapper events that keep these current.
+        connection = db.session.connection()
+        count_decision_changes(
+            connection,
+            [(arrest_days[case_no], previous.get(case_no), entry['status']) for case_no, entry in valid.items()],
+        )
+        refresh_case_lifecycles(connection, sorted(valid))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    for result in results:
+        if result['success']:
+            result['message'] = 'Updated' if result['case_no'] in previous else 'Recorded'
+    return results
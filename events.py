@@ -0,0 +1,161 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+ROLES = ('admin', 'super_admin', 'judge')
+
+_BROKER = {'instance': None}
+
+
+class BrokerFull(Exception):
+    pass
+
+
+class LocalBroker:
+    # Fans events out to the SSE connections held by this process.
+    def __init__(self, max_connections=100, queue_size=100):
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self._subscribers = {role: set() for role in ROLES}
+        self._lock = threading.Lock()
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def subscribe(self, role):
+        with self._lock:
+            if sum(len(subscribers) for subscribers in self._subscribers.values()) >= self.max_connections:
+                raise BrokerFull()
+            subscriber = queue.Queue(maxsize=self.queue_size)
+            self._subscribers[role].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, role, subscriber):
+        with self._lock:
+            self._subscribers[role].discard(subscriber)
+
+    def publish(self, event, data, roles):
+        self._deliver(event, json.dumps(data, default=str), roles)
+
+    def _deliver(self, event, payload, roles):
+        with self._lock:
+            targets = [subscriber for role in roles for subscriber in self._subscribers.get(role, ())]
+        for subscriber in targets:
+            try:
+                subscriber.put_nowait((event, payload))
+            except queue.Full:
+                # A stalled client loses events rather than blocking the publishing request.
+                pass
+
+
+class SQLiteRelayBroker(LocalBroker):
+    # Stand-in for a shared broker when running several workers on one host:
+    # publishers append to a WAL-mode SQLite file and every worker tails it.
+    def __init__(self, path, poll_interval=0.5, retention_seconds=300, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS relay_event ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, event TEXT NOT NULL, roles TEXT NOT NULL, '
+            'payload TEXT NOT NULL, created_at REAL NOT NULL)'
+        )
+        self._last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM relay_event').fetchone()[0]
+
+        threading.Thread(target=self._poll_loop, name='event-relay-poller', daemon=True).start()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def publish(self, event, data, roles):
+        self._connection().execute(
+            'INSERT INTO relay_event (event, roles, payload, created_at) VALUES (?, ?, ?, ?)',
+            (event, ','.join(roles), json.dumps(data, default=str), time.time()),
+        )
+
+    def _poll_loop(self):
+        last_prune = time.monotonic()
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                conn = self._connection()
+                rows = conn.execute(
+                    'SELECT id, event, roles, payload FROM relay_event WHERE id > ? ORDER BY id',
+                    (self._last_id,),
+                ).fetchall()
+                for row_id, event, roles, payload in rows:
+                    self._deliver(event, payload, roles.split(','))
+                    self._last_id = row_id
+
+                if time.monotonic() - last_prune > self.retention_seconds:
+                    conn.execute('DELETE FROM relay_event WHERE created_at < ?', (time.time() - self.retention_seconds,))
+                    last_prune = time.monotonic()
+            except sqlite3.Error:
+                continue
+
+
+def init_event_broker(app):
+    options = {
+        'max_connections': app.config['EVENTS_MAX_CONNECTIONS'],
+        'queue_size': app.config['EVENTS_QUEUE_SIZE'],
+    }
+    if app.config['EVENTS_BACKEND'] == 'sqlite':
+        _BROKER['instance'] = SQLiteRelayBroker(app.config['EVENTS_RELAY_PATH'], **options)
+    else:
+        _BROKER['instance'] = LocalBroker(**options)
+    return _BROKER['instance']
+
+
+def get_broker():
+    return _BROKER['instance']
+
+
+def publish_event(event, data, roles):
+    broker = _BROKER['instance']
+    if broker is None:
+        return
+    try:
+        broker.publish(event, data, roles)
+    except Exception:
+        # Live updates are best-effort; the committed write must not fail because of them.
+        pass
+
+
+class EventStream:
+    # Iterable SSE body; werkzeug calls close() when the client goes away or the
+    # response is discarded, which releases the connection slot.
+    def __init__(self, broker, role, heartbeat_seconds):
+        self.broker = broker
+        self.role = role
+        self.heartbeat_seconds = heartbeat_seconds
+        self.subscriber = broker.subscribe(role)
+
+    def __iter__(self):
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                event, payload = self.subscriber.get(timeout=self.heartbeat_seconds)
+            except queue.Empty:
+                yield ': heartbeat\n\n'
+                continue
+            yield f'event: {event}\ndata: {payload}\n\n'
+
+    def close(self):
+        self.broker.unsubscribe(self.role, self.subscriber)
+
+
+def open_event_stream(role, heartbeat_seconds):
+    return EventStream(_BROKER['instance'], role, heartbeat_seconds)
@@ -1,6 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_wtf import CSRFProtect
 
+from db_routing import RoutingSession
 
-db = SQLAlchemy()
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 csrf = CSRFProtect()
@@ -0,0 +1,79 @@
+import sys
+import threading
+import time
+
+from sqlalchemy import event, func
+from sqlalchemy.orm.attributes import get_history
+
+from extensions import db
+from metrics import record_cache
+from models import Accused
+
+MAX_AUTOCOMPLETE_RESULTS = 50
+
+_FACETS = {'value': None, 'loaded_at': 0.0, 'ttl_seconds': 60.0}
+_FACETS_LOCK = threading.Lock()
+
+
+def configure_facet_cache(ttl_seconds):
+    with _FACETS_LOCK:
+        _FACETS.update(value=None, ttl_seconds=ttl_seconds)
+
+
+def invalidate_facets():
+    with _FACETS_LOCK:
+        _FACETS['value'] = None
+
+
+def case_type_facets():
+    with _FACETS_LOCK:
+        if _FACETS['value'] is not None and time.monotonic() - _FACETS['loaded_at'] < _FACETS['ttl_seconds']:
+            record_cache('case_type_facets', hits=1)
+            return _FACETS['value']
+
+    record_cache('case_type_facets', misses=1)
+    rows = (
+        db.session.query(Accused.case_type, func.count(Accused.id))
+        .filter(Accused.case_type.isnot(None), Accused.case_type != '')
+        .group_by(Accused.case_type)
+        .order_by(Accused.case_type)
+        .all()
+    )
+    facets = [{'case_type': case_type, 'count': count} for case_type, count in rows]
+    with _FACETS_LOCK:
+        _FACETS.update(value=facets, loaded_at=time.monotonic())
+    return facets
+
+
+def _prefix_upper_bound(prefix):
+    # 'AB' -> 'AC': a half-open range scan stays on the index on every backend,
+    # unlike LIKE 'AB%' which SQLite cannot serve from a case-sensitive index.
+    # A last character that cannot be incremented is dropped and the one
+    # before it bumped instead; None means there is no upper bound.
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def autocomplete_case_numbers(prefix, case_type=None, limit=20):
+    limit = max(1, min(limit, MAX_AUTOCOMPLETE_RESULTS))
+    query = db.session.query(Accused.case_no).filter(Accused.case_no >= prefix)
+    upper_bound = _prefix_upper_bound(prefix)
+    if upper_bound is not None:
+        query = query.filter(Accused.case_no < upper_bound)
+    if case_type:
+        query = query.filter(Accused.case_type == case_type)
+    return [case_no for (case_no,) in query.order_by(Accused.case_no).limit(limit)]
+
+
+@event.listens_for(Accused, 'after_insert')
+@event.listens_for(Accused, 'after_delete')
+def _invalidate_on_insert_or_delete(_mapper, _connection, _target):
+    invalidate_facets()
+
+
+@event.listens_for(Accused, 'after_update')
+def _invalidate_on_case_type_change(_mapper, _connection, target):
+    if get_history(target, 'case_type').has_changes():
+        invalidate_facets()
@@ -0,0 +1,274 @@
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from difflib import SequenceMatcher
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete, event, insert, select, update
+from sqlalchemy.orm.attributes import get_history
+
+from extensions import db
+from job_locks import acquire_lock, job_lock
+from models import Accused, Person
+
+BATCH_SIZE = 2000
+NAME_SIMILARITY = 0.88
+RELATIVE_NAME_SIMILARITY = 0.8
+IDENTITY_FIELDS = ('username', 'relative_name', 'dob', 'aadhaar_no')
+CLUSTER_LOCK = 'identity-clustering'
+
+_ACCUSED = Accused.__table__
+_IDENTITY_COLUMNS = (
+    Accused.id,
+    Accused.person_id,
+    Accused.username,
+    Accused.relative_name,
+    Accused.dob,
+    Accused.aadhaar_no,
+    Accused.aadhaar_key,
+)
+
+
+def normalize_aadhaar(value):
+    digits = re.sub(r'\D', '', value or '')
+    return digits if len(digits) == 12 else None
+
+
+def normalize_name(value):
+    # Lower-case letters only, tokens sorted so "Kumar Ravi" matches "Ravi Kumar".
+    return ' '.join(sorted(re.sub(r'[^a-z ]', ' ', (value or '').lower()).split()))
+
+
+class UnionFind:
+    # Each set also carries the Aadhaar key of its members; sets holding two
+    # different keys are never joined, so a record without Aadhaar cannot
+    # bridge two people who merely share a name and birth date.
+    def __init__(self):
+        self.parent = {}
+        self.key = {}
+
+    def find(self, node):
+        self.parent.setdefault(node, node)
+        root = node
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[node] != root:
+            self.parent[node], node = root, self.parent[node]
+        return root
+
+    def add(self, node, key=None):
+        root = self.find(node)
+        if key and not self.key.get(root):
+            self.key[root] = key
+
+    def union(self, first, second):
+        first_root, second_root = self.find(first), self.find(second)
+        if first_root == second_root:
+            return True
+        first_key, second_key = self.key.get(first_root), self.key.get(second_root)
+        if first_key and second_key and first_key != second_key:
+            return False
+        self.parent[second_root] = first_root
+        self.key[first_root] = first_key or second_key
+        return True
+
+    def groups(self):
+        members = defaultdict(list)
+        for node in list(self.parent):
+            members[self.find(node)].append(node)
+        return list(members.values())
+
+
+def _similar(first, second, threshold):
+    if not first or not second:
+        return False
+    return first == second or SequenceMatcher(None, first, second).ratio() >= threshold
+
+
+def same_person(first, second):
+    # Two different valid Aadhaar numbers always mean two people, however close the names.
+    if first['aadhaar_key'] and second['aadhaar_key']:
+        return first['aadhaar_key'] == second['aadhaar_key']
+    return (
+        first['dob'] == second['dob']
+        and _similar(first['name'], second['name'], NAME_SIMILARITY)
+        and _similar(first['relative_name'], second['relative_name'], RELATIVE_NAME_SIMILARITY)
+    )
+
+
+def _record(row, aadhaar_key=None):
+    return {
+        'id': row.id,
+        'person_id': row.person_id,
+        'name': normalize_name(row.username),
+        'relative_name': normalize_name(row.relative_name),
+        'dob': row.dob,
+        'aadhaar_key': aadhaar_key if aadhaar_key is not None else row.aadhaar_key,
+    }
+
+
+def _node(record):
+    # Already-clustered rows stand in for their whole cluster.
+    return ('person', record['person_id']) if record['person_id'] else ('accused', record['id'])
+
+
+def cluster_batch(connection, limit=BATCH_SIZE):
+    pending_rows = connection.execute(
+        select(*_IDENTITY_COLUMNS).where(Accused.person_id.is_(None)).order_by(Accused.id).limit(limit)
+    ).all()
+    if not pending_rows:
+        return 0
+    pending = [_record(row, normalize_aadhaar(row.aadhaar_no)) for row in pending_rows]
+
+    # Candidates come only from indexed lookups on the batch's Aadhaar keys and birth dates.
+    keys = {record['aadhaar_key'] for record in pending if record['aadhaar_key']}
+    dobs = {record['dob'] for record in pending if record['dob']}
+    conditions = []
+    if keys:
+        conditions.append(Accused.aadhaar_key.in_(keys))
+    if dobs:
+        conditions.append(Accused.dob.in_(dobs))
+    candidates = []
+    if conditions:
+        candidates = [
+            _record(row)
+            for row in connection.execute(
+                select(*_IDENTITY_COLUMNS).where(Accused.person_id.isnot(None), db.or_(*conditions))
+            )
+        ]
+
+    union_find = UnionFind()
+    by_block = defaultdict(list)
+    for record in pending + candidates:
+        union_find.add(_node(record), record['aadhaar_key'])
+        if record['aadhaar_key']:
+            by_block[('aadhaar', record['aadhaar_key'])].append(record)
+        by_block[('dob', record['dob'])].append(record)
+
+    pending_ids = {record['id'] for record in pending}
+    # Exact Aadhaar matches are joined before any name-based ones.
+    for _, records in sorted(by_block.items(), key=lambda item: item[0][0] != 'aadhaar'):
+        for index, first in enumerate(records):
+            for second in records[index + 1:]:
+                if first['id'] not in pending_ids and second['id'] not in pending_ids:
+                    continue
+                if same_person(first, second):
+                    union_find.union(_node(first), _node(second))
+
+    assignments = {}
+    for group in union_find.groups():
+        existing = sorted(value for kind, value in group if kind == 'person')
+        new_rows = [value for kind, value in group if kind == 'accused']
+        if existing:
+            person_id = existing[0]
+        else:
+            person_id = connection.execute(insert(Person).values(created_at=datetime.now())).inserted_primary_key[0]
+        if len(existing) > 1:
+            # A new row links two earlier clusters: fold them into the oldest.
+            connection.execute(
+                update(_ACCUSED).where(_ACCUSED.c.person_id.in_(existing[1:])).values(person_id=person_id)
+            )
+            connection.execute(delete(Person).where(Person.id.in_(existing[1:])))
+        for accused_id in new_rows:
+            assignments[accused_id] = person_id
+
+    connection.execute(
+        update(_ACCUSED).where(_ACCUSED.c.id == db.bindparam('accused_id')),
+        [
+            {'accused_id': record['id'], 'person_id': assignments[record['id']], 'aadhaar_key': record['aadhaar_key']}
+            for record in pending
+        ],
+    )
+    return len(pending)
+
+
+def delete_orphaned_persons(connection):
+    # Persons left without records once an edited record was re-clustered elsewhere.
+    return connection.execute(
+        delete(Person).where(~select(_ACCUSED.c.id).where(_ACCUSED.c.person_id == Person.id).exists())
+    ).rowcount
+
+
+def cluster_pending(batch_size=BATCH_SIZE):
+    # Two concurrent runs would each create a Person for the same records, so
+    # every worker's thread and the CLI share one lease. Returns None while
+    # another process holds it.
+    with job_lock(CLUSTER_LOCK) as holder:
+        if holder is None:
+            return None
+        processed = 0
+        while True:
+            count = cluster_batch(db.session.connection(), batch_size)
+            db.session.commit()
+            processed += count
+            if count < batch_size:
+                break
+            acquire_lock(CLUSTER_LOCK, holder)
+        if processed:
+            delete_orphaned_persons(db.session.connection())
+            db.session.commit()
+        return processed
+
+
+@event.listens_for(Accused, 'before_update')
+def _requeue_changed_identity(_mapper, _connection, target):
+    if any(get_history(target, name).has_changes() for name in IDENTITY_FIELDS):
+        target.person_id = None
+        target.aadhaar_key = None
+
+
+def cases_for_person(person_id):
+    return (
+        Accused.query.with_entities(
+            Accused.id, Accused.case_no, Accused.case_type, Accused.ps, Accused.date_of_arrest, Accused.username
+        )
+        .filter(Accused.person_id == person_id)
+        .order_by(Accused.date_of_arrest.desc(), Accused.id.desc())
+        .all()
+    )
+
+
+def linked_cases(accused):
+    if not accused.person_id:
+        return []
+    return [case for case in cases_for_person(accused.person_id) if case.id != accused.id]
+
+
+@click.command('cluster-persons')
+@with_appcontext
+def cluster_persons_command():
+    processed = cluster_pending()
+    if processed is None:
+        click.echo('Another process is clustering; try again later.')
+    else:
+        click.echo(f'Clustered {processed} accused records.')
+
+
+def _clustering_loop(app, interval_seconds):
+    while True:
+        time.sleep(interval_seconds)
+        with app.app_context():
+            try:
+                cluster_pending()
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Identity clustering run failed')
+            finally:
+                db.session.remove()
+
+
+def start_identity_clustering(app):
+    interval_seconds = app.config['PERSON_CLUSTER_INTERVAL_SECONDS']
+    if interval_seconds <= 0:
+        return None
+    thread = threading.Thread(
+        target=_clustering_loop,
+        args=(app, interval_seconds),
+        name='identity-clustering',
+        daemon=True,
+    )
+    thread.start()
+    return thread
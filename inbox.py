@@ -0,0 +1,191 @@
+import base64
+import binascii
+from collections import Counter
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import and_, event, func, or_, select
+from sqlalchemy.orm.attributes import get_history
+
+from extensions import db
+from models import JudgeDecision, MessageCounter, SuperAdminMessage
+from upserts import increment
+
+MESSAGE_STATUSES = ('Pending', 'Replied')
+UNREAD = 'unread'
+MAX_CASE_MESSAGES = 50
+
+_COUNTER = MessageCounter.__table__
+
+
+def _status_counter(status):
+    return f'status:{status}'
+
+
+def _apply(connection, deltas):
+    for name, delta in deltas.items():
+        if delta:
+            increment(connection, _COUNTER, {'name': name}, 'total', delta)
+
+
+def _count(status, read_at, sign, deltas):
+    deltas[_status_counter(status)] += sign
+    if read_at is None:
+        deltas[UNREAD] += sign
+
+
+def _previous(target, name):
+    history = get_history(target, name)
+    return history.deleted[0] if history.deleted else getattr(target, name)
+
+
+@event.listens_for(SuperAdminMessage, 'after_insert')
+def _count_new_message(_mapper, connection, target):
+    deltas = Counter()
+    _count(target.status, target.read_at, 1, deltas)
+    _apply(connection, deltas)
+
+
+@event.listens_for(SuperAdminMessage, 'after_update')
+def _move_message(_mapper, connection, target):
+    if not any(get_history(target, name).has_changes() for name in ('status', 'read_at')):
+        return
+    deltas = Counter()
+    _count(_previous(target, 'status'), _previous(target, 'read_at'), -1, deltas)
+    _count(target.status, target.read_at, 1, deltas)
+    _apply(connection, deltas)
+
+
+@event.listens_for(SuperAdminMessage, 'after_delete')
+def _count_deleted_message(_mapper, connection, target):
+    deltas = Counter()
+    _count(target.status, target.read_at, -1, deltas)
+    _apply(connection, deltas)
+
+
+def retract_case_messages(case_no):
+    # Bulk query deletes bypass the mapper events above, so the delete routes
+    # call this before removing a case's messages.
+    deltas = Counter()
+    rows = db.session.execute(
+        select(SuperAdminMessage.status, SuperAdminMessage.read_at.is_(None), func.count())
+        .where(SuperAdminMessage.case_no == case_no)
+        .group_by(SuperAdminMessage.status, SuperAdminMessage.read_at.is_(None))
+    ).all()
+    for status, unread, total in rows:
+        deltas[_status_counter(status)] -= total
+        if unread:
+            deltas[UNREAD] -= total
+    _apply(db.session.connection(), deltas)
+
+
+def mark_read(message_ids):
+    if not message_ids:
+        return 0
+    marked = db.session.execute(
+        SuperAdminMessage.__table__.update()
+        .where(SuperAdminMessage.id.in_(message_ids), SuperAdminMessage.read_at.is_(None))
+        .values(read_at=datetime.now())
+    ).rowcount
+    if marked:
+        _apply(db.session.connection(), {UNREAD: -marked})
+    return marked
+
+
+def inbox_counts():
+    totals = dict(db.session.query(MessageCounter.name, MessageCounter.total).all())
+    counts = {status: totals.get(_status_counter(status), 0) for status in MESSAGE_STATUSES}
+    counts['all'] = sum(totals.get(name, 0) for name in totals if name.startswith('status:'))
+    counts[UNREAD] = totals.get(UNREAD, 0)
+    return counts
+
+
+def pending_count():
+    return db.session.query(MessageCounter.total).filter_by(name=_status_counter('Pending')).scalar() or 0
+
+
+def encode_cursor(created_at, message_id):
+    raw = f'{created_at.isoformat()}|{message_id}'.encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, message_id = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii').split('|')
+        return datetime.fromisoformat(created_at), int(message_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def inbox_page(status=None, cursor=None, limit=50):
+    # Newest first. The (created_at, id) cursor continues after the last row
+    # of the previous page, so every page is one range scan on the
+    # (status, created_at) index, or on created_at for all statuses.
+    query = db.session.query(SuperAdminMessage)
+    if status:
+        query = query.filter(SuperAdminMessage.status == status)
+    after = decode_cursor(cursor) if cursor else None
+    if after is not None:
+        created_at, message_id = after
+        query = query.filter(
+            or_(
+                SuperAdminMessage.created_at < created_at,
+                and_(SuperAdminMessage.created_at == created_at, SuperAdminMessage.id < message_id),
+            )
+        )
+    rows = query.order_by(SuperAdminMessage.created_at.desc(), SuperAdminMessage.id.desc()).limit(limit + 1).all()
+    messages = rows[:limit]
+    next_cursor = encode_cursor(messages[-1].created_at, messages[-1].id) if len(rows) > limit else None
+
+    case_nos = {message.case_no for message in messages}
+    decisions_by_case = {}
+    if case_nos:
+        decisions_by_case = {
+            row.case_no: row
+            for row in db.session.query(JudgeDecision.case_no, JudgeDecision.status, JudgeDecision.decided_at).filter(
+                JudgeDecision.case_no.in_(case_nos)
+            )
+        }
+    return messages, decisions_by_case, next_cursor
+
+
+def case_messages(case_no):
+    return (
+        SuperAdminMessage.query.filter_by(case_no=case_no)
+        .order_by(SuperAdminMessage.created_at.desc())
+        .limit(MAX_CASE_MESSAGES)
+        .all()
+    )
+
+
+def rebuild_inbox_counters():
+    db.session.execute(_COUNTER.delete())
+    totals = Counter()
+    for status, unread, total in db.session.execute(
+        select(SuperAdminMessage.status, SuperAdminMessage.read_at.is_(None), func.count()).group_by(
+            SuperAdminMessage.status, SuperAdminMessage.read_at.is_(None)
+        )
+    ):
+        totals[_status_counter(status)] += total
+        if unread:
+            totals[UNREAD] += total
+    if totals:
+        db.session.execute(_COUNTER.insert(), [{'name': name, 'total': total} for name, total in totals.items()])
+    db.session.commit()
+    return sum(total for name, total in totals.items() if name != UNREAD)
+
+
+def ensure_inbox_counters():
+    # First start after upgrading: count the existing messages once.
+    if MessageCounter.query.first() is not None:
+        return
+    if SuperAdminMessage.query.first() is None:
+        return
+    rebuild_inbox_counters()
+
+
+@click.command('rebuild-inbox-counters')
+@with_appcontext
+def rebuild_inbox_counters_command():
+    click.echo(f'Counted {rebuild_inbox_counters()} messages.')
@@ -0,0 +1,56 @@
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import JobLock
+
+LOCK_SECONDS = 300
+
+_LOCK = JobLock.__table__
+
+
+def acquire_lock(name, holder, seconds=LOCK_SECONDS):
+    # Takes a free or expired lease, or extends the holder's own. Each attempt
+    # commits on its own connection so other processes see it at once,
+    # whatever the caller's session is doing.
+    now = datetime.now()
+    expires_at = now + timedelta(seconds=seconds)
+    with db.engine.begin() as connection:
+        taken = connection.execute(
+            update(_LOCK)
+            .where(_LOCK.c.name == name, or_(_LOCK.c.holder == holder, _LOCK.c.expires_at <= now))
+            .values(holder=holder, expires_at=expires_at)
+        ).rowcount
+    if taken:
+        return True
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(insert(_LOCK).values(name=name, holder=holder, expires_at=expires_at))
+    except IntegrityError:
+        return False
+    return True
+
+
+def release_lock(name, holder):
+    with db.engine.begin() as connection:
+        connection.execute(
+            update(_LOCK).where(_LOCK.c.name == name, _LOCK.c.holder == holder).values(expires_at=datetime.now())
+        )
+
+
+@contextmanager
+def job_lock(name, seconds=LOCK_SECONDS):
+    # Yields the holder token (pass it to acquire_lock to extend a long run),
+    # or None when another process holds the lease.
+    holder = uuid.uuid4().hex
+    if not acquire_lock(name, holder, seconds):
+        yield None
+        return
+    try:
+        yield holder
+    finally:
+        release_lock(name, holder)
@@ -0,0 +1,244 @@
+import math
+from collections import Counter, defaultdict
+from datetime import datetime, time
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.orm.attributes import get_history
+
+from extensions import db
+from models import Accused, CaseLifecycle, JudgeDecision, LifecycleSketchBucket, MeetingLink
+from upserts import increment
+
+STAGES = (
+    'arrest_to_court',
+    'arrest_to_first_hearing',
+    'hearing_time',
+    'court_to_decision',
+    'arrest_to_decision',
+)
+DIMENSIONS = ('all', 'ps', 'case_type')
+QUANTILES = (('p50', 0.5), ('p90', 0.9), ('p99', 0.99))
+
+# Log-bucketed sketch (DDSketch-style): every quantile read back is within 1% of
+# the true duration, buckets can be added and removed, and sketches merge by
+# summing bucket counts, so they live as plain counter rows in the database.
+RELATIVE_ACCURACY = 0.01
+MIN_HOURS = 1 / 60
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+_PENDING_CASES = 'lifecycle_pending_cases'
+_LIFECYCLE = CaseLifecycle.__table__
+_BUCKETS = LifecycleSketchBucket.__table__
+
+
+def bucket_index(hours):
+    return math.ceil(math.log(max(hours, MIN_HOURS)) / _LOG_GAMMA)
+
+
+def bucket_value(index):
+    return 2 * _GAMMA ** index / (_GAMMA + 1)
+
+
+class QuantileSketch:
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+
+    def add(self, hours, weight=1):
+        self.add_bucket(bucket_index(hours), weight)
+
+    def add_bucket(self, index, weight):
+        self.buckets[index] += weight
+        self.count += weight
+
+    def quantile(self, q):
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        running = 0
+        for index in sorted(self.buckets):
+            running += self.buckets[index]
+            if running > rank:
+                return bucket_value(index)
+        return bucket_value(max(self.buckets))
+
+
+def _hours(start, end):
+    if start is None or end is None:
+        return None
+    hours = (end - start).total_seconds() / 3600
+    return hours if hours >= 0 else None
+
+
+def _durations(accused, decided_at, meetings):
+    arrested = datetime.combine(accused.date_of_arrest, time.min) if accused.date_of_arrest else None
+    court = accused.court_forward_date_time
+    first_hearing = min((created_at for created_at, _ in meetings if created_at), default=None)
+    hearing_spans = [_hours(created_at, ended_at) for created_at, ended_at in meetings]
+    hearing_spans = [span for span in hearing_spans if span is not None]
+    return {
+        'case_no': accused.case_no,
+        'ps': accused.ps or '',
+        'case_type': accused.case_type or '',
+        'arrest_to_court_hours': _hours(arrested, court),
+        'arrest_to_first_hearing_hours': _hours(arrested, first_hearing),
+        'hearing_time_hours': sum(hearing_spans) if hearing_spans else None,
+        'court_to_decision_hours': _hours(court, decided_at),
+        'arrest_to_decision_hours': _hours(arrested, decided_at),
+    }
+
+
+_ACCUSED_COLUMNS = (Accused.case_no, Accused.ps, Accused.case_type, Accused.date_of_arrest, Accused.court_forward_date_time)
+
+
+def case_durations(connection, case_no):
+    accused = connection.execute(select(*_ACCUSED_COLUMNS).where(Accused.case_no == case_no)).first()
+    if accused is None:
+        return None
+    decided_at = connection.execute(
+        select(func.max(JudgeDecision.decided_at)).where(
+            JudgeDecision.case_no == case_no, JudgeDecision.status == 'Solved'
+        )
+    ).scalar()
+    meetings = connection.execute(
+        select(MeetingLink.created_at, MeetingLink.ended_at).where(MeetingLink.case_no == case_no)
+    ).all()
+    return _durations(accused, decided_at, meetings)
+
+
+def _sketch_deltas(record, sign, deltas):
+    for stage in STAGES:
+        hours = record[f'{stage}_hours']
+        if hours is None:
+            continue
+        index = bucket_index(hours)
+        deltas[(stage, 'all', '', index)] += sign
+        deltas[(stage, 'ps', record['ps'] or '', index)] += sign
+        deltas[(stage, 'case_type', record['case_type'] or '', index)] += sign
+
+
+def refresh_case_lifecycles(connection, case_nos):
+    # Recomputes each case's stage durations and moves its sketch contributions
+    # from the stored values to the new ones.
+    deltas = Counter()
+    for case_no in case_nos:
+        stored = connection.execute(select(_LIFECYCLE).where(_LIFECYCLE.c.case_no == case_no)).mappings().first()
+        stored = dict(stored) if stored else None
+        current = case_durations(connection, case_no)
+        if stored == current:
+            continue
+
+        if stored:
+            _sketch_deltas(stored, -1, deltas)
+            connection.execute(_LIFECYCLE.delete().where(_LIFECYCLE.c.case_no == case_no))
+        if current:
+            _sketch_deltas(current, 1, deltas)
+            connection.execute(_LIFECYCLE.insert().values(**current))
+
+    for (stage, dimension, value, index), delta in deltas.items():
+        if delta:
+            key = {'stage': stage, 'dimension': dimension, 'value': value, 'bucket': index}
+            increment(connection, _BUCKETS, key, 'total', delta)
+
+
+def mark_case_changed(session, case_no):
+    if session is not None and case_no:
+        session.info.setdefault(_PENDING_CASES, set()).add(case_no)
+
+
+def _mark_target(_mapper, _connection, target):
+    session = object_session(target)
+    mark_case_changed(session, target.case_no)
+    history = get_history(target, 'case_no')
+    for case_no in history.deleted:
+        mark_case_changed(session, case_no)
+
+
+for _model in (Accused, JudgeDecision, MeetingLink):
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _mark_target)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def _refresh_marked_cases(session, _flush_context):
+    case_nos = session.info.pop(_PENDING_CASES, None)
+    if case_nos:
+        refresh_case_lifecycles(session.connection(), sorted(case_nos))
+
+
+def rebuild_lifecycle():
+    db.session.query(LifecycleSketchBucket).delete(synchronize_session=False)
+    db.session.query(CaseLifecycle).delete(synchronize_session=False)
+
+    decided = dict(
+        db.session.query(JudgeDecision.case_no, func.max(JudgeDecision.decided_at))
+        .filter(JudgeDecision.status == 'Solved')
+        .group_by(JudgeDecision.case_no)
+    )
+    meetings = defaultdict(list)
+    for case_no, created_at, ended_at in db.session.query(
+        MeetingLink.case_no, MeetingLink.created_at, MeetingLink.ended_at
+    ).yield_per(5000):
+        meetings[case_no].append((created_at, ended_at))
+
+    records = []
+    deltas = Counter()
+    for accused in db.session.query(*_ACCUSED_COLUMNS).filter(Accused.case_no.isnot(None)).yield_per(5000):
+        record = _durations(accused, decided.get(accused.case_no), meetings.get(accused.case_no, ()))
+        records.append(record)
+        _sketch_deltas(record, 1, deltas)
+
+    if records:
+        db.session.execute(_LIFECYCLE.insert(), records)
+    buckets = [
+        {'stage': stage, 'dimension': dimension, 'value': value, 'bucket': index, 'total': total}
+        for (stage, dimension, value, index), total in deltas.items()
+    ]
+    if buckets:
+        db.session.execute(_BUCKETS.insert(), buckets)
+    db.session.commit()
+    return len(records)
+
+
+def ensure_lifecycle():
+    if CaseLifecycle.query.first() is not None:
+        return
+    if Accused.query.filter(Accused.case_no.isnot(None)).first() is None:
+        return
+    rebuild_lifecycle()
+
+
+@click.command('rebuild-lifecycle')
+@with_appcontext
+def rebuild_lifecycle_command():
+    click.echo(f'Rebuilt lifecycle durations for {rebuild_lifecycle()} cases.')
+
+
+def latency_summary(dimension='all'):
+    rows = (
+        db.session.query(
+            LifecycleSketchBucket.stage,
+            LifecycleSketchBucket.value,
+            LifecycleSketchBucket.bucket,
+            LifecycleSketchBucket.total,
+        )
+        .filter(LifecycleSketchBucket.dimension == dimension, LifecycleSketchBucket.total > 0)
+        .all()
+    )
+    sketches = defaultdict(QuantileSketch)
+    for stage, value, index, total in rows:
+        sketches[(stage, value)].add_bucket(index, total)
+
+    summary = {stage: [] for stage in STAGES}
+    for (stage, value), sketch in sketches.items():
+        entry = {'value': value, 'count': sketch.count}
+        for name, q in QUANTILES:
+            entry[f'{name}_hours'] = round(sketch.quantile(q), 2)
+        summary.setdefault(stage, []).append(entry)
+    for entries in summary.values():
+        entries.sort(key=lambda entry: (-entry['count'], entry['value']))
+    return summary
@@ -0,0 +1,153 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from activity_log import record_activity
+from events import publish_event
+from extensions import db
+from lifecycle import refresh_case_lifecycles
+from metrics import record_cache
+from models import MeetingLink
+
+MAX_BATCH_CASES = 200
+SWAP_ATTEMPTS = 3
+
+_ONGOING_LINKS = {}
+_ONGOING_LOCK = threading.Lock()
+_CACHE_SETTINGS = {'ttl_seconds': 30.0}
+
+
+def configure_meeting_cache(ttl_seconds):
+    _CACHE_SETTINGS['ttl_seconds'] = ttl_seconds
+    clear_meeting_cache()
+
+
+def clear_meeting_cache():
+    with _ONGOING_LOCK:
+        _ONGOING_LINKS.clear()
+
+
+def invalidate_meeting_link(case_no):
+    with _ONGOING_LOCK:
+        _ONGOING_LINKS.pop(case_no, None)
+
+
+def get_ongoing_links(case_nos):
+    # Returns {case_no: {'id', 'link', 'created_at'} or None}. Cache misses are
+    # resolved with a single IN query against the (case_no, status) index.
+    now = time.monotonic()
+    ttl = _CACHE_SETTINGS['ttl_seconds']
+    result = {}
+    missing = []
+
+    with _ONGOING_LOCK:
+        for case_no in dict.fromkeys(case_nos):
+            cached = _ONGOING_LINKS.get(case_no)
+            if cached and now - cached[0] < ttl:
+                result[case_no] = cached[1]
+            else:
+                missing.append(case_no)
+    record_cache('meeting_links', hits=len(result), misses=len(missing))
+
+    if missing:
+        rows = (
+            MeetingLink.query.with_entities(
+                MeetingLink.id, MeetingLink.case_no, MeetingLink.link, MeetingLink.created_at
+            )
+            .filter(MeetingLink.case_no.in_(missing), MeetingLink.status == 'Ongoing')
+            .order_by(MeetingLink.created_at.asc(), MeetingLink.id.asc())
+            .all()
+        )
+        fetched = dict.fromkeys(missing)
+        for row in rows:
+            # Ascending order lets the newest ongoing meeting win.
+            fetched[row.case_no] = {'id': row.id, 'link': row.link, 'created_at': row.created_at}
+
+        with _ONGOING_LOCK:
+            for case_no, meeting in fetched.items():
+                _ONGOING_LINKS[case_no] = (now, meeting)
+        result.update(fetched)
+
+    return result
+
+
+def get_ongoing_link(case_no):
+    return get_ongoing_links([case_no])[case_no]
+
+
+def swap_meeting_link(case_no, link):
+    # Ends the current ongoing meeting and inserts the new one in one transaction.
+    # The single-ongoing-meeting unique index turns a lost race into an
+    # IntegrityError, in which case the swap is retried against the winner's row.
+    for attempt in range(SWAP_ATTEMPTS):
+        now = datetime.now()
+        try:
+            MeetingLink.query.filter_by(case_no=case_no, status='Ongoing').update(
+                {'status': 'Ended', 'ended_at': now}, synchronize_session=False
+            )
+            meeting = MeetingLink(case_no=case_no, link=link, status='Ongoing', created_at=now)
+            db.session.add(meeting)
+            db.session.commit()
+            invalidate_meeting_link(case_no)
+            return meeting
+        except IntegrityError:
+            db.session.rollback()
+            if attempt == SWAP_ATTEMPTS - 1:
+                raise
+
+
+def end_stale_meetings(max_age):
+    cutoff = datetime.now() - max_age
+    stale = (
+        MeetingLink.query.with_entities(MeetingLink.id, MeetingLink.case_no)
+        .filter(MeetingLink.status == 'Ongoing', MeetingLink.created_at < cutoff)
+        .all()
+    )
+    if not stale:
+        return []
+
+    MeetingLink.query.filter(MeetingLink.id.in_([row.id for row in stale])).update(
+        {'status': 'Ended', 'ended_at': datetime.now()}, synchronize_session=False
+    )
+    refresh_case_lifecycles(db.session.connection(), sorted({row.case_no for row in stale}))
+    db.session.commit()
+    for row in stale:
+        invalidate_meeting_link(row.case_no)
+    return stale
+
+
+def _sweeper_loop(app, max_age, interval_seconds):
+    while True:
+        time.sleep(interval_seconds)
+        with app.app_context():
+            try:
+                expired = end_stale_meetings(max_age)
+                for row in expired:
+                    publish_event(
+                        'meeting.updated',
+                        {'id': row.id, 'case_no': row.case_no, 'link': None, 'status': 'Ended'},
+                        ('judge', 'super_admin'),
+                    )
+                if expired:
+                    record_activity('expired', 'meeting', f'{len(expired)} stale meeting(s) ended automatically')
+            except Exception:
+                db.session.rollback()
+                app.logger.exception('Meeting expiry sweep failed')
+            finally:
+                db.session.remove()
+
+
+def start_meeting_sweeper(app):
+    max_age_hours = app.config['MEETING_MAX_AGE_HOURS']
+    if max_age_hours <= 0:
+        return None
+    thread = threading.Thread(
+        target=_sweeper_loop,
+        args=(app, timedelta(hours=max_age_hours), app.config['MEETING_SWEEP_INTERVAL_SECONDS']),
+        name='meeting-expiry-sweeper',
+        daemon=True,
+    )
+    thread.start()
+    return thread
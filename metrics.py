@@ -0,0 +1,257 @@
+import glob
+import json
+import os
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from db_pool import pool_stats
+from extensions import db
+
+PREFIX = 'criminology'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+POOL_GAUGES = ('size', 'checked_out', 'checked_in', 'overflow')
+
+_COUNTERS = {}
+_HISTOGRAMS = {}
+_LOCK = threading.Lock()
+_SETTINGS = {'directory': '', 'flush_seconds': 5.0}
+_QUERY_OBSERVERS = []
+
+HELP = {
+    'http_requests_total': ('counter', 'Requests handled, by route, method and status.'),
+    'http_request_duration_seconds': ('histogram', 'Time from the first before_request hook to the response.'),
+    'http_response_size_bytes': ('histogram', 'Response body size (streamed responses are not counted).'),
+    'http_request_db_queries': ('histogram', 'SQL statements executed per request.'),
+    'http_request_db_seconds': ('histogram', 'Time spent in SQL statements per request.'),
+    'cache_requests_total': ('counter', 'In-process cache lookups, by cache and result.'),
+    'cache_hit_ratio': ('gauge', 'Hits over lookups since the counters started.'),
+    'db_pool_connections': ('gauge', 'Connection pool state per worker.'),
+    'db_pool_checkout_wait_seconds_total': ('counter', 'Time spent waiting for a pooled connection.'),
+    'db_pool_checkouts_total': ('counter', 'Pooled connection checkouts.'),
+    'db_pool_timeouts_total': ('counter', 'Checkouts that gave up waiting for a connection.'),
+    'db_read_routing_total': ('counter', 'Read-only requests by the engine they read from, and why.'),
+}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, labels, amount=1):
+    key = _key(name, labels)
+    with _LOCK:
+        _COUNTERS[key] = _COUNTERS.get(key, 0) + amount
+
+
+def observe(name, labels, value, buckets):
+    key = _key(name, labels)
+    index = next((position for position, bound in enumerate(buckets) if value <= bound), len(buckets))
+    with _LOCK:
+        histogram = _HISTOGRAMS.get(key)
+        if histogram is None:
+            histogram = _HISTOGRAMS[key] = {'buckets': list(buckets), 'counts': [0] * (len(buckets) + 1), 'sum': 0.0}
+        histogram['counts'][index] += 1
+        histogram['sum'] += value
+
+
+def record_cache(cache, hits=0, misses=0):
+    if hits:
+        inc('cache_requests_total', {'cache': cache, 'result': 'hit'}, hits)
+    if misses:
+        inc('cache_requests_total', {'cache': cache, 'result': 'miss'}, misses)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _query_started(conn, _cursor, _statement, _parameters, _context, _executemany):
+    conn.info['metrics_query_started'] = time.perf_counter()
+
+
+def add_query_observer(observer):
+    # observer(statement, parameters, seconds) runs after every statement, so
+    # other per-statement bookkeeping shares this one timing hook.
+    if observer not in _QUERY_OBSERVERS:
+        _QUERY_OBSERVERS.append(observer)
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _query_finished(conn, _cursor, statement, parameters, _context, _executemany):
+    started = conn.info.pop('metrics_query_started', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    if has_request_context() and 'db_queries' in g:
+        g.db_queries += 1
+        g.db_seconds += elapsed
+    for observer in _QUERY_OBSERVERS:
+        observer(statement, parameters, elapsed)
+
+
+def _snapshot():
+    with _LOCK:
+        counters = [[name, list(labels), value] for (name, labels), value in _COUNTERS.items()]
+        histograms = [
+            [name, list(labels), list(item['buckets']), list(item['counts']), item['sum']]
+            for (name, labels), item in _HISTOGRAMS.items()
+        ]
+    stats = pool_stats(db.engine)
+    gauges = [
+        ['db_pool_connections', [['state', state]], stats[state]] for state in POOL_GAUGES if state in stats
+    ]
+    counters += [
+        ['db_pool_checkout_wait_seconds_total', [], stats['wait_seconds']],
+        ['db_pool_checkouts_total', [], stats['checkouts']],
+        ['db_pool_timeouts_total', [], stats['timeouts']],
+    ]
+    return {'pid': os.getpid(), 'written_at': time.time(), 'counters': counters, 'histograms': histograms, 'gauges': gauges}
+
+
+def _snapshot_path(directory, pid):
+    return os.path.join(directory, f'metrics-{pid}.json')
+
+
+def write_snapshot():
+    directory = _SETTINGS['directory']
+    if not directory:
+        return
+    path = _snapshot_path(directory, os.getpid())
+    with open(path + '.tmp', 'w') as handle:
+        json.dump(_snapshot(), handle)
+    os.replace(path + '.tmp', path)
+
+
+def _load_snapshots():
+    # Each worker owns one file; counters from exited workers are kept so totals
+    # never go backwards, but their gauges are dropped once the file goes stale.
+    if not _SETTINGS['directory']:
+        return [_snapshot()]
+    write_snapshot()
+    snapshots = []
+    stale_before = time.time() - max(60.0, _SETTINGS['flush_seconds'] * 10)
+    for path in glob.glob(_snapshot_path(_SETTINGS['directory'], '*')):
+        try:
+            with open(path) as handle:
+                snapshot = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        if snapshot['written_at'] < stale_before:
+            snapshot['gauges'] = []
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def _merge(snapshots):
+    counters, histograms, gauges = {}, {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, counts, total in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.setdefault(key, {'buckets': buckets, 'counts': [0] * len(counts), 'sum': 0.0})
+            merged['counts'] = [left + right for left, right in zip(merged['counts'], counts)]
+            merged['sum'] += total
+        for name, labels, value in snapshot['gauges']:
+            gauges[(name, tuple(map(tuple, labels)) + (('worker', str(snapshot['pid'])),))] = value
+    return counters, histograms, gauges
+
+
+def _hit_ratios(counters):
+    lookups = {}
+    for (name, labels), value in counters.items():
+        if name == 'cache_requests_total':
+            labels = dict(labels)
+            hits, total = lookups.get(labels['cache'], (0, 0))
+            lookups[labels['cache']] = (hits + (value if labels['result'] == 'hit' else 0), total + value)
+    return {
+        ('cache_hit_ratio', (('cache', cache),)): hits / total for cache, (hits, total) in lookups.items() if total
+    }
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_metrics():
+    counters, histograms, gauges = _merge(_load_snapshots())
+    gauges.update(_hit_ratios(counters))
+
+    samples = {}
+    for (name, labels), value in list(counters.items()) + list(gauges.items()):
+        samples.setdefault(name, []).append(f'{PREFIX}_{name}{_labels(labels)} {_number(value)}')
+    for (name, labels), item in histograms.items():
+        lines = samples.setdefault(name, [])
+        running = 0
+        for bound, count in zip(item['buckets'] + ['+Inf'], item['counts']):
+            running += count
+            lines.append(f'{PREFIX}_{name}_bucket{_labels(labels + (("le", str(bound)),))} {running}')
+        lines.append(f'{PREFIX}_{name}_sum{_labels(labels)} {_number(item["sum"])}')
+        lines.append(f'{PREFIX}_{name}_count{_labels(labels)} {running}')
+
+    output = []
+    for name in sorted(samples):
+        kind, description = HELP.get(name, ('untyped', name))
+        output.append(f'# HELP {PREFIX}_{name} {description}')
+        output.append(f'# TYPE {PREFIX}_{name} {kind}')
+        output.extend(sorted(samples[name]) if kind != 'histogram' else samples[name])
+    return '\n'.join(output) + '\n'
+
+
+def _flush_loop(app, interval_seconds):
+    while True:
+        time.sleep(interval_seconds)
+        with app.app_context():
+            try:
+                write_snapshot()
+            except Exception:
+                app.logger.exception('Metrics snapshot failed')
+
+
+def init_metrics(app):
+    _SETTINGS.update(directory=app.config['METRICS_DIR'], flush_seconds=app.config['METRICS_FLUSH_SECONDS'])
+
+    @app.before_request
+    def _start_request_metrics():
+        g.request_started = time.perf_counter()
+        g.db_queries = 0
+        g.db_seconds = 0.0
+
+    @app.after_request
+    def _record_request_metrics(response):
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+        # The route template ('/persons/<int:person_id>/cases'), not the path,
+        # keeps the label set bounded.
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        elapsed = time.perf_counter() - started
+        inc('http_requests_total', {'route': route, 'method': request.method, 'status': str(response.status_code)})
+        observe('http_request_duration_seconds', {'route': route, 'method': request.method}, elapsed, LATENCY_BUCKETS)
+        if not response.is_streamed and response.content_length is not None:
+            observe('http_response_size_bytes', {'route': route}, response.content_length, SIZE_BUCKETS)
+        observe('http_request_db_queries', {'route': route}, g.db_queries, QUERY_COUNT_BUCKETS)
+        observe('http_request_db_seconds', {'route': route}, g.db_seconds, LATENCY_BUCKETS)
+        return response
+
+    if _SETTINGS['directory']:
+        os.makedirs(_SETTINGS['directory'], exist_ok=True)
+        threading.Thread(
+            target=_flush_loop,
+            args=(app, _SETTINGS['flush_seconds']),
+            name='metrics-flush',
+            daemon=True,
+        ).start()
@@ -1,6 +1,7 @@
 from datetime import datetime
 
 from sqlalchemy import ForeignKey
+from sqlalchemy.orm import deferred
 
 from extensions import db
 
@@ -21,88 +22,155 @@ class Admin(db.Model):
 
 class Accused(db.Model):
     __tablename__ = 'accused'
+    __table_args__ = (db.Index('ix_accused_case_type_case_no', 'case_type', 'case_no'),)
 
+    # Plain columns are the summary group and load with every Accused. The
+    # deferred groups (narrative, biometrics, documents) load on first access,
+    # one SELECT per group, unless the query undefers them; the edit pages use
+    # undefer('*'). Listings should not load entities at all, see accused_listing.py.
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
 
     username = db.Column(db.String(100), nullable=False)
     relative_name = db.Column(db.String(100), nullable=False)
     relation = db.Column(db.String(50), nullable=False)
-    dob = db.Column(db.Date, nullable=False)
+    dob = db.Column(db.Date, nullable=False, index=True)
     gender = db.Column(db.String(10), nullable=False)
     nationality = db.Column(db.String(20), nullable=False)
     occupation = db.Column(db.String(100), nullable=False)
     education = db.Column(db.String(100), nullable=False)
 
-    height = db.Column(db.String(20))
-    weight = db.Column(db.String(20))
-    waist_size = db.Column(db.String(20))
-    foot_size = db.Column(db.String(20))
-    special_mark_cut = db.Column(db.Text)
-    skin_color = db.Column(db.String(50))
-    tattoo = db.Column(db.Text)
-    accessories_wearing = db.Column(db.Text)
-
-    blood_group = db.Column(db.String(10))
-    medical_report_pdf = db.Column(db.String(255))
-    proof_evidence_pdf = db.Column(db.String(255))
-
-    special_key_point = db.Column(db.Text)
-    disability = db.Column(db.Text)
-    accused_photo = db.Column(db.String(255))
+    height = deferred(db.Column(db.String(20)), group='biometrics')
+    weight = deferred(db.Column(db.String(20)), group='biometrics')
+    waist_size = deferred(db.Column(db.String(20)), group='biometrics')
+    foot_size = deferred(db.Column(db.String(20)), group='biometrics')
+    special_mark_cut = deferred(db.Column(db.Text), group='biometrics')
+    skin_color = deferred(db.Column(db.String(50)), group='biometrics')
+    tattoo = deferred(db.Column(db.Text), group='biometrics')
+    accessories_wearing = deferred(db.Column(db.Text), group='biometrics')
+
+    blood_group = deferred(db.Column(db.String(10)), group='biometrics')
+    medical_report_pdf = deferred(db.Column(db.String(255)), group='documents')
+    proof_evidence_pdf = deferred(db.Column(db.String(255)), group='documents')
+
+    special_key_point = deferred(db.Column(db.Text), group='narrative')
+    disability = deferred(db.Column(db.Text), group='biometrics')
+    accused_photo = deferred(db.Column(db.String(255)), group='documents')
     pincode = db.Column(db.String(10))
     aadhaar_no = db.Column(db.String(20))
+    # Filled in by the identity clustering job (identity.py).
+    aadhaar_key = db.Column(db.String(12), index=True)
+    person_id = db.Column(db.Integer, index=True)
 
     permanent_address = db.Column(db.Text, nullable=False)
-    temporary_address = db.Column(db.Text)
+    temporary_address = deferred(db.Column(db.Text), group='narrative')
     mobile = db.Column(db.String(15), nullable=False)
     email_id = db.Column(db.String(100), nullable=False)
 
     fir_no = db.Column(db.String(50))
     case_type = db.Column(db.String(50))
     ps = db.Column(db.String(100))
-    case_no = db.Column(db.String(50))
+    case_no = db.Column(db.String(50), unique=True)
     sections = db.Column(db.String(255))
     date_of_arrest = db.Column(db.Date)
     place_of_arrest = db.Column(db.String(150))
     warrant_arrest = db.Column(db.String(10))
-    confession_statement = db.Column(db.Text)
+    confession_statement = deferred(db.Column(db.Text), group='narrative')
 
     court_forward_date_time = db.Column(db.DateTime)
     remand_custody = db.Column(db.String(50))
     bail_status = db.Column(db.String(100))
-    previous_criminal_record = db.Column(db.String(255))
+    previous_criminal_record = deferred(db.Column(db.String(255)), group='narrative')
+
+
+class AccusedChangeLog(db.Model):
+    __tablename__ = 'accused_change_log'
+
+    id = db.Column(db.Integer, primary_key=True)
+    accused_id = db.Column(db.Integer, db.ForeignKey('accused.id'), nullable=False, index=True)
+    changed_by = db.Column(db.String(100), nullable=True)
+    changes = db.Column(db.Text, nullable=False)
+    changed_at = db.Column(db.DateTime, default=datetime.now)
+
+
+class CaseNumberCounter(db.Model):
+    __tablename__ = 'case_number_counter'
+    __table_args__ = (db.UniqueConstraint('ps_code', 'year', name='uq_case_number_counter_ps_year'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    ps_code = db.Column(db.String(20), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    next_value = db.Column(db.Integer, nullable=False, default=1)
+
+
+class CaseNumberReservation(db.Model):
+    __tablename__ = 'case_number_reservation'
+    # The case-number filter syncs reservations by id; without AUTOINCREMENT
+    # SQLite hands a released top id to the next reservation.
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    case_no = db.Column(db.String(50), unique=True, nullable=False)
+    ps_code = db.Column(db.String(20), nullable=False)
+    reserved_by = db.Column(db.String(100), nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+
+
+class CaseNumberEdit(db.Model):
+    # Case numbers given to existing accused through the edit forms, so every
+    # worker's case-number filter picks them up (see case_numbers.py).
+    __tablename__ = 'case_number_edit'
+
+    id = db.Column(db.Integer, primary_key=True)
+    case_no = db.Column(db.String(50), nullable=False)
+    edited_at = db.Column(db.DateTime, default=datetime.now)
 
 
 class SectionPunishment(db.Model):
     __tablename__ = 'section_punishment'
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    category = db.Column(db.String(100), nullable=False)
+    category = db.Column(db.String(100), nullable=False, index=True)
     article_section = db.Column(db.String(255), nullable=True)
     offense = db.Column(db.Text, nullable=True)
     possible_punishments = db.Column(db.Text, nullable=True)
     minimum_fine = db.Column(db.String(100), nullable=True)
+    # Parsed from the two texts above (sentencing.py); NULL where the text
+    # sets no such bound. Fines in paise, imprisonment in days.
+    min_fine_paise = db.Column(db.BigInteger)
+    max_fine_paise = db.Column(db.BigInteger)
+    min_imprisonment_days = db.Column(db.Integer)
+    max_imprisonment_days = db.Column(db.Integer)
 
 
 class ComplaintDescription(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     complain_type = db.Column(db.String(50), nullable=False)
     description = db.Column(db.String(255), nullable=False)
-    case_no = db.Column(db.String(50), db.ForeignKey('accused.case_no'), nullable=False)
+    case_no = db.Column(db.String(50), db.ForeignKey('accused.case_no'), nullable=False, index=True)
     status = db.Column(db.String(50), nullable=False, default='Active')
 
     accused = db.relationship('Accused', backref='complaints')
 
 
 class SuperAdminMessage(db.Model):
+    # The inbox pages through one status, or all, newest first; the contact
+    # page lists the messages of one case.
+    __table_args__ = (
+        db.Index('ix_super_admin_message_status_created', 'status', 'created_at'),
+        db.Index('ix_super_admin_message_case_created', 'case_no', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     case_type = db.Column(db.String(50), nullable=False)
     case_no = db.Column(db.String(50), db.ForeignKey('accused.case_no'), nullable=False)
     message = db.Column(db.Text, nullable=False)
     reply = db.Column(db.Text, nullable=True)
     status = db.Column(db.String(50), nullable=False, default='Pending')
-    created_at = db.Column(db.DateTime, default=datetime.now)
+    created_at = db.Column(db.DateTime, default=datetime.now, index=True)
     replied_at = db.Column(db.DateTime, nullable=True)
+    # Set when the message is first shown in the super admin inbox.
+    read_at = db.Column(db.DateTime, nullable=True)
 
     accused = db.relationship('Accused', backref='super_admin_messages')
 
@@ -111,15 +179,20 @@ class JudgeDecision(db.Model):
     __tablename__ = 'judge_decision'
 
     id = db.Column(db.Integer, primary_key=True)
-    case_no = db.Column(db.String(50), db.ForeignKey('accused.case_no'), nullable=False)
+    # One decision per case; decisions.record_decisions upserts on it.
+    case_no = db.Column(db.String(50), db.ForeignKey('accused.case_no'), nullable=False, unique=True)
     status = db.Column(db.String(20), nullable=False)
     decided_at = db.Column(db.DateTime, default=datetime.now)
     total_fine = db.Column(db.String(50), nullable=True)
     imprisonment = db.Column(db.String(50), nullable=True)
+    # Parsed from total_fine and imprisonment (sentencing.py).
+    fine_paise = db.Column(db.BigInteger)
+    imprisonment_days = db.Column(db.Integer)
 
 
 class MeetingLink(db.Model):
     __tablename__ = 'meeting_link'
+    __table_args__ = (db.Index('ix_meeting_link_case_status', 'case_no', 'status'),)
 
     id = db.Column(db.Integer, primary_key=True)
     case_no = db.Column(db.String(50), db.ForeignKey('accused.case_no'), nullable=False)
@@ -127,3 +200,111 @@ class MeetingLink(db.Model):
     status = db.Column(db.String(20), nullable=False, default='Ongoing')
     created_at = db.Column(db.DateTime, default=datetime.now)
     ended_at = db.Column(db.DateTime, nullable=True)
+
+
+class ActivityLog(db.Model):
+    __tablename__ = 'activity_log'
+
+    id = db.Column(db.Integer, primary_key=True)
+    action = db.Column(db.String(30), nullable=False)
+    entity = db.Column(db.String(30), nullable=False)
+    entity_ref = db.Column(db.String(100), nullable=True)
+    description = db.Column(db.String(255), nullable=False)
+    actor = db.Column(db.String(100), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.now, index=True)
+
+
+class DailyRollup(db.Model):
+    __tablename__ = 'daily_rollup'
+    __table_args__ = (db.UniqueConstraint('dimension', 'day', 'value', name='uq_daily_rollup_key'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    dimension = db.Column(db.String(30), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    value = db.Column(db.String(100), nullable=False, default='')
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+
+class CaseLifecycle(db.Model):
+    __tablename__ = 'case_lifecycle'
+
+    case_no = db.Column(db.String(50), primary_key=True)
+    ps = db.Column(db.String(100))
+    case_type = db.Column(db.String(50))
+    arrest_to_court_hours = db.Column(db.Double)
+    arrest_to_first_hearing_hours = db.Column(db.Double)
+    hearing_time_hours = db.Column(db.Double)
+    court_to_decision_hours = db.Column(db.Double)
+    arrest_to_decision_hours = db.Column(db.Double)
+
+
+class LifecycleSketchBucket(db.Model):
+    __tablename__ = 'lifecycle_sketch_bucket'
+    __table_args__ = (
+        db.UniqueConstraint('stage', 'dimension', 'value', 'bucket', name='uq_lifecycle_sketch_bucket_key'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    stage = db.Column(db.String(40), nullable=False)
+    dimension = db.Column(db.String(20), nullable=False)
+    value = db.Column(db.String(100), nullable=False, default='')
+    bucket = db.Column(db.Integer, nullable=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+
+class Person(db.Model):
+    __tablename__ = 'person'
+
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+
+
+class SchemaVersion(db.Model):
+    __tablename__ = 'schema_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.now)
+
+
+class ReplicaHeartbeat(db.Model):
+    # One row, rewritten on the primary every few seconds; its age on the
+    # replica is the replication lag (see db_replica.py).
+    __tablename__ = 'replica_heartbeat'
+
+    id = db.Column(db.Integer, primary_key=True)
+    beat_at = db.Column(db.DateTime, nullable=False)
+
+
+class CaseSection(db.Model):
+    # One row per section code listed in Accused.sections, kept by sentencing.py.
+    __tablename__ = 'case_section'
+
+    case_no = db.Column(db.String(50), primary_key=True)
+    section = db.Column(db.String(20), primary_key=True, index=True)
+
+
+class SectionCode(db.Model):
+    # One row per section code a SectionPunishment entry covers ("379, 380, 381").
+    __tablename__ = 'section_code'
+
+    section = db.Column(db.String(20), primary_key=True)
+    section_punishment_id = db.Column(db.Integer, primary_key=True)
+
+
+class MessageCounter(db.Model):
+    # Inbox totals per status plus 'unread', kept by inbox.py.
+    __tablename__ = 'message_counter'
+
+    name = db.Column(db.String(60), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+
+
+class JobLock(db.Model):
+    # Leases that keep background jobs and startup seeding to one process at
+    # a time (see job_locks.py).
+    __tablename__ = 'job_lock'
+
+    name = db.Column(db.String(60), primary_key=True)
+    holder = db.Column(db.String(64), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
@@ -0,0 +1,78 @@
+import hashlib
+import os
+import threading
+
+from flask import current_app, make_response, render_template, request
+from flask_wtf.csrf import generate_csrf
+
+from metrics import record_cache
+
+# Rendered in place of the CSRF token and swapped for the real one per request.
+CSRF_PLACEHOLDER = '__page_cache_csrf_token__'
+
+_PAGES = {}
+_LOCK = threading.Lock()
+_SETTINGS = {'enabled': True, 'max_age': 300}
+
+
+def configure_page_cache(enabled, max_age):
+    _SETTINGS.update(enabled=enabled, max_age=max_age)
+    clear_page_cache()
+
+
+def clear_page_cache():
+    with _LOCK:
+        _PAGES.clear()
+
+
+def _template_mtime(template_name):
+    try:
+        return os.path.getmtime(current_app.jinja_env.get_template(template_name).filename)
+    except (OSError, TypeError):
+        # Templates that do not come from a file never change.
+        return 0
+
+
+def _rendered(template_name, csrf):
+    # Keyed by route and template mtime, so editing the template is picked up
+    # without a restart. The script root is in the key because url_for()
+    # output depends on it.
+    key = (request.endpoint, request.script_root, template_name)
+    mtime = _template_mtime(template_name)
+    with _LOCK:
+        entry = _PAGES.get(key)
+    if entry is not None and entry[0] == mtime:
+        record_cache('pages', hits=1)
+        return entry
+    record_cache('pages', misses=1)
+    html = render_template(template_name, **({'csrf_token': CSRF_PLACEHOLDER} if csrf else {}))
+    entry = (mtime, html, hashlib.sha1(html.encode('utf-8')).hexdigest())
+    with _LOCK:
+        _PAGES[key] = entry
+    return entry
+
+
+def cached_page(template_name, csrf=False):
+    # For pages whose output is the same for every visitor: no session, flash
+    # or per-user data in the template. A CSRF token is the one allowed
+    # exception (csrf=True).
+    if not _SETTINGS['enabled']:
+        return render_template(template_name, **({'csrf_token': generate_csrf()} if csrf else {}))
+    _mtime, html, etag = _rendered(template_name, csrf)
+    if csrf:
+        # The token belongs to the visitor's session, so only their browser may
+        # keep the page, and it has to check back each time.
+        response = make_response(html.replace(CSRF_PLACEHOLDER, generate_csrf()))
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+
+    response = make_response(html)
+    response.set_etag(etag)
+    if request.cookies.get(current_app.config['SESSION_COOKIE_NAME']):
+        # A signed-in visitor's response may carry a refreshed session cookie.
+        response.cache_control.private = True
+    else:
+        response.cache_control.public = True
+    response.cache_control.max_age = _SETTINGS['max_age']
+    return response.make_conditional(request)
@@ -0,0 +1,255 @@
+from collections import Counter
+from datetime import timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import event, func, insert, literal, select
+from sqlalchemy.orm.attributes import get_history
+
+from accused_listing import accused_bundle
+from extensions import db
+from models import Accused, ComplaintDescription, DailyRollup, JudgeDecision
+from upserts import increment
+
+# Every rollup is bucketed on the case's date of arrest, the same axis
+# fetch_report filters on, so any cell can be drilled down to its raw rows.
+ACCUSED_DIMENSIONS = ('case_type', 'ps', 'pincode')
+DIMENSIONS = ACCUSED_DIMENSIONS + ('complaint_type', 'decision_status')
+PERIODS = ('day', 'week', 'month')
+
+_ROLLUP = DailyRollup.__table__
+
+
+def _apply_deltas(connection, deltas):
+    for (dimension, day, value), delta in deltas.items():
+        if delta and day is not None:
+            increment(connection, _ROLLUP, {'dimension': dimension, 'day': day, 'value': value or ''}, 'total', delta)
+
+
+def _arrest_date(connection, case_no):
+    return connection.execute(select(Accused.date_of_arrest).where(Accused.case_no == case_no)).scalar()
+
+
+def _count_children(connection, case_no, day, sign, deltas):
+    complaint_types = connection.execute(
+        select(ComplaintDescription.complain_type).where(ComplaintDescription.case_no == case_no)
+    ).scalars()
+    for complaint_type in complaint_types:
+        deltas[('complaint_type', day, complaint_type)] += sign
+    statuses = connection.execute(select(JudgeDecision.status).where(JudgeDecision.case_no == case_no)).scalars()
+    for status in statuses:
+        deltas[('decision_status', day, status)] += sign
+
+
+def _previous(target, name):
+    history = get_history(target, name)
+    return history.deleted[0] if history.deleted else getattr(target, name)
+
+
+def retract_case_children(case_no):
+    # Bulk query deletes bypass the mapper events below, so the delete routes call
+    # this before removing a case's complaints and decisions.
+    connection = db.session.connection()
+    deltas = Counter()
+    _count_children(connection, case_no, _arrest_date(connection, case_no), -1, deltas)
+    _apply_deltas(connection, deltas)
+
+
+def _count_accused(connection, target, sign):
+    deltas = Counter()
+    for dimension in ACCUSED_DIMENSIONS:
+        deltas[(dimension, target.date_of_arrest, getattr(target, dimension))] += sign
+    _apply_deltas(connection, deltas)
+
+
+@event.listens_for(Accused, 'after_insert')
+def _count_new_accused(_mapper, connection, target):
+    _count_accused(connection, target, 1)
+
+
+@event.listens_for(Accused, 'after_delete')
+def _count_deleted_accused(_mapper, connection, target):
+    _count_accused(connection, target, -1)
+
+
+@event.listens_for(Accused, 'after_update')
+def _move_accused(_mapper, connection, target):
+    tracked = ACCUSED_DIMENSIONS + ('date_of_arrest',)
+    if not any(get_history(target, name).has_changes() for name in tracked):
+        return
+
+    old_day = _previous(target, 'date_of_arrest')
+    deltas = Counter()
+    for dimension in ACCUSED_DIMENSIONS:
+        deltas[(dimension, old_day, _previous(target, dimension))] -= 1
+        deltas[(dimension, target.date_of_arrest, getattr(target, dimension))] += 1
+    if old_day != target.date_of_arrest:
+        _count_children(connection, target.case_no, old_day, -1, deltas)
+        _count_children(connection, target.case_no, target.date_of_arrest, 1, deltas)
+    _apply_deltas(connection, deltas)
+
+
+@event.listens_for(ComplaintDescription, 'after_insert')
+def _count_new_complaint(_mapper, connection, target):
+    day = _arrest_date(connection, target.case_no)
+    _apply_deltas(connection, Counter({('complaint_type', day, target.complain_type): 1}))
+
+
+@event.listens_for(ComplaintDescription, 'after_delete')
+def _count_deleted_complaint(_mapper, connection, target):
+    day = _arrest_date(connection, target.case_no)
+    _apply_deltas(connection, Counter({('complaint_type', day, target.complain_type): -1}))
+
+
+@event.listens_for(JudgeDecision, 'after_insert')
+def _count_new_decision(_mapper, connection, target):
+    day = _arrest_date(connection, target.case_no)
+    _apply_deltas(connection, Counter({('decision_status', day, target.status): 1}))
+
+
+@event.listens_for(JudgeDecision, 'after_update')
+def _move_decision(_mapper, connection, target):
+    if not get_history(target, 'status').has_changes():
+        return
+    day = _arrest_date(connection, target.case_no)
+    deltas = Counter()
+    deltas[('decision_status', day, _previous(target, 'status'))] -= 1
+    deltas[('decision_status', day, target.status)] += 1
+    _apply_deltas(connection, deltas)
+
+
+@event.listens_for(JudgeDecision, 'after_delete')
+def _count_deleted_decision(_mapper, connection, target):
+    day = _arrest_date(connection, target.case_no)
+    _apply_deltas(connection, Counter({('decision_status', day, target.status): -1}))
+
+
+def count_decision_changes(connection, changes):
+    # For decisions written with a native upsert, which bypasses the mapper
+    # events above. changes holds (arrest day, previous status or None, new status).
+    deltas = Counter()
+    for day, previous, status in changes:
+        if previous == status:
+            continue
+        if previous is not None:
+            deltas[('decision_status', day, previous)] -= 1
+        deltas[('decision_status', day, status)] += 1
+    _apply_deltas(connection, deltas)
+
+
+def _aggregate_into_rollup(dimension, value_column, source):
+    key = func.coalesce(value_column, '')
+    query = (
+        select(literal(dimension), Accused.date_of_arrest, key, func.count())
+        .select_from(source)
+        .where(Accused.date_of_arrest.isnot(None))
+        .group_by(Accused.date_of_arrest, key)
+    )
+    db.session.execute(insert(_ROLLUP).from_select(['dimension', 'day', 'value', 'total'], query))
+
+
+def rebuild_rollups():
+    db.session.query(DailyRollup).delete(synchronize_session=False)
+    for dimension in ACCUSED_DIMENSIONS:
+        _aggregate_into_rollup(dimension, getattr(Accused, dimension), Accused)
+    _aggregate_into_rollup(
+        'complaint_type',
+        ComplaintDescription.complain_type,
+        db.join(ComplaintDescription, Accused, ComplaintDescription.case_no == Accused.case_no),
+    )
+    _aggregate_into_rollup(
+        'decision_status',
+        JudgeDecision.status,
+        db.join(JudgeDecision, Accused, JudgeDecision.case_no == Accused.case_no),
+    )
+    db.session.commit()
+    return DailyRollup.query.count()
+
+
+def ensure_rollups():
+    # First start after upgrading: seed the rollups from existing cases once.
+    if DailyRollup.query.first() is not None:
+        return
+    if Accused.query.filter(Accused.date_of_arrest.isnot(None)).first() is None:
+        return
+    rebuild_rollups()
+
+
+@click.command('rebuild-rollups')
+@with_appcontext
+def rebuild_rollups_command():
+    click.echo(f'Rebuilt {rebuild_rollups()} rollup rows.')
+
+
+def period_start(day, period):
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_period(start, period):
+    if period == 'week':
+        return start + timedelta(days=7)
+    if period == 'month':
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def rollup_report(dimension, from_date, to_date, period='week'):
+    periods = []
+    start = period_start(from_date, period)
+    while start <= to_date:
+        following = _next_period(start, period)
+        periods.append({'start': max(start, from_date), 'end': min(following - timedelta(days=1), to_date)})
+        start = following
+    position = {period_start(item['start'], period): index for index, item in enumerate(periods)}
+
+    rows = (
+        db.session.query(DailyRollup.day, DailyRollup.value, DailyRollup.total)
+        .filter(
+            DailyRollup.dimension == dimension,
+            DailyRollup.day >= from_date,
+            DailyRollup.day <= to_date,
+        )
+        .all()
+    )
+    series = {}
+    for day, value, total in rows:
+        counts = series.setdefault(value, [0] * len(periods))
+        counts[position[period_start(day, period)]] += total
+
+    report_rows = [
+        {'value': value, 'counts': counts, 'total': sum(counts)}
+        for value, counts in series.items()
+        if any(counts)
+    ]
+    report_rows.sort(key=lambda row: (-row['total'], row['value']))
+    return {
+        'dimension': dimension,
+        'period': period,
+        'from_date': from_date,
+        'to_date': to_date,
+        'periods': periods,
+        'rows': report_rows,
+    }
+
+
+def drilldown_query(from_date, to_date, dimension=None, value=None):
+    query = db.session.query(accused_bundle(), ComplaintDescription).filter(
+        Accused.date_of_arrest >= from_date,
+        Accused.date_of_arrest <= to_date,
+    )
+    if dimension not in DIMENSIONS:
+        return query.join(ComplaintDescription, Accused.case_no == ComplaintDescription.case_no)
+    if dimension == 'complaint_type':
+        return query.join(ComplaintDescription, Accused.case_no == ComplaintDescription.case_no).filter(
+            ComplaintDescription.complain_type == value
+        )
+
+    # Cases without complaints still count towards the other rollups, so keep them.
+    query = query.outerjoin(ComplaintDescription, Accused.case_no == ComplaintDescription.case_no)
+    if dimension == 'decision_status':
+        return query.join(JudgeDecision, JudgeDecision.case_no == Accused.case_no).filter(JudgeDecision.status == value)
+    return query.filter(func.coalesce(getattr(Accused, dimension), '') == (value or ''))
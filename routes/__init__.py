@@ -1,6 +1,9 @@
 from routes.admin_routes import register_admin_routes
+from routes.api_routes import register_api_routes
+from routes.event_routes import register_event_routes
 from routes.judge_routes import register_judge_routes
 from routes.public_routes import register_public_routes
+from routes.report_routes import register_report_routes
 from routes.super_admin_routes import register_super_admin_routes
 from routes.utility_routes import register_utility_routes
 
@@ -12,3 +15,6 @@ def register_all_routes(app):
     register_super_admin_routes(app)
     register_judge_routes(app)
     register_utility_routes(app)
+    register_event_routes(app)
+    register_report_routes(app)
+    register_api_routes(app)
@@ -1,11 +1,25 @@
-from datetime import datetime
-
-from flask import flash, jsonify, redirect, render_template, request, url_for
+from flask import flash, jsonify, redirect, render_template, request, session, url_for
 from flask_wtf.csrf import generate_csrf
+from sqlalchemy.orm import undefer
 
+from accused_forms import apply_accused_form
+from accused_listing import CARD_COLUMNS, accused_rows
+from activity_log import activity_page, record_activity
 from decorators import admin_required
 from extensions import db
-from models import Accused, ComplaintDescription, JudgeDecision, MeetingLink, SectionPunishment, SuperAdminMessage
+from identity import linked_cases
+from inbox import retract_case_messages
+from models import (
+    Accused,
+    AccusedChangeLog,
+    ComplaintDescription,
+    JudgeDecision,
+    MeetingLink,
+    SectionPunishment,
+    SuperAdminMessage,
+)
+from rollups import retract_case_children
+from streaming import STREAM_BATCH_ROWS, stream_page
 
 
 
@@ -13,8 +27,7 @@ def register_admin_routes(app):
     @app.route('/admin/accused-details')
     @admin_required
     def admin_accused_details():
-        accused_list = Accused.query.all()
-        return render_template('user_details.html', accused=accused_list, csrf_token=generate_csrf())
+        return stream_page('user_details.html', accused=accused_rows(*CARD_COLUMNS).yield_per(STREAM_BATCH_ROWS))
 
     @app.route('/admin/accused/delete/<int:accused_id>', methods=['POST'])
     @admin_required
@@ -22,6 +35,8 @@ def register_admin_routes(app):
         try:
             accused = Accused.query.get_or_404(accused_id)
             case_no = accused.case_no
+            retract_case_children(case_no)
+            retract_case_messages(case_no)
 
             try:
                 db.session.query(JudgeDecision).filter_by(case_no=case_no).delete(synchronize_session=False)
@@ -39,9 +54,14 @@ def register_admin_routes(app):
                 db.session.query(SuperAdminMessage).filter_by(case_no=case_no).delete(synchronize_session=False)
             except Exception:
                 pass
+            try:
+                db.session.query(AccusedChangeLog).filter_by(accused_id=accused.id).delete(synchronize_session=False)
+            except Exception:
+                pass
 
             db.session.delete(accused)
             db.session.commit()
+            record_activity('deleted', 'accused', f'Accused {case_no} deleted', case_no)
             return jsonify({'status': 'success', 'message': 'Accused deleted successfully'})
         except Exception as e:
             db.session.rollback()
@@ -50,97 +70,35 @@ def register_admin_routes(app):
     @app.route('/admin/accused/edit/<int:accused_id>', methods=['GET', 'POST'])
     @admin_required
     def admin_accused_edit(accused_id):
-        accused = Accused.query.get_or_404(accused_id)
+        accused = Accused.query.options(undefer('*')).get_or_404(accused_id)
         if request.method == 'POST':
             try:
-                accused.username = request.form.get('username', accused.username)
-                accused.relative_name = request.form.get('relative_name', accused.relative_name)
-                accused.relation = request.form.get('relation', accused.relation)
-
-                dob_str = request.form.get('dob', '')
-                if dob_str:
-                    for fmt in ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y'):
-                        try:
-                            accused.dob = datetime.strptime(dob_str, fmt).date()
-                            break
-                        except ValueError:
-                            continue
-
-                accused.gender = request.form.get('gender', accused.gender)
-                accused.nationality = request.form.get('nationality', accused.nationality)
-                accused.occupation = request.form.get('occupation', accused.occupation)
-                accused.education = request.form.get('education', accused.education)
-
-                accused.height = request.form.get('height', accused.height)
-                accused.weight = request.form.get('weight', accused.weight)
-                accused.waist_size = request.form.get('waist_size', accused.waist_size)
-                accused.foot_size = request.form.get('foot_size', accused.foot_size)
-                accused.special_mark_cut = request.form.get('special_mark_cut', accused.special_mark_cut)
-                accused.skin_color = request.form.get('skin_color', accused.skin_color)
-                accused.tattoo = request.form.get('tattoo', accused.tattoo)
-                accused.accessories_wearing = request.form.get('accessories_wearing', accused.accessories_wearing)
-                accused.blood_group = request.form.get('blood_group', accused.blood_group)
-                accused.special_key_point = request.form.get('special_key_point', accused.special_key_point)
-                accused.disability = request.form.get('disability', accused.disability)
-
-                accused.permanent_address = request.form.get('permanent_address', accused.permanent_address)
-                accused.temporary_address = request.form.get('temporary_address', accused.temporary_address)
-                accused.pincode = request.form.get('pincode', accused.pincode)
-                accused.mobile = request.form.get('mobile', accused.mobile)
-                accused.email_id = request.form.get('email_id', accused.email_id)
-                accused.aadhaar_no = request.form.get('aadhaar_no', accused.aadhaar_no)
-
-                accused.fir_no = request.form.get('fir_no', accused.fir_no)
-                accused.case_type = request.form.get('case_type', accused.case_type)
-                accused.ps = request.form.get('ps', accused.ps)
-                accused.case_no = request.form.get('case_no', accused.case_no)
-                accused.sections = request.form.get('sections', accused.sections)
-
-                doa_str = request.form.get('date_of_arrest', '')
-                if doa_str:
-                    for fmt in ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y'):
-                        try:
-                            accused.date_of_arrest = datetime.strptime(doa_str, fmt).date()
-                            break
-                        except ValueError:
-                            continue
-
-                accused.place_of_arrest = request.form.get('place_of_arrest', accused.place_of_arrest)
-                accused.warrant_arrest = request.form.get('warrant_arrest', accused.warrant_arrest)
-                accused.confession_statement = request.form.get('confession_statement', accused.confession_statement)
-
-                cdt_str = request.form.get('court_forward_date_time', '')
-                if cdt_str:
-                    for fmt in ('%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M', '%d-%m-%Y %H:%M'):
-                        try:
-                            accused.court_forward_date_time = datetime.strptime(cdt_str, fmt)
-                            break
-                        except ValueError:
-                            continue
-
-                accused.remand_custody = request.form.get('remand_custody', accused.remand_custody)
-                accused.bail_status = request.form.get('bail_status', accused.bail_status)
-                accused.previous_criminal_record = request.form.get(
-                    'previous_criminal_record', accused.previous_criminal_record
-                )
+                changes = apply_accused_form(accused, request.form, changed_by=session.get('admin_username'))
+                if not changes:
+                    flash('No changes to save.', 'success')
+                    return redirect(url_for('admin_accused_details'))
 
                 db.session.commit()
+                record_activity('edited', 'accused', f"Accused {accused.case_no} updated: {', '.join(changes)}", accused.case_no)
                 flash('Accused details updated successfully', 'success')
                 return redirect(url_for('admin_accused_details'))
             except Exception as e:
                 db.session.rollback()
                 flash(f'Failed to update accused: {str(e)}', 'error')
 
-        return render_template('admin_edit_user.html', accused=accused, csrf_token=generate_csrf())
+        return render_template(
+            'admin_edit_user.html',
+            accused=accused,
+            linked_cases=linked_cases(accused),
+            csrf_token=generate_csrf(),
+        )
 
     @app.route('/admin/complaint-description')
     @admin_required
     def admin_complaint_description():
-        complaints = ComplaintDescription.query.all()
         complaint_types = ['Crime', 'Women', 'Child', 'Senior Citizen', 'Traffic', 'Theft', 'Civil', 'Mental Harassment']
         return render_template(
             'add_complaint_description.html',
-            complaint_descriptions=complaints,
             complaint_types=complaint_types,
             csrf_token=generate_csrf(),
         )
@@ -156,3 +114,16 @@ def register_admin_routes(app):
             pagination=sections_pagination,
             csrf_token=generate_csrf(),
         )
+
+    @app.route('/admin/activity-log')
+    @admin_required
+    def admin_activity_log():
+        page = request.args.get('page', 1, type=int)
+        entity = request.args.get('entity', '').strip()
+        activity_pagination = activity_page(page, entity)
+        return render_template(
+            'activity_log.html',
+            activities=activity_pagination.items,
+            pagination=activity_pagination,
+            entity=entity,
+        )
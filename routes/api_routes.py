@@ -0,0 +1,50 @@
+from functools import wraps
+
+from flask import jsonify, request, session
+
+from api import ApiError, list_page
+from decorators import admin_or_super_admin_required, judge_required
+
+# Station tools read the same data the admin pages show; decisions and
+# meetings are the judge's.
+RESOURCE_ROLES = {
+    'accused': admin_or_super_admin_required,
+    'complaints': admin_or_super_admin_required,
+    'sections': admin_or_super_admin_required,
+    'decisions': judge_required,
+    'meetings': judge_required,
+}
+
+
+def _api_auth(role_required):
+    # The role decorators redirect to a login page; API clients get a 401.
+    def decorate(view):
+        guarded = role_required(view)
+
+        @wraps(view)
+        def api_view(*args, **kwargs):
+            response = guarded(*args, **kwargs)
+            if getattr(response, 'status_code', None) == 302:
+                session.pop('_flashes', None)
+                return jsonify({'success': False, 'message': 'Authentication required'}), 401
+            return response
+
+        return api_view
+
+    return decorate
+
+
+def register_api_routes(app):
+    def make_view(name):
+        def view():
+            try:
+                page = list_page(name, request.args, app.config['API_PAGE_SIZE'], app.config['API_MAX_PAGE_SIZE'])
+            except ApiError as exc:
+                return jsonify({'success': False, 'message': str(exc)}), 400
+            return jsonify(page)
+
+        view.__name__ = f'api_{name}'
+        return _api_auth(RESOURCE_ROLES[name])(view)
+
+    for name in RESOURCE_ROLES:
+        app.add_url_rule(f'/api/v1/{name}', f'api_{name}', make_view(name))
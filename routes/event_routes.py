@@ -0,0 +1,33 @@
+from flask import Response, jsonify
+
+from decorators import admin_required, judge_required, super_admin_required
+from events import BrokerFull, open_event_stream
+
+
+
+def register_event_routes(app):
+    def event_stream_response(role):
+        try:
+            stream = open_event_stream(role, app.config['EVENTS_HEARTBEAT_SECONDS'])
+        except BrokerFull:
+            return jsonify({'success': False, 'message': 'Too many live connections'}), 503
+
+        response = Response(stream, mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    @app.route('/events/admin')
+    @admin_required
+    def admin_events():
+        return event_stream_response('admin')
+
+    @app.route('/events/super-admin')
+    @super_admin_required
+    def super_admin_events():
+        return event_stream_response('super_admin')
+
+    @app.route('/events/judge')
+    @judge_required
+    def judge_events():
+        return event_stream_response('judge')
@@ -5,8 +5,14 @@ from datetime import datetime
 from flask import flash, jsonify, redirect, render_template, request, session, url_for
 from flask_wtf.csrf import generate_csrf
 
+from accused_listing import CARD_COLUMNS, accused_bundle, accused_rows
+from activity_log import record_activity
+from db_replica import read_only
+from decisions import MAX_BATCH_DECISIONS, record_decisions
 from decorators import judge_required
+from events import publish_event
 from extensions import csrf, db
+from meetings import MAX_BATCH_CASES, get_ongoing_link, get_ongoing_links, invalidate_meeting_link, swap_meeting_link
 from models import Accused, JudgeDecision, MeetingLink
 from security import (
     check_login_block,
@@ -18,22 +24,41 @@ from security import (
 
 
 
+def undecided_accused():
+    decided = db.session.query(JudgeDecision.case_no)
+    return accused_rows(*CARD_COLUMNS).filter(~Accused.case_no.in_(decided)).all()
+
+
 def register_judge_routes(app):
     @app.route('/get_meeting_link', methods=['POST'])
+    @read_only
     @csrf.exempt
     def get_meeting_link():
         case_no = request.form.get('case_no', '').strip()
         if not is_valid_case_no(case_no):
             return jsonify({'success': False, 'message': 'Case number is required'})
 
-        meeting = (
-            MeetingLink.query.filter_by(case_no=case_no, status='Ongoing')
-            .order_by(MeetingLink.created_at.desc())
-            .first()
-        )
+        meeting = get_ongoing_link(case_no)
         if not meeting:
             return jsonify({'success': True, 'link': None})
-        return jsonify({'success': True, 'link': meeting.link})
+        return jsonify({'success': True, 'link': meeting['link']})
+
+    @app.route('/get_meeting_links', methods=['POST'])
+    @read_only
+    @csrf.exempt
+    def get_meeting_links():
+        raw_values = request.form.getlist('case_no') or request.form.get('case_nos', '').split(',')
+        case_nos = [value.strip() for value in raw_values if value and value.strip()]
+        if not case_nos:
+            return jsonify({'success': False, 'message': 'Case numbers are required'})
+        if len(case_nos) > MAX_BATCH_CASES:
+            return jsonify({'success': False, 'message': f'At most {MAX_BATCH_CASES} case numbers per request'}), 400
+        if not all(is_valid_case_no(case_no) for case_no in case_nos):
+            return jsonify({'success': False, 'message': 'Invalid case number'}), 400
+
+        meetings = get_ongoing_links(case_nos)
+        links = {case_no: meeting['link'] if meeting else None for case_no, meeting in meetings.items()}
+        return jsonify({'success': True, 'links': links})
 
     @app.route('/judge-login', methods=['GET', 'POST'])
     def judge_login():
@@ -72,14 +97,14 @@ def register_judge_routes(app):
     @app.route('/judge-dashboard')
     @judge_required
     def judge_dashboard():
-        decided_case_nos = [decision.case_no for decision in JudgeDecision.query.all()]
-        if decided_case_nos:
-            accused_list = Accused.query.filter(~Accused.case_no.in_(decided_case_nos)).all()
-        else:
-            accused_list = Accused.query.all()
+        accused_list = undecided_accused()
 
-        ongoing_meetings = MeetingLink.query.filter_by(status='Ongoing').order_by(MeetingLink.created_at.desc()).all()
-        meeting_links_by_case = {meeting.case_no: meeting for meeting in ongoing_meetings}
+        meeting_links_by_case = get_ongoing_links([person.case_no for person in accused_list if person.case_no])
+        ongoing_meetings = sorted(
+            (dict(meeting, case_no=case_no) for case_no, meeting in meeting_links_by_case.items() if meeting),
+            key=lambda meeting: meeting['created_at'],
+            reverse=True,
+        )
 
         return render_template(
             'judge_accused.html',
@@ -93,14 +118,13 @@ def register_judge_routes(app):
     @judge_required
     def judge_pending():
         pending = (
-            db.session.query(Accused)
+            accused_rows(*CARD_COLUMNS)
             .join(JudgeDecision, JudgeDecision.case_no == Accused.case_no)
             .filter(JudgeDecision.status == 'Pending')
             .all()
         )
 
-        ongoing = MeetingLink.query.filter_by(status='Ongoing').all()
-        meeting_links_by_case = {meeting.case_no: meeting for meeting in ongoing}
+        meeting_links_by_case = get_ongoing_links([person.case_no for person in pending if person.case_no])
 
         return render_template(
             'judge_pending.html',
@@ -113,7 +137,7 @@ def register_judge_routes(app):
     @judge_required
     def judge_solved():
         solved = (
-            db.session.query(Accused, JudgeDecision)
+            db.session.query(accused_bundle(), JudgeDecision)
             .join(JudgeDecision, JudgeDecision.case_no == Accused.case_no)
             .filter(JudgeDecision.status == 'Solved')
             .all()
@@ -128,20 +152,18 @@ def register_judge_routes(app):
             flash('Case number is required.', 'error')
             return redirect(url_for('judge_pending'))
 
-        decision = JudgeDecision.query.filter_by(case_no=case_no).first()
-        if not decision:
-            decision = JudgeDecision(case_no=case_no, status='Solved', decided_at=datetime.now())
-            db.session.add(decision)
-        else:
-            decision.status = 'Solved'
-            decision.decided_at = datetime.now()
-
         try:
-            db.session.commit()
-            flash('Case marked as solved.', 'success')
+            [result] = record_decisions([{'case_no': case_no, 'status': 'Solved'}])
         except Exception:
-            db.session.rollback()
             flash('Failed to mark as solved.', 'error')
+            return redirect(url_for('judge_pending'))
+
+        if result['success']:
+            record_activity('solved', 'decision', f'Case {case_no} marked as solved', case_no)
+            publish_event('decision.recorded', {'case_no': case_no, 'status': 'Solved'}, ('admin', 'super_admin'))
+            flash('Case marked as solved.', 'success')
+        else:
+            flash(f"Failed to mark as solved: {result['message']}.", 'error')
 
         return redirect(url_for('judge_pending'))
 
@@ -157,50 +179,63 @@ def register_judge_routes(app):
             flash('Invalid submission.', 'error')
             return redirect(url_for('judge_dashboard'))
 
-        accused = Accused.query.filter_by(case_no=case_no).first()
-        if not accused:
-            flash('Case not found.', 'error')
-            return redirect(url_for('judge_dashboard'))
-
-        existing = JudgeDecision.query.filter_by(case_no=case_no).first()
-        if existing:
-            existing.status = decision
-            existing.decided_at = datetime.now()
-            existing.total_fine = total_fine or None
-            existing.imprisonment = imprisonment or None
-        else:
-            db.session.add(
-                JudgeDecision(
-                    case_no=case_no,
-                    status=decision,
-                    total_fine=total_fine or None,
-                    imprisonment=imprisonment or None,
-                )
+        try:
+            [result] = record_decisions(
+                [
+                    {
+                        'case_no': case_no,
+                        'status': decision,
+                        'total_fine': total_fine or None,
+                        'imprisonment': imprisonment or None,
+                    }
+                ]
             )
+        except Exception:
+            result = {'success': False, 'message': ''}
 
-        try:
-            db.session.commit()
+        if result['success']:
+            record_activity('recorded', 'decision', f'Decision for case {case_no}: {decision}', case_no)
+            publish_event('decision.recorded', {'case_no': case_no, 'status': decision}, ('admin', 'super_admin'))
             flash('Decision saved successfully.', 'success')
-        except Exception:
-            db.session.rollback()
+        elif result['message'] == 'Case not found':
+            flash('Case not found.', 'error')
+        else:
             flash('Failed to save decision.', 'error')
 
-        decided_case_nos = [d.case_no for d in JudgeDecision.query.all()]
-        if decided_case_nos:
-            accused_list = Accused.query.filter(~Accused.case_no.in_(decided_case_nos)).all()
-        else:
-            accused_list = Accused.query.all()
+        return redirect(url_for('judge_dashboard'))
 
-        ongoing_meetings = MeetingLink.query.filter_by(status='Ongoing').order_by(MeetingLink.created_at.desc()).all()
-        meeting_links_by_case = {meeting.case_no: meeting for meeting in ongoing_meetings}
+    @app.route('/judge/submit-decisions', methods=['POST'])
+    @judge_required
+    def judge_submit_decisions():
+        # JSON body: {"decisions": [{"case_no", "decision", "total_fine", "imprisonment"}, ...]}
+        payload = request.get_json(silent=True) or {}
+        items = payload.get('decisions')
+        if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+            return jsonify({'success': False, 'message': 'A list of decisions is required'}), 400
+        if len(items) > MAX_BATCH_DECISIONS:
+            return jsonify({'success': False, 'message': f'At most {MAX_BATCH_DECISIONS} decisions per request'}), 400
+
+        entries = [
+            {
+                'case_no': str(item.get('case_no') or '').strip(),
+                'status': str(item.get('decision') or '').strip(),
+                'total_fine': str(item.get('total_fine') or '').strip() or None,
+                'imprisonment': str(item.get('imprisonment') or '').strip() or None,
+            }
+            for item in items
+        ]
+        try:
+            results = record_decisions(entries)
+        except Exception:
+            return jsonify({'success': False, 'message': 'Failed to save decisions'}), 500
 
-        return render_template(
-            'judge_accused.html',
-            accused=accused_list,
-            ongoing_meetings=ongoing_meetings,
-            meeting_links_by_case=meeting_links_by_case,
-            csrf_token=generate_csrf(),
-        )
+        statuses = {entry['case_no']: entry['status'] for entry in entries}
+        recorded = [result['case_no'] for result in results if result['success']]
+        for case_no in recorded:
+            publish_event('decision.recorded', {'case_no': case_no, 'status': statuses[case_no]}, ('admin', 'super_admin'))
+        if recorded:
+            record_activity('recorded', 'decision', f"Decisions recorded for {len(recorded)} case(s): {', '.join(recorded)}")
+        return jsonify({'success': len(recorded) == len(results), 'results': results})
 
     @app.route('/judge/save_meeting_link', methods=['POST'])
     @csrf.exempt
@@ -213,21 +248,14 @@ def register_judge_routes(app):
         if not is_valid_meeting_link(link):
             return jsonify({'success': False, 'message': 'Invalid meeting link'}), 400
 
-        existing = MeetingLink.query.filter_by(case_no=case_no, status='Ongoing').all()
-        for meeting in existing:
-            meeting.status = 'Ended'
-            meeting.ended_at = datetime.now()
-
-        try:
-            if existing:
-                db.session.commit()
-        except Exception:
-            db.session.rollback()
-
-        new_meeting = MeetingLink(case_no=case_no, link=link, status='Ongoing')
         try:
-            db.session.add(new_meeting)
-            db.session.commit()
+            new_meeting = swap_meeting_link(case_no, link)
+            record_activity('started', 'meeting', f'Meeting link set for case {case_no}', case_no)
+            publish_event(
+                'meeting.updated',
+                {'id': new_meeting.id, 'case_no': case_no, 'link': link, 'status': 'Ongoing'},
+                ('judge', 'super_admin'),
+            )
             return jsonify({'success': True})
         except Exception:
             db.session.rollback()
@@ -245,6 +273,13 @@ def register_judge_routes(app):
         meeting.ended_at = datetime.now()
         try:
             db.session.commit()
+            invalidate_meeting_link(meeting.case_no)
+            record_activity('ended', 'meeting', f'Meeting for case {meeting.case_no} ended', meeting.case_no)
+            publish_event(
+                'meeting.updated',
+                {'id': meeting.id, 'case_no': meeting.case_no, 'link': None, 'status': 'Ended'},
+                ('judge', 'super_admin'),
+            )
             flash('Meeting ended successfully.', 'success')
         except Exception:
             db.session.rollback()
@@ -4,11 +4,19 @@ from datetime import datetime
 from flask import flash, jsonify, redirect, render_template, request, session, url_for
 from flask_wtf.csrf import generate_csrf
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from werkzeug.security import check_password_hash, generate_password_hash
 from werkzeug.utils import secure_filename
 
+from accused_listing import CARD_COLUMNS, accused_rows
+from activity_log import record_activity, recent_activities, recent_notifications
+from case_numbers import allocate_case_number, case_number_taken, release_reservation
+from db_replica import primary_only, read_only
 from decorators import admin_or_super_admin_required, admin_required
+from events import publish_event
 from extensions import csrf, db
+from facets import autocomplete_case_numbers, case_type_facets
+from inbox import case_messages
 from models import (
     Accused,
     Admin,
@@ -16,6 +24,8 @@ from models import (
     SectionPunishment,
     SuperAdminMessage,
 )
+from page_cache import cached_page
+from rollups import DIMENSIONS as ROLLUP_DIMENSIONS, drilldown_query
 from security import (
     check_login_block,
     clear_login_failures,
@@ -23,6 +33,7 @@ from security import (
     record_login_failure,
     save_validated_upload,
 )
+from streaming import STREAM_BATCH_ROWS, stream_page
 
 ALLOWED_DOCUMENT_EXTENSIONS = {'pdf'}
 ALLOWED_IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png'}
@@ -33,27 +44,27 @@ def register_public_routes(app):
     @app.route('/')
     @app.route('/home')
     def home():
-        return render_template('home.html')
+        return cached_page('home.html')
 
     @app.route('/base')
     def base():
         return render_template('base.html')
 
     @app.route('/department', methods=['GET', 'POST'])
+    @read_only
     def department():
         csrf_token = generate_csrf()
         selected_case_type = None
 
-        case_types_rows = db.session.query(Accused.case_type).filter(Accused.case_type.isnot(None)).distinct().all()
-        case_types = [row[0] for row in case_types_rows]
+        case_types = [facet['case_type'] for facet in case_type_facets()]
 
         if request.method == 'POST':
             selected_case_type = request.form.get('case_type') or None
 
+        accused_query = db.session.query(Accused.username, Accused.case_type, Accused.case_no, Accused.sections)
         if selected_case_type:
-            filtered_accused = Accused.query.filter_by(case_type=selected_case_type).all()
-        else:
-            filtered_accused = Accused.query.all()
+            accused_query = accused_query.filter(Accused.case_type == selected_case_type)
+        filtered_accused = accused_query.all()
 
         return render_template(
             'add_department.html',
@@ -66,8 +77,7 @@ def register_public_routes(app):
     @app.route('/user_details')
     @admin_required
     def user_details():
-        accused_list = Accused.query.all()
-        return render_template('user_details.html', accused=accused_list)
+        return stream_page('user_details.html', accused=accused_rows(*CARD_COLUMNS).yield_per(STREAM_BATCH_ROWS))
 
     @app.route('/add_user')
     @admin_required
@@ -154,8 +164,8 @@ def register_public_routes(app):
         fir_no = request.form.get('fir_no')
         case_type = request.form.get('case_type')
         ps = request.form.get('ps')
-        case_no = request.form.get('case_no')
-        if not is_valid_case_no(case_no):
+        case_no = (request.form.get('case_no') or '').strip()
+        if case_no and not is_valid_case_no(case_no):
             flash('Please enter a valid case number format.', 'error')
             return redirect(url_for('add_user'))
         sections = request.form.get('sections')
@@ -227,17 +237,39 @@ def register_public_routes(app):
             previous_criminal_record=previous_criminal_record,
         )
 
+        officer = session.get('admin_username')
+        if case_no:
+            taken = case_number_taken(case_no, reserved_by=officer)
+            if taken:
+                status, _ = taken
+                if status == 'reserved':
+                    flash(f'Error: Case number "{case_no}" is reserved by another officer.', 'error')
+                else:
+                    flash(f'Error: Case number "{case_no}" already exists. Please use a different case number.', 'error')
+                return redirect(url_for('add_user'))
+
         try:
+            if not case_no:
+                case_no, _ = allocate_case_number(ps)
+                new_accused.case_no = case_no
+            release_reservation(case_no, reserved_by=officer)
             db.session.add(new_accused)
             db.session.commit()
-            flash('Accused added successfully!', 'success')
+            record_activity('added', 'accused', f'New accused added ({case_no})', case_no)
+            publish_event('case.new', {'case_no': case_no, 'case_type': case_type, 'username': username}, ('judge',))
+            flash(f'Accused added successfully with case number {case_no}!', 'success')
             return redirect(url_for('user_details'))
-        except Exception as e:
+        except IntegrityError as e:
             db.session.rollback()
-            if 'Duplicate entry' in str(e) and 'case_no' in str(e):
+            # Other constraints can fail too; only blame the case number when it is taken.
+            if db.session.query(Accused.id).filter_by(case_no=case_no).first():
                 flash(f'Error: Case number "{case_no}" already exists. Please use a different case number.', 'error')
             else:
-                flash(f'Error adding accused: {str(e)}', 'error')
+                flash(f'Error adding accused: {str(e.orig)}', 'error')
+            return redirect(url_for('add_user'))
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error adding accused: {str(e)}', 'error')
             return redirect(url_for('add_user'))
 
     @app.route('/it_team_details')
@@ -289,6 +321,7 @@ def register_public_routes(app):
         return redirect(url_for('it_team_details'))
 
     @app.route('/submit_complain', methods=['GET', 'POST'])
+    @read_only
     def submit_complain():
         accused = None
         searched = False
@@ -325,6 +358,7 @@ def register_public_routes(app):
         return render_template('add_user_complain.html', accused=accused, searched=searched, csrf_token=generate_csrf())
 
     @app.route('/submit_search', methods=['GET', 'POST'])
+    @read_only
     def submit_search():
         accused = None
         searched = False
@@ -362,7 +396,7 @@ def register_public_routes(app):
 
     @app.route('/user_complain')
     def user_complain():
-        return render_template('user_complain.html', accused=Accused.query.all())
+        return render_template('user_complain.html', accused=accused_rows().all())
 
     @app.route('/add_user_complain')
     def add_user_complain():
@@ -374,11 +408,14 @@ def register_public_routes(app):
 
     @app.route('/add_complaint_description')
     def add_complaint_description():
-        super_admin_replies = SuperAdminMessage.query.order_by(SuperAdminMessage.created_at.desc()).all()
+        # Only the replies of the case the visitor asks about.
+        case_no = request.args.get('case_no', '').strip()
+        super_admin_replies = case_messages(case_no) if is_valid_case_no(case_no) else []
         return render_template(
             'add_complaint_description.html',
             csrf_token=generate_csrf(),
             super_admin_replies=super_admin_replies,
+            replies_case_no=case_no,
         )
 
     @app.route('/complaints', methods=['GET', 'POST'])
@@ -400,18 +437,23 @@ def register_public_routes(app):
             )
             db.session.add(complaint)
             db.session.commit()
+            record_activity('filed', 'complaint', f'{complain_type} complaint filed for case {case_no}', case_no)
+            publish_event(
+                'complaint.new',
+                {'id': complaint.id, 'case_no': case_no, 'complain_type': complain_type},
+                ('admin', 'super_admin'),
+            )
             return redirect('/add_complaint_description')
 
-        complaint_rows = ComplaintDescription.query.all()
         complaint_types = ['Crime', 'Women', 'Child', 'Senior Citizen', 'Traffic', 'Theft', 'Civil', 'Mental Harassment']
         return render_template(
             'add_complaint_description.html',
-            complaint_descriptions=complaint_rows,
             complaint_types=complaint_types,
             csrf_token=generate_csrf(),
         )
 
     @app.route('/get_punishment_details', methods=['POST'])
+    @read_only
     @csrf.exempt
     def get_punishment_details():
         section_id = request.form.get('section_id', '')
@@ -495,10 +537,12 @@ def register_public_routes(app):
 
         db.session.add(new_section)
         db.session.commit()
+        record_activity('added', 'section', f'Section {article_section} added ({category})', str(new_section.id))
 
         return redirect(url_for('manage_sections'))
 
     @app.route('/populate_sample_data')
+    @primary_only
     @admin_or_super_admin_required
     def populate_sample_data():
         sample_data = [
@@ -534,9 +578,11 @@ def register_public_routes(app):
             },
         ]
 
+        added = 0
         for data in sample_data:
             existing = SectionPunishment.query.filter_by(article_section=data['article_section']).first()
             if not existing:
+                added += 1
                 db.session.add(
                     SectionPunishment(
                         category=data['category'],
@@ -547,27 +593,37 @@ def register_public_routes(app):
                 )
 
         db.session.commit()
+        if added:
+            record_activity('added', 'section', f'{added} sample sections populated')
         return redirect(url_for('manage_sections'))
 
     @app.route('/fetch_report', methods=['GET', 'POST'])
+    @read_only
     @admin_or_super_admin_required
     def fetch_report():
         results = None
-        if request.method == 'POST':
-            from_date_str = request.form.get('from_date')
-            to_date_str = request.form.get('to_date')
+        # GET parameters come from the rollup report's drilldown links.
+        from_date_str = request.values.get('from_date')
+        to_date_str = request.values.get('to_date')
+        dimension = request.values.get('dimension')
+        value = request.values.get('value')
 
-            if from_date_str and to_date_str:
+        if from_date_str and to_date_str:
+            try:
                 from_date = datetime.strptime(from_date_str, '%Y-%m-%d').date()
                 to_date = datetime.strptime(to_date_str, '%Y-%m-%d').date()
-
-                results = db.session.query(Accused, ComplaintDescription).join(
-                    ComplaintDescription, Accused.case_no == ComplaintDescription.case_no
-                ).filter(
-                    Accused.date_of_arrest >= from_date,
-                    Accused.date_of_arrest <= to_date,
-                ).all()
-        return render_template('fetch_report.html', results=results, csrf_token=generate_csrf())
+            except ValueError:
+                flash('Invalid date range.', 'error')
+            else:
+                results = drilldown_query(from_date, to_date, dimension, value).yield_per(STREAM_BATCH_ROWS)
+        return stream_page(
+            'fetch_report.html',
+            results=results,
+            from_date=from_date_str,
+            to_date=to_date_str,
+            dimension=dimension if dimension in ROLLUP_DIMENSIONS else None,
+            value=value,
+        )
 
     @app.route('/user_change_password')
     @admin_or_super_admin_required
@@ -618,18 +674,18 @@ def register_public_routes(app):
 
     @app.route('/about-us')
     def about_us():
-        return render_template('about_us.html')
+        return cached_page('about_us.html')
 
     @app.route('/auth-center')
     def auth_center():
-        return render_template('auth_center.html')
+        return cached_page('auth_center.html')
 
     @app.route('/contact-us', methods=['GET', 'POST'])
     def contact_us():
         if request.method == 'POST':
             flash('Thank you for your message! We will get back to you within 24 hours.', 'success')
             return redirect(url_for('contact_us'))
-        return render_template('contact_us.html', csrf_token=generate_csrf())
+        return cached_page('contact_us.html', csrf=True)
 
     @app.route('/admin-login', methods=['GET', 'POST'])
     def admin_login():
@@ -667,29 +723,59 @@ def register_public_routes(app):
         return redirect(url_for('admin_login'))
 
     @app.route('/check_case_number', methods=['POST'])
+    @read_only
     def check_case_number():
         case_no = request.form.get('case_no', '').strip()
         if not is_valid_case_no(case_no):
             return jsonify({'exists': False, 'message': 'Case number is required'})
 
-        existing_accused = Accused.query.filter_by(case_no=case_no).first()
-        if existing_accused:
-            return jsonify(
-                {
-                    'exists': True,
-                    'message': f'Case number "{case_no}" already exists for accused: {existing_accused.username}',
-                }
+        taken = case_number_taken(case_no, reserved_by=session.get('admin_username'))
+        if taken is None:
+            return jsonify({'exists': False, 'message': 'Case number is available'})
+        status, accused = taken
+        if status == 'reserved':
+            return jsonify({'exists': True, 'message': f'Case number "{case_no}" is reserved by another officer'})
+        return jsonify(
+            {
+                'exists': True,
+                'message': f'Case number "{case_no}" already exists for accused: {accused.username}',
+            }
+        )
+
+    @app.route('/allocate_case_number', methods=['POST'])
+    @admin_required
+    def allocate_case_number_route():
+        ps = request.form.get('ps', '').strip()
+        if not ps:
+            return jsonify({'success': False, 'message': 'Police station is required'}), 400
+
+        try:
+            case_no, expires_at = allocate_case_number(
+                ps,
+                reserve_seconds=app.config['CASE_NUMBER_RESERVATION_SECONDS'],
+                reserved_by=session.get('admin_username'),
             )
-        return jsonify({'exists': False, 'message': 'Case number is available'})
+        except Exception:
+            db.session.rollback()
+            return jsonify({'success': False, 'message': 'Could not allocate a case number'}), 500
+
+        return jsonify(
+            {
+                'success': True,
+                'case_no': case_no,
+                'expires_at': expires_at.isoformat() if expires_at else None,
+            }
+        )
 
     @app.route('/get_case_numbers', methods=['POST'])
+    @read_only
     def get_case_numbers():
         case_type = request.form.get('case_type', '').strip()
         if not case_type:
             return jsonify({'success': False, 'message': 'Case type is required'})
 
-        accused_with_case_type = Accused.query.filter_by(case_type=case_type).all()
-        case_numbers = [accused.case_no for accused in accused_with_case_type if accused.case_no]
+        rows = db.session.query(Accused.case_no).filter(Accused.case_type == case_type, Accused.case_no.isnot(None))
+        case_numbers = [case_no for (case_no,) in rows]
 
         return jsonify(
             {
@@ -699,6 +785,20 @@ def register_public_routes(app):
             }
         )
 
+    @app.route('/case_types/facets')
+    def case_type_facets_route():
+        return jsonify({'success': True, 'facets': case_type_facets()})
+
+    @app.route('/case_numbers/autocomplete')
+    def case_number_autocomplete():
+        prefix = request.args.get('q', '').strip()
+        case_type = request.args.get('case_type', '').strip() or None
+        limit = request.args.get('limit', 20, type=int)
+        if not is_valid_case_no(prefix):
+            return jsonify({'success': True, 'case_numbers': []})
+
+        return jsonify({'success': True, 'case_numbers': autocomplete_case_numbers(prefix, case_type, limit)})
+
     @app.route('/contact_super_admin', methods=['POST'])
     def contact_super_admin():
         case_type = request.form.get('case_type', '').strip()
@@ -727,12 +827,22 @@ def register_public_routes(app):
         try:
             db.session.add(super_admin_message)
             db.session.commit()
+            publish_event(
+                'message.new',
+                {
+                    'id': super_admin_message.id,
+                    'case_no': case_no,
+                    'case_type': case_type,
+                    'created_at': super_admin_message.created_at,
+                },
+                ('super_admin',),
+            )
             flash('Message sent to Super Admin successfully!', 'success')
         except Exception:
             db.session.rollback()
             flash('Error sending message. Please try again.', 'error')
 
-        return redirect('/add_complaint_description')
+        return redirect(url_for('add_complaint_description', case_no=case_no))
 
     @app.route('/admin-dashboard')
     @admin_required
@@ -742,31 +852,21 @@ def register_public_routes(app):
         total_sections = SectionPunishment.query.count()
         total_admins = Admin.query.count()
 
-        recent_activities = [
-            {'date': '2024-01-15', 'description': 'New accused added', 'user': 'Admin', 'status': 'Completed'},
-            {'date': '2024-01-15', 'description': 'Complaint updated', 'user': 'Admin', 'status': 'Completed'},
-            {'date': '2024-01-14', 'description': 'Section added', 'user': 'Admin', 'status': 'Completed'},
-        ]
-        notifications = [
-            {'title': 'System Update', 'message': 'System will be updated tonight at 2 AM', 'time': '2 hours ago'},
-            {'title': 'New Complaint', 'message': 'A new complaint has been filed', 'time': '4 hours ago'},
-        ]
-
         return render_template(
             'admin_dashboard.html',
             total_accused=total_accused,
             total_complaints=total_complaints,
             total_sections=total_sections,
             total_admins=total_admins,
-            recent_activities=recent_activities,
-            notifications=notifications,
+            recent_activities=recent_activities(),
+            notifications=recent_notifications(),
         )
 
     @app.route('/admin/criminal-records')
     @admin_required
     def admin_criminal_records():
-        return render_template('user_complain.html', accused=Accused.query.all())
+        return render_template('user_complain.html', accused=accused_rows().all())
 
     @app.route('/criminal_records')
     def criminal_records():
-        return render_template('criminal_record.html', accused=Accused.query.all())
+        return stream_page('criminal_record.html', accused=accused_rows().yield_per(STREAM_BATCH_ROWS))
@@ -0,0 +1,124 @@
+from datetime import date, datetime
+
+from flask import abort, jsonify, render_template, request
+
+from crime_stats import CATEGORY_FIELDS, age_distribution, breakdown, chartjs_data, uplot_data
+from decisions import DECISION_STATUSES
+from decorators import admin_or_super_admin_required, super_admin_required
+from identity import cases_for_person
+from lifecycle import DIMENSIONS as LIFECYCLE_DIMENSIONS, QUANTILES, STAGES, latency_summary
+from rollups import DIMENSIONS, PERIODS, rollup_report
+from sentencing import MAX_OUTLIERS, sentencing_report
+
+
+
+def register_report_routes(app):
+    @app.route('/reports/rollups')
+    @admin_or_super_admin_required
+    def rollup_report_route():
+        dimension = request.args.get('dimension', 'ps')
+        period = request.args.get('period', 'week')
+        if dimension not in DIMENSIONS or period not in PERIODS:
+            abort(400)
+
+        try:
+            if request.args.get('from_date') and request.args.get('to_date'):
+                from_date = datetime.strptime(request.args['from_date'], '%Y-%m-%d').date()
+                to_date = datetime.strptime(request.args['to_date'], '%Y-%m-%d').date()
+            else:
+                year = request.args.get('year', date.today().year, type=int)
+                from_date, to_date = date(year, 1, 1), date(year, 12, 31)
+        except ValueError:
+            abort(400)
+        if from_date > to_date:
+            abort(400)
+
+        report = rollup_report(dimension, from_date, to_date, period)
+        if request.args.get('format') == 'json':
+            return jsonify(
+                {
+                    'dimension': dimension,
+                    'period': period,
+                    'from_date': from_date.isoformat(),
+                    'to_date': to_date.isoformat(),
+                    'periods': [item['start'].isoformat() for item in report['periods']],
+                    'rows': report['rows'],
+                }
+            )
+        return render_template('rollup_report.html', report=report, dimensions=DIMENSIONS, periods=PERIODS)
+
+    @app.route('/analytics/age-at-arrest')
+    @admin_or_super_admin_required
+    def age_at_arrest_analytics():
+        stats = age_distribution()
+        series = [(group['case_type'], group['histogram']) for group in stats['groups']]
+        if request.args.get('format') == 'uplot':
+            return jsonify(uplot_data(stats['bin_edges'][:-1], series))
+        return jsonify(dict(stats, chart=chartjs_data(stats['labels'], series)))
+
+    @app.route('/analytics/breakdown/<field>')
+    @admin_or_super_admin_required
+    def accused_breakdown_analytics(field):
+        if field not in CATEGORY_FIELDS:
+            abort(404)
+        stats = breakdown(field)
+        series = [(group['case_type'], group['counts']) for group in stats['groups']]
+        if request.args.get('format') == 'uplot':
+            return jsonify(uplot_data(list(range(len(stats['categories']))), series))
+        return jsonify(dict(stats, chart=chartjs_data(stats['categories'], series)))
+
+    @app.route('/analytics/sentencing')
+    @admin_or_super_admin_required
+    def sentencing_analytics():
+        status = request.args.get('status') or None
+        if status is not None and status not in DECISION_STATUSES:
+            abort(400)
+        limit = min(max(request.args.get('limit', 100, type=int), 0), MAX_OUTLIERS)
+        report = sentencing_report(status, limit)
+        return jsonify(dict(report, status=status, units={'fine': 'paise', 'imprisonment': 'days'}))
+
+    @app.route('/lifecycle/metrics')
+    @admin_or_super_admin_required
+    def lifecycle_metrics():
+        dimension = request.args.get('dimension', 'all')
+        if dimension not in LIFECYCLE_DIMENSIONS:
+            abort(400)
+        return jsonify({'dimension': dimension, 'unit': 'hours', 'stages': latency_summary(dimension)})
+
+    @app.route('/super-admin/lifecycle')
+    @super_admin_required
+    def super_admin_lifecycle():
+        dimension = request.args.get('dimension', 'all')
+        if dimension not in LIFECYCLE_DIMENSIONS:
+            abort(400)
+        return render_template(
+            'lifecycle_metrics.html',
+            summary=latency_summary(dimension),
+            dimension=dimension,
+            dimensions=LIFECYCLE_DIMENSIONS,
+            stages=STAGES,
+            quantiles=[name for name, _ in QUANTILES],
+        )
+
+    @app.route('/persons/<int:person_id>/cases')
+    @admin_or_super_admin_required
+    def person_cases(person_id):
+        cases = cases_for_person(person_id)
+        if not cases:
+            abort(404)
+        return jsonify(
+            {
+                'person_id': person_id,
+                'cases': [
+                    {
+                        'id': case.id,
+                        'case_no': case.case_no,
+                        'case_type': case.case_type,
+                        'ps': case.ps,
+                        'date_of_arrest': case.date_of_arrest.isoformat() if case.date_of_arrest else None,
+                        'name': case.username,
+                    }
+                    for case in cases
+                ],
+            }
+        )
@@ -2,14 +2,24 @@ import hmac
 import os
 from datetime import datetime
 
-from flask import flash, jsonify, redirect, render_template, request, session, url_for
+from flask import abort, flash, jsonify, redirect, render_template, request, session, url_for
 from flask_wtf.csrf import generate_csrf
 from sqlalchemy import func
+from sqlalchemy.orm import undefer
 
+from accused_forms import apply_accused_form
+from accused_listing import CARD_COLUMNS, accused_rows
+from activity_log import record_activity
+from db_replica import primary_only
 from decorators import super_admin_required
+from events import publish_event
 from extensions import csrf, db
+from identity import linked_cases
+from inbox import MESSAGE_STATUSES, inbox_counts, inbox_page, mark_read, pending_count, retract_case_messages
+from meetings import swap_meeting_link
 from models import (
     Accused,
+    AccusedChangeLog,
     Admin,
     ComplaintDescription,
     JudgeDecision,
@@ -18,6 +28,7 @@ from models import (
     SuperAdminMessage,
     User,
 )
+from rollups import retract_case_children
 from security import (
     check_login_block,
     clear_login_failures,
@@ -90,7 +101,7 @@ def register_super_admin_routes(app):
 
         total_admin_teams = Admin.query.count()
         total_users = User.query.count()
-        total_messages = SuperAdminMessage.query.filter_by(status='Pending').count()
+        total_messages = pending_count()
 
         return render_template(
             'super_admin_dashboard.html',
@@ -123,32 +134,47 @@ def register_super_admin_routes(app):
         if not is_valid_meeting_link(link):
             return jsonify({'success': False, 'message': 'Invalid meeting link'}), 400
 
-        existing = MeetingLink.query.filter_by(case_no=case_no, status='Ongoing').all()
-        for meeting in existing:
-            meeting.status = 'Ended'
-            meeting.ended_at = datetime.now()
-
-        new_meeting = MeetingLink(case_no=case_no, link=link, status='Ongoing')
         try:
-            db.session.add(new_meeting)
-            db.session.commit()
+            new_meeting = swap_meeting_link(case_no, link)
+            record_activity('started', 'meeting', f'Meeting link set for case {case_no}', case_no)
+            publish_event(
+                'meeting.updated',
+                {'id': new_meeting.id, 'case_no': case_no, 'link': link, 'status': 'Ongoing'},
+                ('judge', 'super_admin'),
+            )
             return jsonify({'success': True})
         except Exception:
             db.session.rollback()
             return jsonify({'success': False, 'message': 'Failed to save meeting link'}), 500
 
     @app.route('/super-admin/messages')
+    @primary_only
     @super_admin_required
     def super_admin_messages():
-        messages = SuperAdminMessage.query.order_by(SuperAdminMessage.created_at.desc()).all()
-        decisions = JudgeDecision.query.all()
-        decisions_by_case = {decision.case_no: decision for decision in decisions}
-        return render_template(
+        status = request.args.get('status') or None
+        if status is not None and status not in MESSAGE_STATUSES:
+            abort(400)
+        messages, decisions_by_case, next_cursor = inbox_page(
+            status, request.args.get('cursor'), app.config['INBOX_PAGE_SIZE']
+        )
+        page = render_template(
             'super_admin_messages.html',
             messages=messages,
             decisions_by_case=decisions_by_case,
+            counts=inbox_counts(),
+            status=status,
+            statuses=MESSAGE_STATUSES,
+            next_cursor=next_cursor,
             csrf_token=generate_csrf(),
         )
+        # Render first: the commit expires the page's messages, and they still
+        # show as new on the visit that reads them.
+        try:
+            mark_read([message.id for message in messages if message.read_at is None])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+        return page
 
     @app.route('/super-admin/messages/<int:message_id>/reply', methods=['POST'])
     @super_admin_required
@@ -166,6 +192,8 @@ def register_super_admin_routes(app):
         message.reply = reply_text
         message.status = 'Replied'
         message.replied_at = datetime.now()
+        if message.read_at is None:
+            message.read_at = message.replied_at
         try:
             db.session.commit()
             flash('Reply sent successfully.', 'success')
@@ -178,7 +206,7 @@ def register_super_admin_routes(app):
     @app.route('/super_accused')
     @super_admin_required
     def super_accused():
-        accused_list = Accused.query.all()
+        accused_list = accused_rows(*CARD_COLUMNS).all()
         return render_template('super_accused.html', accused=accused_list, csrf_token=generate_csrf())
 
     @app.route('/super_accused/delete/<int:accused_id>', methods=['POST'])
@@ -187,6 +215,8 @@ def register_super_admin_routes(app):
         try:
             accused = Accused.query.get_or_404(accused_id)
             case_no = accused.case_no
+            retract_case_children(case_no)
+            retract_case_messages(case_no)
 
             try:
                 db.session.query(JudgeDecision).filter_by(case_no=case_no).delete(synchronize_session=False)
@@ -204,9 +234,14 @@ def register_super_admin_routes(app):
                 db.session.query(SuperAdminMessage).filter_by(case_no=case_no).delete(synchronize_session=False)
             except Exception:
                 pass
+            try:
+                db.session.query(AccusedChangeLog).filter_by(accused_id=accused.id).delete(synchronize_session=False)
+            except Exception:
+                pass
 
             db.session.delete(accused)
             db.session.commit()
+            record_activity('deleted', 'accused', f'Accused {case_no} deleted', case_no)
             return jsonify({'status': 'success', 'message': 'Accused deleted successfully'})
         except Exception as e:
             db.session.rollback()
@@ -215,88 +250,28 @@ def register_super_admin_routes(app):
     @app.route('/super_accused/edit/<int:accused_id>', methods=['GET', 'POST'])
     @super_admin_required
     def super_accused_edit(accused_id):
-        accused = Accused.query.get_or_404(accused_id)
+        accused = Accused.query.options(undefer('*')).get_or_404(accused_id)
         if request.method == 'POST':
             try:
-                accused.username = request.form.get('username', accused.username)
-                accused.relative_name = request.form.get('relative_name', accused.relative_name)
-                accused.relation = request.form.get('relation', accused.relation)
-
-                dob_str = request.form.get('dob', '')
-                if dob_str:
-                    for fmt in ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y'):
-                        try:
-                            accused.dob = datetime.strptime(dob_str, fmt).date()
-                            break
-                        except ValueError:
-                            continue
-
-                accused.gender = request.form.get('gender', accused.gender)
-                accused.nationality = request.form.get('nationality', accused.nationality)
-                accused.occupation = request.form.get('occupation', accused.occupation)
-                accused.education = request.form.get('education', accused.education)
-
-                accused.height = request.form.get('height', accused.height)
-                accused.weight = request.form.get('weight', accused.weight)
-                accused.waist_size = request.form.get('waist_size', accused.waist_size)
-                accused.foot_size = request.form.get('foot_size', accused.foot_size)
-                accused.special_mark_cut = request.form.get('special_mark_cut', accused.special_mark_cut)
-                accused.skin_color = request.form.get('skin_color', accused.skin_color)
-                accused.tattoo = request.form.get('tattoo', accused.tattoo)
-                accused.accessories_wearing = request.form.get('accessories_wearing', accused.accessories_wearing)
-                accused.blood_group = request.form.get('blood_group', accused.blood_group)
-                accused.special_key_point = request.form.get('special_key_point', accused.special_key_point)
-                accused.disability = request.form.get('disability', accused.disability)
-
-                accused.permanent_address = request.form.get('permanent_address', accused.permanent_address)
-                accused.temporary_address = request.form.get('temporary_address', accused.temporary_address)
-                accused.pincode = request.form.get('pincode', accused.pincode)
-                accused.mobile = request.form.get('mobile', accused.mobile)
-                accused.email_id = request.form.get('email_id', accused.email_id)
-                accused.aadhaar_no = request.form.get('aadhaar_no', accused.aadhaar_no)
-
-                accused.fir_no = request.form.get('fir_no', accused.fir_no)
-                accused.case_type = request.form.get('case_type', accused.case_type)
-                accused.ps = request.form.get('ps', accused.ps)
-                accused.case_no = request.form.get('case_no', accused.case_no)
-                accused.sections = request.form.get('sections', accused.sections)
-
-                doa_str = request.form.get('date_of_arrest', '')
-                if doa_str:
-                    for fmt in ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y'):
-                        try:
-                            accused.date_of_arrest = datetime.strptime(doa_str, fmt).date()
-                            break
-                        except ValueError:
-                            continue
-
-                accused.place_of_arrest = request.form.get('place_of_arrest', accused.place_of_arrest)
-                accused.warrant_arrest = request.form.get('warrant_arrest', accused.warrant_arrest)
-                accused.confession_statement = request.form.get('confession_statement', accused.confession_statement)
-
-                cdt_str = request.form.get('court_forward_date_time', '')
-                if cdt_str:
-                    for fmt in ('%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M', '%d-%m-%Y %H:%M'):
-                        try:
-                            accused.court_forward_date_time = datetime.strptime(cdt_str, fmt)
-                            break
-                        except ValueError:
-                            continue
-
-                accused.remand_custody = request.form.get('remand_custody', accused.remand_custody)
-                accused.bail_status = request.form.get('bail_status', accused.bail_status)
-                accused.previous_criminal_record = request.form.get(
-                    'previous_criminal_record', accused.previous_criminal_record
-                )
+                changes = apply_accused_form(accused, request.form, changed_by=session.get('super_admin_username'))
+                if not changes:
+                    flash('No changes to save.', 'success')
+                    return redirect(url_for('super_accused'))
 
                 db.session.commit()
+                record_activity('edited', 'accused', f"Accused {accused.case_no} updated: {', '.join(changes)}", accused.case_no)
                 flash('Accused details updated successfully', 'success')
                 return redirect(url_for('super_accused'))
             except Exception as e:
                 db.session.rollback()
                 flash(f'Failed to update accused: {str(e)}', 'error')
 
-        return render_template('super_edit_user.html', accused=accused, csrf_token=generate_csrf())
+        return render_template(
+            'super_edit_user.html',
+            accused=accused,
+            linked_cases=linked_cases(accused),
+            csrf_token=generate_csrf(),
+        )
 
     @app.route('/super_sections')
     @super_admin_required
@@ -1,13 +1,62 @@
+import hmac
 from datetime import datetime
 
-from flask import jsonify, render_template, send_from_directory
+from flask import Response, jsonify, render_template, request, send_from_directory, session
 
+from db_init import SCHEMA_VERSION, missing_unique_indexes, schema_version
+from db_pool import pool_stats
+from db_replica import primary_only, replica_status
+from decorators import super_admin_required
+from extensions import db
+from metrics import render_metrics
+from page_cache import cached_page
 
 
 def register_utility_routes(app):
     @app.route('/health')
+    @primary_only
     def health():
-        return jsonify({'success': True, 'status': 'ok', 'timestamp': datetime.utcnow().isoformat() + 'Z'})
+        # Readiness: the database answers, has been migrated to this code's schema and
+        # has the unique indexes the writes rely on. A lagging replica is reported but does not fail readiness; reads fall back to the primary.
+        checks = {
+            'database': 'ok',
+            'schema_version': None,
+            'expected_schema_version': SCHEMA_VERSION,
+            'missing_indexes': missing_unique_indexes(),
+            'replica': replica_status(),
+        }
+        try:
+            checks['schema_version'] = schema_version()
+        except Exception:
+            db.session.rollback()
+            checks['database'] = 'unavailable'
+        ready = (
+            checks['database'] == 'ok'
+            and (checks['schema_version'] or 0) >= SCHEMA_VERSION
+            and not checks['missing_indexes']
+        )
+        payload = {
+            'success': ready,
+            'status': 'ok' if ready else 'unavailable',
+            'checks': checks,
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+        }
+        return jsonify(payload), 200 if ready else 503
+
+    @app.route('/metrics')
+    def metrics():
+        token = app.config['METRICS_TOKEN']
+        authorized = session.get('super_admin_logged_in') or (
+            token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+        )
+        if not authorized:
+            return Response('Forbidden\n', status=403, mimetype='text/plain')
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+    @app.route('/health/pool')
+    @super_admin_required
+    def health_pool():
+        return jsonify({'success': True, 'pool': pool_stats(db.engine)})
 
     @app.route('/uploads/<filename>')
     def uploaded_file(filename):
@@ -27,4 +76,4 @@ def register_utility_routes(app):
 
     @app.route('/pwa-test')
     def pwa_test():
-        return render_template('pwa_test.html')
+        return cached_page('pwa_test.html')
@@ -0,0 +1,479 @@
+import re
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import and_, case, event, func, or_, select
+from sqlalchemy.orm.attributes import get_history
+
+from extensions import db
+from models import Accused, CaseSection, JudgeDecision, SectionCode, SectionPunishment
+
+PAISE_PER_RUPEE = 100
+DAYS_PER_UNIT = {'DAY': 1, 'WEEK': 7, 'MONTH': 30, 'YEAR': 365}
+# Imprisonment for life is stored as this many days, so it compares above any term.
+LIFE_IMPRISONMENT_DAYS = 100 * 365
+MULTIPLIERS = {'THOUSAND': 1000, 'LAKH': 100000, 'LAC': 100000, 'CRORE': 10000000}
+NUMBER_WORDS = {
+    'ONE': 1, 'TWO': 2, 'THREE': 3, 'FOUR': 4, 'FIVE': 5, 'SIX': 6, 'SEVEN': 7,
+    'EIGHT': 8, 'NINE': 9, 'TEN': 10, 'ELEVEN': 11, 'TWELVE': 12, 'FOURTEEN': 14, 'TWENTY': 20,
+}
+NONE_VALUES = ('NONE', 'NIL', 'NO', 'NA', 'N/A', '0', '-')
+# Sentence lengths in the per-section distribution: (label, upper bound in days).
+IMPRISONMENT_BUCKETS = (
+    ('none', 0),
+    ('up to 3 months', 90),
+    ('up to 1 year', 365),
+    ('up to 3 years', 3 * 365),
+    ('up to 7 years', 7 * 365),
+    ('up to 10 years', 10 * 365),
+    ('over 10 years', None),
+)
+MAX_OUTLIERS = 1000
+
+_NUMBER = r'(\d+(?:\.\d+)?|' + '|'.join(NUMBER_WORDS) + r')'
+_DURATION = re.compile(rf'\b{_NUMBER}(?:\s*(?:-|TO)\s*{_NUMBER})?\s*(DAY|WEEK|MONTH|YEAR)S?\b')
+_AMOUNT = re.compile(r'(RS\.?|INR|₹)?\s*(\d[\d,]*(?:\.\d+)?)\s*(THOUSAND|LAKH|LAC|CRORE)?S?\b')
+_PLAIN_AMOUNT = re.compile(r'\d[\d,]*(?:\.\d+)?')
+_MAX_MARKER = re.compile(r'(UP\s*TO|EXTEND\s+TO|NOT\s+EXCEEDING|MAXIMUM(\s+OF)?)\s*$')
+_MIN_MARKER = re.compile(r'(NOT\s+LESS\s+THAN|MINIMUM(\s+OF)?|AT\s+LEAST)\s*$')
+_SECTION = re.compile(r'\d+[A-Z]*')
+_LIFE = re.compile(r'\bLIFE\b')
+
+
+def _number(token):
+    return NUMBER_WORDS[token] if token in NUMBER_WORDS else float(token)
+
+
+def _rupees_to_paise(text, multiplier=None):
+    return round(float(text.replace(',', '')) * MULTIPLIERS.get(multiplier, 1) * PAISE_PER_RUPEE)
+
+
+def _amounts(text):
+    # (position, paise) for every sum of money; a bare number only counts as
+    # money with a currency sign or a lakh/crore multiplier next to it.
+    found = []
+    for match in _AMOUNT.finditer(text):
+        currency, number, multiplier = match.groups()
+        if currency or multiplier:
+            found.append((match.start(), _rupees_to_paise(number, multiplier)))
+    return found
+
+
+def _durations(text):
+    # (position, shortest, longest) in days; "1-3 months" is a range.
+    found = []
+    for match in _DURATION.finditer(text):
+        low, high, unit = match.groups()
+        days = DAYS_PER_UNIT[unit]
+        found.append((match.start(), round(_number(low) * days), round(_number(high or low) * days)))
+    return found
+
+
+def _marked(text, position, marker):
+    return marker.search(text[max(position - 40, 0):position]) is not None
+
+
+def _normalized(text):
+    return ' '.join((text or '').upper().split())
+
+
+def parse_fine_paise(text):
+    value = _normalized(text)
+    if not value:
+        return None
+    if value in NONE_VALUES:
+        return 0
+    if _PLAIN_AMOUNT.fullmatch(value):
+        # The judge's form sends plain rupee amounts.
+        return _rupees_to_paise(value)
+    amounts = _amounts(value)
+    return amounts[0][1] if amounts else None
+
+
+def parse_imprisonment_days(text):
+    value = _normalized(text)
+    if not value:
+        return None
+    if value in NONE_VALUES:
+        return 0
+    if _LIFE.search(value):
+        return LIFE_IMPRISONMENT_DAYS
+    durations = _durations(value)
+    # A range such as "1-3 months" is read as its longer end.
+    return durations[0][2] if durations else None
+
+
+def parse_punishment_bounds(minimum_fine, possible_punishments):
+    # minimum_fine usually reads "Rs. 1,000 or imprisonment up to 3 years":
+    # an unmarked sum there is the minimum fine. Terms count as maximums
+    # unless marked "not less than"/"minimum".
+    bounds = {'min_fine_paise': None, 'max_fine_paise': None, 'min_imprisonment_days': None, 'max_imprisonment_days': None}
+
+    def keep(name, value, pick):
+        bounds[name] = value if bounds[name] is None else pick(bounds[name], value)
+
+    for source_text, unmarked_is_minimum in ((minimum_fine, True), (possible_punishments, False)):
+        text = _normalized(source_text)
+        for position, paise in _amounts(text):
+            if _marked(text, position, _MAX_MARKER):
+                keep('max_fine_paise', paise, max)
+            elif unmarked_is_minimum or _marked(text, position, _MIN_MARKER):
+                keep('min_fine_paise', paise, max)
+        for position, shortest, longest in _durations(text):
+            if _marked(text, position, _MIN_MARKER):
+                keep('min_imprisonment_days', shortest, max)
+            else:
+                keep('max_imprisonment_days', longest, max)
+        if _LIFE.search(text):
+            bounds['max_imprisonment_days'] = LIFE_IMPRISONMENT_DAYS
+    return bounds
+
+
+def split_sections(text):
+    # "IPC 379, 380/34", "498-A" -> ['379', '380', '34', '498A']
+    value = re.sub(r'(\d)\s*-\s*([A-Z])\b', r'\1\2', _normalized(text))
+    return [code[:20] for code in dict.fromkeys(_SECTION.findall(value))]
+
+
+@event.listens_for(JudgeDecision, 'before_insert')
+@event.listens_for(JudgeDecision, 'before_update')
+def _parse_decision(_mapper, _connection, target):
+    target.fine_paise = parse_fine_paise(target.total_fine)
+    target.imprisonment_days = parse_imprisonment_days(target.imprisonment)
+
+
+@event.listens_for(SectionPunishment, 'before_insert')
+@event.listens_for(SectionPunishment, 'before_update')
+def _parse_section_bounds(_mapper, _connection, target):
+    for name, value in parse_punishment_bounds(target.minimum_fine, target.possible_punishments).items():
+        setattr(target, name, value)
+
+
+def _write_section_codes(connection, punishment_id, article_section, replace=True):
+    if replace:
+        connection.execute(SectionCode.__table__.delete().where(SectionCode.section_punishment_id == punishment_id))
+    codes = split_sections(article_section)
+    if codes:
+        connection.execute(
+            SectionCode.__table__.insert(),
+            [{'section': code, 'section_punishment_id': punishment_id} for code in codes],
+        )
+
+
+@event.listens_for(SectionPunishment, 'after_insert')
+def _index_section_codes(_mapper, connection, target):
+    _write_section_codes(connection, target.id, target.article_section, replace=False)
+
+
+@event.listens_for(SectionPunishment, 'after_update')
+def _move_section_codes(_mapper, connection, target):
+    if get_history(target, 'article_section').has_changes():
+        _write_section_codes(connection, target.id, target.article_section)
+
+
+@event.listens_for(SectionPunishment, 'after_delete')
+def _drop_section_codes(_mapper, connection, target):
+    _write_section_codes(connection, target.id, None)
+
+
+def _write_case_sections(connection, case_no, sections, replace=True):
+    if replace:
+        connection.execute(CaseSection.__table__.delete().where(CaseSection.case_no == case_no))
+    codes = split_sections(sections)
+    if case_no and codes:
+        connection.execute(CaseSection.__table__.insert(), [{'case_no': case_no, 'section': code} for code in codes])
+
+
+@event.listens_for(Accused, 'after_insert')
+def _index_case_sections(_mapper, connection, target):
+    _write_case_sections(connection, target.case_no, target.sections, replace=False)
+
+
+@event.listens_for(Accused, 'after_update')
+def _move_case_sections(_mapper, connection, target):
+    if not any(get_history(target, name).has_changes() for name in ('case_no', 'sections')):
+        return
+    for old_case_no in get_history(target, 'case_no').deleted:
+        _write_case_sections(connection, old_case_no, None)
+    _write_case_sections(connection, target.case_no, target.sections)
+
+
+@event.listens_for(Accused, 'after_delete')
+def _drop_case_sections(_mapper, connection, target):
+    _write_case_sections(connection, target.case_no, None)
+
+
+def _backfill_decisions(reparse):
+    # Decisions repeat a handful of strings, so each distinct string is parsed
+    # once and written with one UPDATE.
+    table = JudgeDecision.__table__
+    updated = 0
+    for text_column, typed_column, parse in (
+        (table.c.total_fine, table.c.fine_paise, parse_fine_paise),
+        (table.c.imprisonment, table.c.imprisonment_days, parse_imprisonment_days),
+    ):
+        query = select(text_column).distinct().where(text_column.isnot(None))
+        if not reparse:
+            query = query.where(typed_column.is_(None))
+        for text in db.session.execute(query).scalars().all():
+            value = parse(text)
+            if value is None and not reparse:
+                continue
+            updated += db.session.execute(
+                table.update().where(text_column == text).values({typed_column.name: value})
+            ).rowcount
+    return updated
+
+
+def _backfill_sections(reparse):
+    table = SectionPunishment.__table__
+    query = select(table.c.id, table.c.minimum_fine, table.c.possible_punishments)
+    if not reparse:
+        query = query.where(
+            table.c.min_fine_paise.is_(None),
+            table.c.max_fine_paise.is_(None),
+            table.c.min_imprisonment_days.is_(None),
+            table.c.max_imprisonment_days.is_(None),
+        )
+    updated = 0
+    for punishment_id, minimum_fine, possible_punishments in db.session.execute(query).all():
+        bounds = parse_punishment_bounds(minimum_fine, possible_punishments)
+        if reparse or any(value is not None for value in bounds.values()):
+            db.session.execute(table.update().where(table.c.id == punishment_id).values(**bounds))
+            updated += 1
+    return updated
+
+
+def _rebuild_section_links():
+    db.session.execute(CaseSection.__table__.delete())
+    db.session.execute(SectionCode.__table__.delete())
+    rows = []
+    for case_no, sections in (
+        db.session.query(Accused.case_no, Accused.sections)
+        .filter(Accused.case_no.isnot(None), Accused.sections.isnot(None))
+        .yield_per(5000)
+    ):
+        rows.extend({'case_no': case_no, 'section': code} for code in split_sections(sections))
+    if rows:
+        db.session.execute(CaseSection.__table__.insert(), rows)
+    codes = [
+        {'section': code, 'section_punishment_id': punishment_id}
+        for punishment_id, article_section in db.session.query(SectionPunishment.id, SectionPunishment.article_section)
+        for code in split_sections(article_section)
+    ]
+    if codes:
+        db.session.execute(SectionCode.__table__.insert(), codes)
+    return len(rows)
+
+
+def backfill_sentencing(reparse=False):
+    # Without reparse only rows that were never parsed are touched, and the
+    # section links are built only while they are empty.
+    result = {'decisions': _backfill_decisions(reparse), 'sections': _backfill_sections(reparse), 'case_sections': None}
+    if reparse or (
+        db.session.query(CaseSection.case_no).first() is None
+        and db.session.query(SectionCode.section).first() is None
+    ):
+        result['case_sections'] = _rebuild_section_links()
+    db.session.commit()
+    return result
+
+
+def ensure_sentencing():
+    # First start after upgrading: parse the existing strings once.
+    backfill_sentencing()
+
+
+@click.command('backfill-sentencing')
+@with_appcontext
+def backfill_sentencing_command():
+    result = backfill_sentencing(reparse=True)
+    click.echo(
+        f"Parsed {result['decisions']} decision values and {result['sections']} sections; "
+        f"linked {result['case_sections']} case sections."
+    )
+
+
+def _bounded_max(column):
+    # NULL (no upper bound) as soon as one of the case's sections has none.
+    return case((func.count(column) == func.count(), func.max(column)))
+
+
+def _imprisonment_bucket(days):
+    whens = [(days.is_(None), 'unknown')]
+    for label, limit in IMPRISONMENT_BUCKETS:
+        if limit is not None:
+            whens.append((days <= limit, label))
+    return case(*whens, else_=IMPRISONMENT_BUCKETS[-1][0])
+
+
+def _number_or_none(value):
+    return None if value is None else round(float(value))
+
+
+def sentencing_report(status=None, outlier_limit=100):
+    fine = JudgeDecision.fine_paise
+    days = JudgeDecision.imprisonment_days
+    decision_filter = [JudgeDecision.status == status] if status else []
+
+    totals = db.session.execute(
+        select(
+            func.count(),
+            func.count(case((fine > 0, 1))),
+            func.coalesce(func.sum(fine), 0),
+            func.avg(case((fine > 0, fine))),
+            func.count(case((days > 0, 1))),
+            func.avg(case((days > 0, days))),
+            func.max(days),
+        ).where(*decision_filter)
+    ).one()
+
+    per_section = db.session.execute(
+        select(
+            CaseSection.section,
+            func.count(),
+            func.count(case((fine > 0, 1))),
+            func.coalesce(func.sum(fine), 0),
+            func.min(case((fine > 0, fine))),
+            func.avg(case((fine > 0, fine))),
+            func.max(fine),
+            func.avg(case((days > 0, days))),
+            func.max(days),
+        )
+        .join(JudgeDecision, JudgeDecision.case_no == CaseSection.case_no)
+        .where(*decision_filter)
+        .group_by(CaseSection.section)
+        .order_by(func.count().desc(), CaseSection.section)
+    ).all()
+
+    bucket = _imprisonment_bucket(days)
+    distribution = {}
+    for section, label, total in db.session.execute(
+        select(CaseSection.section, bucket, func.count())
+        .join(JudgeDecision, JudgeDecision.case_no == CaseSection.case_no)
+        .where(*decision_filter)
+        .group_by(CaseSection.section, bucket)
+    ):
+        distribution.setdefault(section, {})[label] = total
+
+    statutory = {
+        row[0]: {
+            'min_fine_paise': row[1],
+            'max_fine_paise': row[2],
+            'min_imprisonment_days': row[3],
+            'max_imprisonment_days': row[4],
+        }
+        for row in db.session.execute(
+            select(
+                SectionCode.section,
+                func.max(SectionPunishment.min_fine_paise),
+                _bounded_max(SectionPunishment.max_fine_paise),
+                func.max(SectionPunishment.min_imprisonment_days),
+                _bounded_max(SectionPunishment.max_imprisonment_days),
+            )
+            .join(SectionPunishment, SectionPunishment.id == SectionCode.section_punishment_id)
+            .group_by(SectionCode.section)
+        )
+    }
+
+    # A case is held to the strictest minimum and the most lenient maximum of
+    # the sections it is charged under. A fine under the minimum only counts
+    # when a fine was imposed: most sections allow a fine or imprisonment.
+    bounds = (
+        select(
+            CaseSection.case_no.label('case_no'),
+            func.max(SectionPunishment.min_fine_paise).label('min_fine'),
+            _bounded_max(SectionPunishment.max_fine_paise).label('max_fine'),
+            func.max(SectionPunishment.min_imprisonment_days).label('min_days'),
+            _bounded_max(SectionPunishment.max_imprisonment_days).label('max_days'),
+        )
+        .join(SectionCode, SectionCode.section == CaseSection.section)
+        .join(SectionPunishment, SectionPunishment.id == SectionCode.section_punishment_id)
+        .group_by(CaseSection.case_no)
+        .subquery()
+    )
+    outside = or_(
+        and_(fine > 0, fine < bounds.c.min_fine),
+        fine > bounds.c.max_fine,
+        days < bounds.c.min_days,
+        days > bounds.c.max_days,
+    )
+    outlier_query = (
+        select(
+            JudgeDecision.case_no,
+            JudgeDecision.status,
+            JudgeDecision.total_fine,
+            fine,
+            JudgeDecision.imprisonment,
+            days,
+            bounds.c.min_fine,
+            bounds.c.max_fine,
+            bounds.c.min_days,
+            bounds.c.max_days,
+        )
+        .join(bounds, bounds.c.case_no == JudgeDecision.case_no)
+        .where(outside, *decision_filter)
+    )
+    outlier_count = db.session.execute(select(func.count()).select_from(outlier_query.subquery())).scalar()
+    outlier_rows = db.session.execute(
+        outlier_query.order_by(JudgeDecision.decided_at.desc(), JudgeDecision.id.desc()).limit(outlier_limit)
+    ).all()
+
+    outliers = []
+    for row in outlier_rows:
+        reasons = []
+        if row.fine_paise and row.min_fine is not None and row.fine_paise < row.min_fine:
+            reasons.append('fine below minimum')
+        if row.fine_paise is not None and row.max_fine is not None and row.fine_paise > row.max_fine:
+            reasons.append('fine above maximum')
+        if row.imprisonment_days is not None and row.min_days is not None and row.imprisonment_days < row.min_days:
+            reasons.append('imprisonment below minimum')
+        if row.imprisonment_days is not None and row.max_days is not None and row.imprisonment_days > row.max_days:
+            reasons.append('imprisonment above maximum')
+        outliers.append(
+            {
+                'case_no': row.case_no,
+                'status': row.status,
+                'total_fine': row.total_fine,
+                'fine_paise': row.fine_paise,
+                'imprisonment': row.imprisonment,
+                'imprisonment_days': row.imprisonment_days,
+                'bounds': {
+                    'min_fine_paise': row.min_fine,
+                    'max_fine_paise': row.max_fine,
+                    'min_imprisonment_days': row.min_days,
+                    'max_imprisonment_days': row.max_days,
+                },
+                'reasons': reasons,
+            }
+        )
+
+    return {
+        'totals': {
+            'decisions': totals[0],
+            'fined': totals[1],
+            'total_fine_paise': int(totals[2]),
+            'average_fine_paise': _number_or_none(totals[3]),
+            'imprisoned': totals[4],
+            'average_imprisonment_days': _number_or_none(totals[5]),
+            'longest_imprisonment_days': totals[6],
+        },
+        'sections': [
+            {
+                'section': row[0],
+                'decisions': row[1],
+                'fined': row[2],
+                'total_fine_paise': int(row[3]),
+                'lowest_fine_paise': row[4],
+                'average_fine_paise': _number_or_none(row[5]),
+                'highest_fine_paise': row[6],
+                'average_imprisonment_days': _number_or_none(row[7]),
+                'longest_imprisonment_days': row[8],
+                'imprisonment_distribution': distribution.get(row[0], {}),
+                'statutory': statutory.get(row[0]),
+            }
+            for row in per_section
+        ],
+        'outlier_count': outlier_count,
+        'outliers': outliers,
+    }
@@ -0,0 +1,173 @@
+import logging
+import os
+import re
+import time
+import traceback
+from collections import Counter
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.orm import Session, raiseload
+
+from metrics import add_query_observer
+
+_PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+_SETTINGS = {'n_plus_one_threshold': 5, 'slow_query_ms': 100.0, 'log_parameters': False}
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s)\s*,)+\s*(?:\?|%s|%\(\w+\)s)\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+logger = logging.getLogger('criminology.sql')
+slow_query_logger = logging.getLogger('criminology.sql.slow')
+
+
+def statement_shape(statement):
+    # Literals and expanded IN lists collapse, so "the same query with a
+    # different id" counts as one shape.
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _PLACEHOLDER_LIST.sub('(?, ...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+def _caller():
+    # Innermost frame in project code or a template, for pointing at the lazy load.
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename.endswith('.html') or (
+            filename.startswith(_PROJECT_ROOT)
+            and 'site-packages' not in filename
+            and os.path.basename(filename) != 'sql_profiler.py'
+        ):
+            return f'{os.path.relpath(filename, _PROJECT_ROOT)}:{frame.lineno}'
+    return 'unknown'
+
+
+def _profile():
+    if has_request_context():
+        return g.get('sql_profile')
+    return None
+
+
+def _record_query(statement, parameters, elapsed):
+    profile = _profile()
+    if profile is None:
+        return
+    shape = statement_shape(statement)
+    profile['queries'] += 1
+    profile['db_seconds'] += elapsed
+    profile['shapes'][shape] += 1
+    if profile['shapes'][shape] == _SETTINGS['n_plus_one_threshold']:
+        profile['repeated'][shape] = _caller()
+    if elapsed * 1000 >= _SETTINGS['slow_query_ms']:
+        # Bound values hold Aadhaar numbers, phone numbers and statements, so
+        # only the shape is logged unless parameters were explicitly enabled.
+        message = '%.1f ms %s %s at %s: %s'
+        arguments = [elapsed * 1000, request.method, request.path, _caller(), shape]
+        if _SETTINGS['log_parameters']:
+            message += ' params=%r'
+            arguments.append(parameters)
+        slow_query_logger.warning(message, *arguments)
+
+
+def _render_started(_app, template, context, **_extra):
+    profile = _profile()
+    if profile is not None and profile['render_started'] is None:
+        profile['render_started'] = time.perf_counter()
+
+
+def _render_finished(_app, template, context, **_extra):
+    profile = _profile()
+    if profile is not None and profile['render_started'] is not None:
+        profile['render_seconds'] += time.perf_counter() - profile['render_started']
+        profile['render_started'] = None
+
+
+def server_timing(profile, total_seconds):
+    return ', '.join(
+        (
+            f'db;dur={profile["db_seconds"] * 1000:.1f};desc="{profile["queries"]} queries"',
+            f'render;dur={profile["render_seconds"] * 1000:.1f};desc="templates (includes lazy-load SQL)"',
+            f'total;dur={total_seconds * 1000:.1f}',
+        )
+    )
+
+
+def _configure_slow_query_log(path):
+    if not path:
+        return
+    if any(getattr(handler, 'baseFilename', None) == os.path.abspath(path) for handler in slow_query_logger.handlers):
+        return
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    slow_query_logger.addHandler(handler)
+    slow_query_logger.setLevel(logging.WARNING)
+
+
+def _raise_on_lazy_load(orm_execute_state):
+    if orm_execute_state.is_select and not orm_execute_state.is_relationship_load:
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload('*'))
+
+
+def raise_on_lazy_loads(enabled=True):
+    # Any relationship not loaded eagerly by its query raises instead of
+    # quietly issuing one SELECT per row.
+    registered = event.contains(Session, 'do_orm_execute', _raise_on_lazy_load)
+    if enabled and not registered:
+        event.listen(Session, 'do_orm_execute', _raise_on_lazy_load)
+    elif not enabled and registered:
+        event.remove(Session, 'do_orm_execute', _raise_on_lazy_load)
+
+
+def init_sql_profiler(app):
+    if app.config['SQL_RAISE_ON_LAZY_LOAD']:
+        raise_on_lazy_loads()
+    if not app.config['SQL_PROFILER_ENABLED']:
+        return
+    _SETTINGS.update(
+        n_plus_one_threshold=app.config['SQL_PROFILER_N_PLUS_ONE_THRESHOLD'],
+        slow_query_ms=app.config['SLOW_QUERY_MS'],
+        log_parameters=app.config['SLOW_QUERY_LOG_PARAMETERS'],
+    )
+    _configure_slow_query_log(app.config['SLOW_QUERY_LOG'])
+    add_query_observer(_record_query)
+    before_render_template.connect(_render_started, app)
+    template_rendered.connect(_render_finished, app)
+
+    @app.before_request
+    def _start_sql_profile():
+        g.sql_profile = {
+            'started': time.perf_counter(),
+            'queries': 0,
+            'db_seconds': 0.0,
+            'render_seconds': 0.0,
+            'render_started': None,
+            'shapes': Counter(),
+            'repeated': {},
+        }
+
+    @app.after_request
+    def _finish_sql_profile(response):
+        profile = g.pop('sql_profile', None)
+        if profile is None:
+            return response
+        response.headers['Server-Timing'] = server_timing(profile, time.perf_counter() - profile['started'])
+        logger.debug(
+            '%s %s: %d queries, %d shapes, %.1f ms SQL',
+            request.method,
+            request.path,
+            profile['queries'],
+            len(profile['shapes']),
+            profile['db_seconds'] * 1000,
+        )
+        for shape, caller in profile['repeated'].items():
+            logger.warning(
+                'Possible N+1 on %s %s: %d x %s (first repeat from %s)',
+                request.method,
+                request.path,
+                profile['shapes'][shape],
+                shape,
+                caller,
+            )
+        return response
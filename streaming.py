@@ -0,0 +1,39 @@
+from flask import current_app, get_flashed_messages, stream_template
+from flask_wtf.csrf import generate_csrf
+
+# Rows fetched per round trip while a streamed page iterates its query.
+STREAM_BATCH_ROWS = 500
+# Jinja yields a string per template statement; send them in bigger pieces.
+STREAM_CHUNK_BYTES = 16 * 1024
+
+
+def _buffered(chunks, size):
+    pending = []
+    pending_bytes = 0
+    try:
+        for chunk in chunks:
+            pending.append(chunk)
+            pending_bytes += len(chunk)
+            if pending_bytes >= size:
+                yield ''.join(pending)
+                pending = []
+                pending_bytes = 0
+        if pending:
+            yield ''.join(pending)
+    finally:
+        # Closing the inner generator releases the request context (and the
+        # open cursor) at once when the client goes away mid-page.
+        chunks.close()
+
+
+def stream_page(template_name, **context):
+    # The session cookie is sent with the headers, before the template runs,
+    # so anything that changes the session happens here: flashed messages are
+    # popped now (the template's get_flashed_messages() reads them back from
+    # the request) and the CSRF token is created now.
+    get_flashed_messages()
+    context.setdefault('csrf_token', generate_csrf())
+    return current_app.response_class(
+        _buffered(stream_template(template_name, **context), STREAM_CHUNK_BYTES),
+        mimetype='text/html',
+    )
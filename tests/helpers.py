@@ -0,0 +1,47 @@
+import os
+import tempfile
+from datetime import date
+
+from flask import Flask
+
+from extensions import db
+from models import Accused
+
+
+def sqlite_uri(name):
+    return 'sqlite:///' + os.path.join(tempfile.mkdtemp(), name)
+
+
+def make_app(database='test.db', **config):
+    # A bare Flask app for testing one module. With a database name it gets
+    # a fresh SQLite file and the tables of the default bind.
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test')
+    if database:
+        app.config['SQLALCHEMY_DATABASE_URI'] = sqlite_uri(database)
+    app.config.update(config)
+    if database:
+        db.init_app(app)
+        with app.app_context():
+            # test_db_replica adds a replica bind to the shared metadata.
+            db.create_all(bind_key=None)
+    return app
+
+
+def make_accused(**overrides):
+    # An Accused with every required column filled in.
+    values = {
+        'username': 'Person',
+        'relative_name': 'Relative',
+        'relation': 'Son',
+        'dob': date(1990, 1, 1),
+        'gender': 'Male',
+        'nationality': 'Indian',
+        'occupation': 'Farmer',
+        'education': '10th',
+        'permanent_address': 'Address',
+        'mobile': '9999999999',
+        'email_id': 'person@example.com',
+    }
+    values.update(overrides)
+    return Accused(**values)
@@ -0,0 +1,55 @@
+import json
+import unittest
+from datetime import date
+from types import SimpleNamespace
+
+from werkzeug.datastructures import MultiDict
+
+from accused_forms import ACCUSED_TEXT_FIELDS, diff_accused_form, serialize_changes
+
+
+def _accused(**overrides):
+    values = {field: '' for field in ACCUSED_TEXT_FIELDS}
+    values.update(dob=date(1990, 5, 1), date_of_arrest=None, court_forward_date_time=None)
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+class AccusedFormDiffTests(unittest.TestCase):
+    def test_unchanged_form_produces_empty_diff(self):
+        accused = _accused(username='Ravi', bail_status='Denied', confession_statement='x' * 5000)
+        form = MultiDict({'username': 'Ravi', 'bail_status': 'Denied', 'confession_statement': 'x' * 5000, 'dob': '1990-05-01'})
+        self.assertEqual(diff_accused_form(accused, form), {})
+
+    def test_only_changed_fields_are_reported(self):
+        accused = _accused(username='Ravi', bail_status='Denied', confession_statement='long text')
+        form = MultiDict({'username': 'Ravi', 'bail_status': 'Granted', 'confession_statement': 'long text'})
+        self.assertEqual(diff_accused_form(accused, form), {'bail_status': ('Denied', 'Granted')})
+
+    def test_empty_input_for_null_column_is_not_a_change(self):
+        accused = _accused(bail_status=None)
+        self.assertEqual(diff_accused_form(accused, MultiDict({'bail_status': ''})), {})
+
+    def test_missing_fields_and_bad_dates_keep_current_values(self):
+        accused = _accused(disability='None')
+        form = MultiDict({'dob': 'not-a-date', 'date_of_arrest': '02/03/2024'})
+        self.assertEqual(diff_accused_form(accused, form), {'date_of_arrest': (None, date(2024, 3, 2))})
+
+    def test_serialized_changes_are_compact_json(self):
+        payload = serialize_changes({'date_of_arrest': (None, date(2024, 3, 2))})
+        self.assertEqual(payload, '{"date_of_arrest":[null,"2024-03-02"]}')
+        self.assertEqual(json.loads(payload)['date_of_arrest'][1], '2024-03-02')
+
+    def test_long_text_is_logged_as_length_and_digest(self):
+        payload = json.loads(
+            serialize_changes({'confession_statement': (None, 'x' * 5000), 'bail_status': ('Denied', 'Granted')})
+        )
+        old, new = payload['confession_statement']
+        self.assertIsNone(old)
+        self.assertEqual(new['length'], 5000)
+        self.assertEqual(len(new['sha256']), 16)
+        self.assertEqual(payload['bail_status'], ['Denied', 'Granted'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from activity_log import _WRITER, activity_page, flush_activity_log, init_activity_log, record_activity, recent_notifications
+from extensions import db
+from helpers import make_app
+from models import ActivityLog
+
+
+class ActivityLogTests(unittest.TestCase):
+    def setUp(self):
+        self.app = make_app('activity.db', ACTIVITY_FEED_SIZE=10, ACTIVITY_BATCH_SIZE=4, ACTIVITY_FLUSH_SECONDS=0.05)
+        self.context = self.app.app_context()
+        self.context.push()
+        # The writer thread is shared by the process; hand it back afterwards.
+        self.writer = {key: _WRITER[key] for key in ('app', 'batch_size', 'flush_seconds')}
+        init_activity_log(self.app)
+
+    def tearDown(self):
+        flush_activity_log()
+        _WRITER.update(self.writer)
+        db.session.remove()
+        self.context.pop()
+
+    def test_entries_are_written_in_batches(self):
+        for index in range(10):
+            record_activity('filed', 'complaint', f'Complaint {index} filed', f'PS1-2025-{index:05d}')
+        self.assertTrue(flush_activity_log())
+        rows = ActivityLog.query.order_by(ActivityLog.id).all()
+        self.assertEqual([row.description for row in rows], [f'Complaint {index} filed' for index in range(10)])
+        self.assertEqual(rows[0].actor, 'System')
+        self.assertEqual(recent_notifications(1)[0]['message'], 'Complaint 9 filed')
+
+    def test_failed_batch_is_logged_and_the_writer_keeps_going(self):
+        ActivityLog.__table__.drop(db.engine)
+        with self.assertLogs(self.app.logger, 'ERROR') as logs:
+            record_activity('added', 'accused', 'Lost entry')
+            self.assertTrue(flush_activity_log())
+        self.assertIn('Failed to write 1 activity log entries', logs.output[0])
+
+        ActivityLog.__table__.create(db.engine)
+        record_activity('added', 'accused', 'Written entry')
+        self.assertTrue(flush_activity_log())
+        self.assertEqual([row.description for row in ActivityLog.query], ['Written entry'])
+
+    def test_page_boundaries(self):
+        for index in range(7):
+            record_activity('added', 'accused' if index % 2 else 'meeting', f'Entry {index}')
+        flush_activity_log()
+        first = activity_page(1, per_page=3)
+        self.assertEqual((first.total, first.pages), (7, 3))
+        self.assertEqual([row.description for row in first.items], ['Entry 6', 'Entry 5', 'Entry 4'])
+        self.assertEqual([row.description for row in activity_page(3, per_page=3).items], ['Entry 0'])
+        self.assertEqual(activity_page(4, per_page=3).items, [])
+        meetings = activity_page(1, 'meeting', per_page=3)
+        self.assertEqual((meetings.total, meetings.has_next), (4, True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from datetime import date
+
+from api import decode_cursor, encode_cursor
+from extensions import db
+from helpers import make_accused, make_app
+from models import SectionPunishment
+from routes.api_routes import register_api_routes
+
+
+def seeded_app():
+    app = make_app('api.db', API_PAGE_SIZE=2, API_MAX_PAGE_SIZE=3)
+    app.add_url_rule('/admin/login', 'admin_login', lambda: 'login')
+    app.add_url_rule('/judge/login', 'judge_login', lambda: 'login')
+    register_api_routes(app)
+    with app.app_context():
+        for index in range(5):
+            db.session.add(
+                make_accused(
+                    username=f'Person {index}',
+                    dob=date(1990, 1, 1 + index),
+                    case_no=f'PS1-2025-{index:05d}',
+                    case_type='Theft' if index % 2 else 'Fraud',
+                    confession_statement='Statement',
+                )
+            )
+            db.session.add(SectionPunishment(category='Theft', article_section=str(379 + index)))
+        db.session.commit()
+    return app
+
+
+class ApiTests(unittest.TestCase):
+    def setUp(self):
+        self.app = seeded_app()
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as session:
+            session['admin_logged_in'] = True
+
+    def test_cursor_walks_every_row_once(self):
+        seen = []
+        cursor = None
+        while True:
+            page = self.client.get('/api/v1/sections', query_string={'cursor': cursor} if cursor else {}).get_json()
+            seen.extend(item['article_section'] for item in page['items'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, ['379', '380', '381', '382', '383'])
+        self.assertEqual(decode_cursor(encode_cursor(42)), 42)
+
+    def test_sparse_fields_and_filters(self):
+        page = self.client.get('/api/v1/accused?fields=username,dob,confession_statement&case_type=Theft&limit=10').get_json()
+        self.assertEqual(page['fields'], ['id', 'username', 'dob', 'confession_statement'])
+        self.assertEqual(len(page['items']), 2)
+        self.assertEqual(page['items'][0]['dob'], '1990-01-02')
+        self.assertEqual(set(page['items'][0]), set(page['fields']))
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get('/api/v1/accused?fields=password').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/accused?ps=PS1').status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/accused?cursor=***').status_code, 400)
+
+    def test_role_is_checked(self):
+        response = self.client.get('/api/v1/decisions')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.get_json()['success'], False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from accused_forms import apply_accused_form
+from case_numbers import (
+    _FILTER,
+    BloomFilter,
+    build_case_number_filter,
+    case_number_taken,
+    format_case_number,
+    release_reservation,
+    station_code,
+)
+from db_init import _ensure_unique_index, check_unique_indexes
+from extensions import db
+from helpers import make_accused, make_app
+from models import Accused, CaseNumberEdit, CaseNumberReservation
+from security import is_valid_case_no
+
+
+class CaseNumberFormatTests(unittest.TestCase):
+    def test_station_code_is_normalized(self):
+        self.assertEqual(station_code('PS Central (North)'), 'PSCENTRALNORTH')
+        self.assertEqual(station_code(''), 'PS')
+
+    def test_allocated_numbers_pass_validation(self):
+        case_no = format_case_number('Kotwali P.S.', 2025, 42)
+        self.assertEqual(case_no, 'KOTWALIPS-2025-00042')
+        self.assertTrue(is_valid_case_no(case_no))
+
+
+class BloomFilterTests(unittest.TestCase):
+    def test_added_values_are_always_found(self):
+        case_filter = BloomFilter(1000)
+        values = [f'CASE-{i}' for i in range(1000)]
+        for value in values:
+            case_filter.add(value)
+        self.assertTrue(all(value in case_filter for value in values))
+
+    def test_false_positive_rate_stays_near_target(self):
+        case_filter = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            case_filter.add(f'CASE-{i}')
+        false_positives = sum(f'OTHER-{i}' in case_filter for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class CaseNumberTakenTests(unittest.TestCase):
+    def setUp(self):
+        self.context = make_app('case_numbers.db').app_context()
+        self.context.push()
+        db.session.add(make_accused(case_no='PS1-2025-00001'))
+        db.session.add(
+            CaseNumberReservation(
+                case_no='PS1-2025-00002',
+                ps_code='PS1',
+                reserved_by='officer-a',
+                expires_at=datetime.now() + timedelta(minutes=5),
+            )
+        )
+        db.session.commit()
+        build_case_number_filter(1000, 0.01, refresh_seconds=0)
+
+    def tearDown(self):
+        _FILTER['instance'] = None
+        db.session.remove()
+        self.context.pop()
+
+    def test_reservations_are_in_the_filter(self):
+        self.assertIn('PS1-2025-00002', _FILTER['instance'])
+        self.assertEqual(case_number_taken('PS1-2025-00002', reserved_by='officer-b'), ('reserved', None))
+        self.assertIsNone(case_number_taken('PS1-2025-00002', reserved_by='officer-a'))
+        status, accused = case_number_taken('PS1-2025-00001')
+        self.assertEqual((status, accused.username), ('accused', 'Person'))
+
+    def test_release_leaves_other_officers_reservations(self):
+        release_reservation('PS1-2025-00002', reserved_by='officer-b')
+        self.assertEqual(CaseNumberReservation.query.count(), 1)
+        release_reservation('PS1-2025-00002', reserved_by='officer-a')
+        self.assertEqual(CaseNumberReservation.query.count(), 0)
+
+    def test_other_workers_reach_the_filter(self):
+        # Written with Core, as another worker's writes would be: no mapper events here.
+        db.session.execute(Accused.__table__.update().values(case_no='PS1-2025-00009'))
+        db.session.execute(CaseNumberEdit.__table__.insert().values(case_no='PS1-2025-00009'))
+        db.session.execute(
+            CaseNumberReservation.__table__.insert().values(
+                case_no='PS1-2025-00003',
+                ps_code='PS1',
+                reserved_by='officer-a',
+                expires_at=datetime.now() + timedelta(minutes=5),
+            )
+        )
+        db.session.commit()
+        self.assertEqual(case_number_taken('PS1-2025-00009')[0], 'accused')
+        self.assertEqual(case_number_taken('PS1-2025-00003', reserved_by='officer-b'), ('reserved', None))
+        self.assertIn('PS1-2025-00009', _FILTER['instance'])
+        self.assertIn('PS1-2025-00003', _FILTER['instance'])
+
+    def test_edit_forms_publish_new_case_numbers(self):
+        accused = Accused.query.one()
+        apply_accused_form(accused, {'case_no': 'PS1-2025-00010', 'bail_status': 'Granted'}, changed_by='officer-a')
+        apply_accused_form(accused, {'bail_status': 'Denied'}, changed_by='officer-a')
+        db.session.commit()
+        self.assertEqual([edit.case_no for edit in CaseNumberEdit.query], ['PS1-2025-00010'])
+
+    def test_a_filter_miss_runs_no_query(self):
+        _FILTER.update(synced_at=time.monotonic(), refresh_seconds=3600)
+        statements = []
+
+        def record(_connection, _cursor, statement, *_args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            self.assertIsNone(case_number_taken('PS1-2025-00042'))
+            self.assertEqual(case_number_taken('PS1-2025-00001')[0], 'accused')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(len(statements), 1)
+
+class CaseNumberIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.app = make_app('case_number_index.db')
+        self.context = self.app.app_context()
+        self.context.push()
+        # A legacy table without the unique constraint, holding one case number twice.
+        db.session.execute(db.text('DROP TABLE accused'))
+        db.session.execute(db.text('CREATE TABLE accused (id INTEGER PRIMARY KEY, case_no VARCHAR(50))'))
+        db.session.execute(db.text("INSERT INTO accused (case_no) VALUES ('PS1-2025-00001'), ('PS1-2025-00001'), (NULL), (NULL)"))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+
+    def test_duplicates_are_logged_and_reported(self):
+        with self.assertLogs(self.app.logger, 'WARNING') as logs:
+            _ensure_unique_index('ux_accused_case_no', 'accused', 'case_no')
+            self.assertIn('ux_accused_case_no', check_unique_indexes())
+        self.assertIn('1 values of accused.case_no are duplicated', logs.output[0])
+
+        db.session.execute(db.text("UPDATE accused SET case_no = 'PS1-2025-00002' WHERE id = 2"))
+        db.session.commit()
+        _ensure_unique_index('ux_accused_case_no', 'accused', 'case_no')
+        self.assertNotIn('ux_accused_case_no', check_unique_indexes())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import gzip
+import unittest
+
+from compression import _CACHE, clear_compression_cache, gzip_stream, init_compression
+from helpers import make_app
+from streaming import _buffered
+
+PAGE = '<html>' + '<p>district court listing</p>' * 100 + '</html>'
+
+
+def compressed_app():
+    app = make_app(
+        None,
+        COMPRESSION_ENABLED=True,
+        COMPRESSION_LEVEL=6,
+        COMPRESSION_BROTLI_QUALITY=4,
+        COMPRESSION_MIN_BYTES=500,
+        COMPRESSION_CACHE_ENTRIES=8,
+    )
+    init_compression(app)
+    app.add_url_rule('/', 'home', lambda: PAGE)
+    app.add_url_rule('/listing', 'listing', lambda: PAGE)
+    app.add_url_rule('/tiny', 'tiny', lambda: '<p>ok</p>')
+    return app
+
+
+def closing_chunks(chunks, closed):
+    try:
+        yield from chunks
+    finally:
+        closed.append(True)
+
+
+class StreamingCompressionTests(unittest.TestCase):
+    def test_gzip_stream_round_trips(self):
+        chunks = ['<tr><td>%d</td></tr>' % index for index in range(1000)]
+        body = b''.join(gzip_stream(iter(chunks), 6))
+        self.assertEqual(gzip.decompress(body).decode(), ''.join(chunks))
+
+    def test_every_chunk_is_flushed(self):
+        # A sync flush per chunk means each piece decodes before the stream ends.
+        pieces = list(gzip_stream(iter(['<html>', '<body>']), 6))
+        self.assertEqual(len(pieces), 3)
+
+    def test_closing_the_stream_closes_the_source(self):
+        closed = []
+        stream = gzip_stream(closing_chunks(['a', 'b'], closed), 6)
+        next(stream)
+        stream.close()
+        self.assertEqual(closed, [True])
+
+    def test_buffered_joins_small_chunks(self):
+        closed = []
+        pieces = list(_buffered(closing_chunks(['ab'] * 10, closed), 8))
+        self.assertEqual(pieces, ['abababab', 'abababab', 'abab'])
+        self.assertEqual(closed, [True])
+
+
+class CompressionMiddlewareTests(unittest.TestCase):
+    def setUp(self):
+        clear_compression_cache()
+        self.client = compressed_app().test_client()
+
+    def test_negotiated_gzip(self):
+        response = self.client.get('/listing', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(gzip.decompress(response.get_data()).decode(), PAGE)
+
+    def test_uncompressed_without_accept_encoding_or_below_threshold(self):
+        self.assertNotIn('Content-Encoding', self.client.get('/listing').headers)
+        response = self.client.get('/tiny', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_static_pages_are_compressed_once(self):
+        first = self.client.get('/', headers={'Accept-Encoding': 'gzip'}).get_data()
+        second = self.client.get('/', headers={'Accept-Encoding': 'gzip'}).get_data()
+        self.assertEqual(first, second)
+        self.assertEqual(len(_CACHE), 1)
+        self.client.get('/listing', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(len(_CACHE), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from datetime import date
+
+import numpy as np
+
+from crime_stats import age_statistics, build_columns, category_breakdown, factorize
+
+
+def row(case_type, dob, arrested, gender='Male', occupation='Farmer'):
+    return (case_type, dob, arrested, gender, 'Indian', occupation, '10th')
+
+
+class CrimeStatsTests(unittest.TestCase):
+    def test_factorize_merges_blank_values(self):
+        codes, labels = factorize(['Male', None, ' ', 'Female', 'Male'])
+        self.assertEqual(labels, ['Male', 'Unspecified', 'Female'])
+        self.assertEqual(codes.tolist(), [0, 1, 1, 2, 0])
+
+    def test_age_statistics_match_numpy(self):
+        arrested = date(2025, 6, 1)
+        rows = [row('Theft', date(2025 - age, 1, 1), arrested) for age in (19, 23, 31, 44, 58)]
+        rows.append(row('Fraud', date(1980, 1, 1), None))
+        stats = age_statistics(build_columns(rows))
+
+        ages = np.array([(arrested - date(2025 - age, 1, 1)).days / 365.2425 for age in (19, 23, 31, 44, 58)])
+        theft = stats['groups'][0]
+        self.assertEqual(theft['case_type'], 'Theft')
+        self.assertEqual(theft['count'], 5)
+        self.assertEqual(theft['median'], round(float(np.median(ages)), 1))
+        self.assertEqual(theft['p90'], round(float(np.quantile(ages, 0.9)), 1))
+        self.assertEqual(sum(theft['histogram']), 5)
+        self.assertEqual(stats['excluded'], 1)
+
+    def test_breakdown_folds_long_tail(self):
+        rows = [row('Theft', date(1990, 1, 1), date(2025, 1, 1), occupation=f'Job {i % 5}') for i in range(20)]
+        result = category_breakdown(build_columns(rows), 'occupation', limit=3)
+        self.assertEqual(result['categories'][-1], 'Other')
+        self.assertEqual(result['totals'], [4, 4, 4, 8])
+        self.assertEqual(result['groups'][0]['total'], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from datetime import datetime, timedelta
+
+from flask import jsonify
+
+from db_replica import PRIMARY_UNTIL_KEY, init_replica, primary_only
+from db_routing import REPLICA_BIND
+from extensions import db
+from helpers import make_app, sqlite_uri
+from models import ReplicaHeartbeat, SectionPunishment
+
+
+def section(name):
+    return SectionPunishment(category='Theft', article_section=name, offense=name)
+
+
+def replicated_app():
+    app = make_app(
+        'primary.db',
+        SQLALCHEMY_BINDS={REPLICA_BIND: sqlite_uri('replica.db')},
+        REPLICA_MAX_LAG_SECONDS=30.0,
+        REPLICA_LAG_CHECK_SECONDS=0.0,
+        REPLICA_HEARTBEAT_SECONDS=0,
+    )
+
+    @app.route('/sections', methods=['GET', 'POST'])
+    def sections():
+        if not db.session.query(SectionPunishment).count():
+            db.session.add(section('written'))
+            db.session.commit()
+        return jsonify(sorted(row.article_section for row in SectionPunishment.query.all()))
+
+    @app.route('/sections/primary')
+    @primary_only
+    def primary_sections():
+        return jsonify(sorted(row.article_section for row in SectionPunishment.query.all()))
+
+    with app.app_context():
+        db.metadata.create_all(db.engines[REPLICA_BIND])
+        init_replica(app)
+    return app
+
+
+class ReplicaRoutingTests(unittest.TestCase):
+    def setUp(self):
+        self.app = replicated_app()
+        with self.app.app_context():
+            db.session.add(section('primary'))
+            db.session.commit()
+            with db.engines[REPLICA_BIND].begin() as connection:
+                connection.execute(SectionPunishment.__table__.insert().values(category='Theft', article_section='replica', offense='x'))
+        self.set_replica_heartbeat(datetime.utcnow())
+
+    def set_replica_heartbeat(self, beat_at):
+        with self.app.app_context(), db.engines[REPLICA_BIND].begin() as connection:
+            connection.execute(ReplicaHeartbeat.__table__.delete())
+            connection.execute(ReplicaHeartbeat.__table__.insert().values(id=1, beat_at=beat_at))
+
+    def test_get_reads_from_replica(self):
+        self.assertEqual(self.app.test_client().get('/sections').json, ['replica'])
+
+    def test_marked_route_and_writes_use_primary(self):
+        client = self.app.test_client()
+        self.assertEqual(client.get('/sections/primary').json, ['primary'])
+        self.assertEqual(client.post('/sections').json, ['primary'])
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        self.set_replica_heartbeat(datetime.utcnow() - timedelta(minutes=5))
+        self.assertEqual(self.app.test_client().get('/sections').json, ['primary'])
+
+    def test_reads_after_a_write_in_the_same_request_use_primary(self):
+        with self.app.app_context():
+            db.session.query(SectionPunishment).delete()
+            db.session.commit()
+            with db.engines[REPLICA_BIND].begin() as connection:
+                connection.execute(SectionPunishment.__table__.delete())
+        self.assertEqual(self.app.test_client().get('/sections').json, ['written'])
+
+    def test_client_reads_its_own_writes(self):
+        with self.app.app_context():
+            db.session.query(SectionPunishment).delete()
+            db.session.commit()
+        client = self.app.test_client()
+        # The replica still has its row, so this request finds one and does not write.
+        self.assertEqual(client.get('/sections').json, ['replica'])
+        self.assertEqual(client.post('/sections').json, ['written'])
+        with client.session_transaction() as session:
+            self.assertIn(PRIMARY_UNTIL_KEY, session)
+        self.assertEqual(client.get('/sections').json, ['written'])
+        self.assertEqual(self.app.test_client().get('/sections').json, ['replica'])
+
+
+if __name__ == '__main__':
+    unittest.main()
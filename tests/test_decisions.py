@@ -0,0 +1,108 @@
+import unittest
+from datetime import date
+
+from db_init import _ensure_single_decision_per_case
+from decisions import record_decisions
+from extensions import db
+from helpers import make_accused, make_app
+from models import DailyRollup, JudgeDecision
+
+
+def seeded_app():
+    app = make_app('decisions.db')
+    with app.app_context():
+        for index in range(3):
+            db.session.add(
+                make_accused(
+                    username=f'Person {index}',
+                    case_no=f'PS1-2025-{index:05d}',
+                    date_of_arrest=date(2025, 1, 1),
+                )
+            )
+        db.session.commit()
+    return app
+
+
+def entry(case_no, status, total_fine=None):
+    return {'case_no': case_no, 'status': status, 'total_fine': total_fine, 'imprisonment': None}
+
+
+class RecordDecisionsTests(unittest.TestCase):
+    def setUp(self):
+        self.app = seeded_app()
+        self.context = self.app.app_context()
+        self.context.push()
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+
+    def status_counts(self):
+        rows = DailyRollup.query.filter_by(dimension='decision_status').all()
+        return {row.value: row.total for row in rows if row.total}
+
+    def test_batch_reports_each_case(self):
+        results = record_decisions(
+            [
+                entry('PS1-2025-00000', 'Pending'),
+                entry('PS1-2025-00001', 'Solved', '5000'),
+                entry('PS1-2025-00001', 'Pending'),
+                entry('PS1-2025-09999', 'Solved'),
+                entry('PS1-2025-00002', 'Closed'),
+            ]
+        )
+        self.assertEqual(
+            [(result['success'], result['message']) for result in results],
+            [
+                (True, 'Recorded'),
+                (True, 'Recorded'),
+                (False, 'Case listed more than once'),
+                (False, 'Case not found'),
+                (False, 'Decision must be Pending or Solved'),
+            ],
+        )
+        self.assertEqual(JudgeDecision.query.count(), 2)
+        self.assertEqual(self.status_counts(), {'Pending': 1, 'Solved': 1})
+
+    def test_redeciding_overwrites_in_place(self):
+        record_decisions([entry('PS1-2025-00000', 'Pending', '1000')])
+        [result] = record_decisions([{'case_no': 'PS1-2025-00000', 'status': 'Solved'}])
+        self.assertEqual(result['message'], 'Updated')
+        decision = JudgeDecision.query.one()
+        self.assertEqual((decision.status, decision.total_fine), ('Solved', '1000'))
+        self.assertEqual(self.status_counts(), {'Solved': 1})
+
+    def legacy_decisions(self, case_nos):
+        # A legacy table without the unique constraint.
+        db.session.execute(db.text('DROP TABLE judge_decision'))
+        db.session.execute(
+            db.text('CREATE TABLE judge_decision (id INTEGER PRIMARY KEY, case_no VARCHAR(50), status VARCHAR(50), decided_at DATETIME)')
+        )
+        for case_no in case_nos:
+            db.session.execute(
+                db.text("INSERT INTO judge_decision (case_no, status, decided_at) VALUES (:case_no, 'Pending', '2025-01-02')"),
+                {'case_no': case_no},
+            )
+        db.session.commit()
+
+    def decision_indexes(self):
+        return [index['name'] for index in db.inspect(db.engine).get_indexes('judge_decision')]
+
+    def test_upgrade_keeps_duplicate_decisions(self):
+        self.legacy_decisions(['PS1-2025-00000', 'PS1-2025-00000', 'PS1-2025-00001'])
+
+        with self.assertLogs(self.app.logger, 'WARNING') as logs:
+            _ensure_single_decision_per_case()
+        self.assertIn('1 cases have more than one judge decision: PS1-2025-00000', logs.output[0])
+        self.assertEqual(db.session.execute(db.text('SELECT COUNT(*) FROM judge_decision')).scalar(), 3)
+        self.assertNotIn('ux_judge_decision_case_no', self.decision_indexes())
+
+    def test_upgrade_builds_the_index_once_cases_are_unique(self):
+        self.legacy_decisions(['PS1-2025-00000', 'PS1-2025-00001'])
+
+        _ensure_single_decision_per_case()
+        self.assertIn('ux_judge_decision_case_no', self.decision_indexes())
+
+
+if __name__ == '__main__':
+    unittest.main()
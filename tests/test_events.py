@@ -0,0 +1,34 @@
+import unittest
+
+from events import BrokerFull, LocalBroker
+
+
+class LocalBrokerTests(unittest.TestCase):
+    def test_events_reach_only_subscribed_roles(self):
+        broker = LocalBroker()
+        judge = broker.subscribe('judge')
+        super_admin = broker.subscribe('super_admin')
+
+        broker.publish('message.new', {'case_no': 'CASE-1'}, ('super_admin',))
+
+        self.assertTrue(judge.empty())
+        self.assertEqual(super_admin.get_nowait(), ('message.new', '{"case_no": "CASE-1"}'))
+
+    def test_connection_cap(self):
+        broker = LocalBroker(max_connections=1)
+        subscriber = broker.subscribe('judge')
+        with self.assertRaises(BrokerFull):
+            broker.subscribe('admin')
+        broker.unsubscribe('judge', subscriber)
+        broker.subscribe('admin')
+
+    def test_full_subscriber_queue_drops_events(self):
+        broker = LocalBroker(queue_size=1)
+        subscriber = broker.subscribe('admin')
+        broker.publish('complaint.new', {'id': 1}, ('admin',))
+        broker.publish('complaint.new', {'id': 2}, ('admin',))
+        self.assertEqual(subscriber.qsize(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import sys
+import unittest
+
+from extensions import db
+from facets import _prefix_upper_bound, autocomplete_case_numbers, case_type_facets, configure_facet_cache, invalidate_facets
+from helpers import make_accused, make_app
+from models import Accused
+
+
+class PrefixBoundTests(unittest.TestCase):
+    def test_last_character_is_incremented(self):
+        self.assertEqual(_prefix_upper_bound('PS1-2025-0001'), 'PS1-2025-0002')
+        self.assertEqual(_prefix_upper_bound('PS1-2025-'), 'PS1-2025.')
+
+    def test_last_character_that_cannot_grow(self):
+        top = chr(sys.maxunicode)
+        self.assertEqual(_prefix_upper_bound('PS' + top), 'PT')
+        self.assertIsNone(_prefix_upper_bound(top + top))
+
+
+class FacetQueryTests(unittest.TestCase):
+    def setUp(self):
+        self.context = make_app('facets.db').app_context()
+        self.context.push()
+        configure_facet_cache(3600)
+        db.session.add_all(
+            [
+                make_accused(case_no='PS1-2025-00010', case_type='Theft'),
+                make_accused(case_no='PS1-2025-00019', case_type='Fraud'),
+                make_accused(case_no='PS1-2025-0002', case_type='Theft'),
+                make_accused(case_no='PS1-2025-00020', case_type='Theft'),
+            ]
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+
+    def test_counts_follow_inserts_and_case_type_edits(self):
+        self.assertEqual(case_type_facets(), [{'case_type': 'Fraud', 'count': 1}, {'case_type': 'Theft', 'count': 3}])
+        db.session.add(make_accused(case_no='PS2-2025-00001', case_type='Fraud'))
+        db.session.commit()
+        self.assertEqual(case_type_facets()[0], {'case_type': 'Fraud', 'count': 2})
+        Accused.query.filter_by(case_no='PS1-2025-00010').one().case_type = 'Fraud'
+        db.session.commit()
+        self.assertEqual(case_type_facets(), [{'case_type': 'Fraud', 'count': 3}, {'case_type': 'Theft', 'count': 2}])
+
+    def test_cached_counts_until_invalidated(self):
+        case_type_facets()
+        # Core writes skip the mapper events, so the cached counts stay.
+        db.session.execute(Accused.__table__.delete().where(Accused.case_type == 'Fraud'))
+        db.session.commit()
+        self.assertEqual(len(case_type_facets()), 2)
+        invalidate_facets()
+        self.assertEqual(case_type_facets(), [{'case_type': 'Theft', 'count': 3}])
+
+    def test_autocomplete_prefix_range(self):
+        self.assertEqual(autocomplete_case_numbers('PS1-2025-0001'), ['PS1-2025-00010', 'PS1-2025-00019'])
+        # 'PS1-2025-0002' itself is the upper bound of the 0001 range but starts its own.
+        self.assertEqual(autocomplete_case_numbers('PS1-2025-0002'), ['PS1-2025-0002', 'PS1-2025-00020'])
+        self.assertEqual(autocomplete_case_numbers('PS1-2025-0002', case_type='Fraud'), [])
+        self.assertEqual(autocomplete_case_numbers('PS1-', limit=2), ['PS1-2025-00010', 'PS1-2025-00019'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from datetime import date
+
+from extensions import db
+from helpers import make_accused, make_app
+from identity import CLUSTER_LOCK, UnionFind, cluster_pending, normalize_aadhaar, normalize_name, same_person
+from job_locks import job_lock
+from models import Accused, Person
+
+
+def record(name, relative_name, dob, aadhaar_key=None):
+    return {
+        'name': normalize_name(name),
+        'relative_name': normalize_name(relative_name),
+        'dob': dob,
+        'aadhaar_key': aadhaar_key,
+    }
+
+
+class IdentityMatchingTests(unittest.TestCase):
+    def test_normalization(self):
+        self.assertEqual(normalize_aadhaar('1234 5678-9012'), '123456789012')
+        self.assertIsNone(normalize_aadhaar('1234'))
+        self.assertEqual(normalize_name(' Kumar,  RAVI '), 'kumar ravi')
+        self.assertEqual(normalize_name('Ravi Kumar'), normalize_name('Kumar Ravi'))
+
+    def test_name_match_needs_same_birth_date(self):
+        first = record('Ravi Kumar', 'Mohan Lal', date(1990, 5, 1))
+        self.assertTrue(same_person(first, record('Ravi Kumaar', 'Mohan Lall', date(1990, 5, 1))))
+        self.assertFalse(same_person(first, record('Ravi Kumar', 'Mohan Lal', date(1991, 5, 1))))
+
+    def test_different_aadhaar_overrides_names(self):
+        first = record('Ravi Kumar', 'Mohan Lal', date(1990, 5, 1), '111111111111')
+        second = record('Ravi Kumar', 'Mohan Lal', date(1990, 5, 1), '222222222222')
+        self.assertFalse(same_person(first, second))
+
+    def test_union_find_refuses_conflicting_keys(self):
+        union_find = UnionFind()
+        union_find.add('a', '111111111111')
+        union_find.add('b')
+        union_find.add('c', '222222222222')
+        self.assertTrue(union_find.union('a', 'b'))
+        self.assertFalse(union_find.union('b', 'c'))
+        self.assertEqual(sorted(map(sorted, union_find.groups())), [['a', 'b'], ['c']])
+
+
+def accused(username, aadhaar_no=None, dob=date(1990, 5, 1)):
+    return make_accused(username=username, relative_name='Mohan Lal', dob=dob, aadhaar_no=aadhaar_no)
+
+
+class ClusterPendingTests(unittest.TestCase):
+    def setUp(self):
+        self.context = make_app('identity.db').app_context()
+        self.context.push()
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+
+    def test_only_one_process_clusters_at_a_time(self):
+        db.session.add(accused('Ravi Kumar'))
+        db.session.commit()
+        with job_lock(CLUSTER_LOCK) as holder:
+            self.assertIsNotNone(holder)
+            self.assertIsNone(cluster_pending())
+        self.assertEqual(cluster_pending(), 1)
+        self.assertEqual(Person.query.count(), 1)
+
+    def test_folded_and_orphaned_persons_are_deleted(self):
+        db.session.add_all([accused('Ravi Kumar'), accused('Ravi Kumar', '1111 2222 3333', date(1985, 1, 1))])
+        db.session.commit()
+        cluster_pending()
+        self.assertEqual(Person.query.count(), 2)
+
+        # The Aadhaar shows the first record is the same person as the second.
+        first = Accused.query.filter_by(dob=date(1990, 5, 1)).one()
+        first.aadhaar_no = '111122223333'
+        first.dob = date(1985, 1, 1)
+        db.session.commit()
+        cluster_pending()
+        self.assertEqual(Person.query.count(), 1)
+        self.assertEqual({row.person_id for row in Accused.query}, {Person.query.one().id})
+
+        # A third record linking two clusters folds the newer one away.
+        db.session.add(accused('Anil Singh', dob=date(1970, 1, 1)))
+        db.session.commit()
+        cluster_pending()
+        first.aadhaar_no = None
+        db.session.commit()
+        cluster_pending()
+        self.assertEqual(Person.query.count(), 2)
+        db.session.add(accused('Anil Singh', '111122223333', date(1970, 1, 1)))
+        db.session.commit()
+        cluster_pending()
+        self.assertEqual(Person.query.count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from datetime import datetime, timedelta
+
+from extensions import db
+from helpers import make_app
+from inbox import case_messages, decode_cursor, inbox_counts, inbox_page, mark_read, rebuild_inbox_counters, retract_case_messages
+from models import SuperAdminMessage
+
+
+class InboxTests(unittest.TestCase):
+    def setUp(self):
+        self.context = make_app('inbox.db').app_context()
+        self.context.push()
+        start = datetime(2025, 1, 1)
+        for index in range(5):
+            db.session.add(
+                SuperAdminMessage(
+                    case_type='Theft',
+                    case_no=f'PS1-2025-{index % 2:05d}',
+                    message=f'Message {index}',
+                    # Two messages share a timestamp, so paging has to break the tie on id.
+                    created_at=start + timedelta(minutes=min(index, 3)),
+                )
+            )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+
+    def test_counters_follow_the_messages(self):
+        self.assertEqual(inbox_counts(), {'Pending': 5, 'Replied': 0, 'all': 5, 'unread': 5})
+
+        message = SuperAdminMessage.query.filter_by(message='Message 0').one()
+        message.status = 'Replied'
+        message.read_at = datetime.now()
+        db.session.commit()
+        self.assertEqual(mark_read([message.id for message in SuperAdminMessage.query.limit(3)]), 2)
+        db.session.commit()
+        self.assertEqual(inbox_counts(), {'Pending': 4, 'Replied': 1, 'all': 5, 'unread': 2})
+
+        retract_case_messages('PS1-2025-00000')
+        SuperAdminMessage.query.filter_by(case_no='PS1-2025-00000').delete()
+        db.session.commit()
+        expected = {'Pending': 2, 'Replied': 0, 'all': 2, 'unread': 1}
+        self.assertEqual(inbox_counts(), expected)
+        rebuild_inbox_counters()
+        self.assertEqual(inbox_counts(), expected)
+
+    def test_pages_walk_every_message_once(self):
+        seen = []
+        cursor = None
+        while True:
+            messages, _, cursor = inbox_page('Pending', cursor, limit=2)
+            seen.extend(message.message for message in messages)
+            if cursor is None:
+                break
+        self.assertEqual(seen, ['Message 4', 'Message 3', 'Message 2', 'Message 1', 'Message 0'])
+        self.assertIsNone(decode_cursor('***'))
+        self.assertEqual([message.message for message in case_messages('PS1-2025-00001')], ['Message 3', 'Message 1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import random
+import unittest
+
+from lifecycle import QuantileSketch, RELATIVE_ACCURACY, bucket_index, bucket_value
+
+
+class QuantileSketchTests(unittest.TestCase):
+    def test_bucket_value_stays_within_relative_accuracy(self):
+        for hours in (0.5, 3, 26.5, 400, 9000):
+            estimate = bucket_value(bucket_index(hours))
+            self.assertLessEqual(abs(estimate - hours) / hours, RELATIVE_ACCURACY + 1e-9)
+
+    def test_quantiles_track_exact_values(self):
+        rng = random.Random(3)
+        values = sorted(rng.lognormvariate(4, 1) for _ in range(20000))
+        sketch = QuantileSketch()
+        for value in values:
+            sketch.add(value)
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertLess(abs(sketch.quantile(q) - exact) / exact, 0.03)
+
+    def test_removing_values_restores_the_sketch(self):
+        sketch = QuantileSketch()
+        for hours in (5, 10, 500):
+            sketch.add(hours)
+        sketch.add(500, -1)
+        self.assertEqual(sketch.count, 2)
+        self.assertLess(sketch.quantile(1.0), 11)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from db_init import _ensure_single_ongoing_meeting_index
+from extensions import db
+from helpers import make_accused, make_app
+from meetings import (
+    _ONGOING_LINKS,
+    SWAP_ATTEMPTS,
+    configure_meeting_cache,
+    end_stale_meetings,
+    get_ongoing_link,
+    swap_meeting_link,
+)
+from models import MeetingLink
+
+CASE_NO = 'PS1-2025-00001'
+
+
+def insert_meeting(case_no, link, **values):
+    # Core insert, as another worker's write looks to this process's cache.
+    db.session.execute(MeetingLink.__table__.insert().values(case_no=case_no, link=link, status='Ongoing', **values))
+    db.session.commit()
+
+
+class MeetingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.context = make_app('meetings.db').app_context()
+        self.context.push()
+        configure_meeting_cache(30)
+        db.session.add_all(
+            [
+                make_accused(case_no=CASE_NO, date_of_arrest=date(2025, 1, 1)),
+                make_accused(case_no='PS1-2025-00002', date_of_arrest=date(2025, 1, 1)),
+            ]
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        configure_meeting_cache(30)
+        db.session.remove()
+        self.context.pop()
+
+
+class OngoingLinkCacheTests(MeetingTestCase):
+    def test_swap_invalidates_the_cached_link(self):
+        self.assertIsNone(get_ongoing_link(CASE_NO))
+        swap_meeting_link(CASE_NO, 'https://meet.example/a')
+        self.assertEqual(get_ongoing_link(CASE_NO)['link'], 'https://meet.example/a')
+        swap_meeting_link(CASE_NO, 'https://meet.example/b')
+        self.assertEqual(get_ongoing_link(CASE_NO)['link'], 'https://meet.example/b')
+
+    def test_ending_invalidates_the_cached_link(self):
+        swap_meeting_link(CASE_NO, 'https://meet.example/a')
+        self.assertIsNotNone(get_ongoing_link(CASE_NO))
+        end_stale_meetings(timedelta(seconds=-1))
+        self.assertIsNone(get_ongoing_link(CASE_NO))
+
+    def test_expired_entry_reloads(self):
+        self.assertIsNone(get_ongoing_link(CASE_NO))
+        insert_meeting(CASE_NO, 'https://meet.example/elsewhere')
+        self.assertIsNone(get_ongoing_link(CASE_NO))
+
+        cached_at, meeting = _ONGOING_LINKS[CASE_NO]
+        _ONGOING_LINKS[CASE_NO] = (cached_at - 31, meeting)
+        self.assertEqual(get_ongoing_link(CASE_NO)['link'], 'https://meet.example/elsewhere')
+
+
+class SwapAndSweepTests(MeetingTestCase):
+    def setUp(self):
+        super().setUp()
+        _ensure_single_ongoing_meeting_index()
+        self.races = 0
+
+    def tearDown(self):
+        if event.contains(MeetingLink, 'before_insert', self.race):
+            event.remove(MeetingLink, 'before_insert', self.race)
+        super().tearDown()
+
+    def race(self, _mapper, connection, target):
+        # Another writer's ongoing meeting lands between the swap's UPDATE and
+        # its INSERT, so the unique index rejects the INSERT.
+        if self.races < self.losing_attempts:
+            self.races += 1
+            rival = MeetingLink.__table__.insert().values(
+                case_no=target.case_no, link='https://meet.example/rival', status='Ongoing'
+            )
+            connection.execute(rival)
+
+    def test_lost_race_is_retried(self):
+        self.losing_attempts = 1
+        event.listen(MeetingLink, 'before_insert', self.race)
+        meeting = swap_meeting_link(CASE_NO, 'https://meet.example/a')
+        self.assertEqual(self.races, 1)
+        self.assertEqual(meeting.link, 'https://meet.example/a')
+        self.assertEqual(MeetingLink.query.filter_by(status='Ongoing').count(), 1)
+
+    def test_gives_up_after_the_last_attempt(self):
+        self.losing_attempts = SWAP_ATTEMPTS
+        event.listen(MeetingLink, 'before_insert', self.race)
+        with self.assertRaises(IntegrityError):
+            swap_meeting_link(CASE_NO, 'https://meet.example/a')
+        self.assertEqual(self.races, SWAP_ATTEMPTS)
+        self.assertEqual(MeetingLink.query.count(), 0)
+
+    def test_sweeper_ends_only_old_ongoing_meetings(self):
+        now = datetime.now()
+        insert_meeting(CASE_NO, 'https://meet.example/old', created_at=now - timedelta(hours=5))
+        insert_meeting('PS1-2025-00002', 'https://meet.example/new', created_at=now - timedelta(hours=1))
+        db.session.execute(
+            MeetingLink.__table__.insert().values(
+                case_no=CASE_NO,
+                link='https://meet.example/ended',
+                status='Ended',
+                created_at=now - timedelta(hours=9),
+                ended_at=now - timedelta(hours=8),
+            )
+        )
+        db.session.commit()
+
+        ended = end_stale_meetings(timedelta(hours=4))
+        self.assertEqual([row.case_no for row in ended], [CASE_NO])
+        statuses = {row.link: (row.status, row.ended_at) for row in MeetingLink.query}
+        self.assertEqual(statuses['https://meet.example/old'][0], 'Ended')
+        self.assertEqual(statuses['https://meet.example/new'], ('Ongoing', None))
+        self.assertEqual(statuses['https://meet.example/ended'], ('Ended', now - timedelta(hours=8)))
+        self.assertEqual(end_stale_meetings(timedelta(hours=4)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from metrics import _hit_ratios, _labels, _merge
+
+
+def snapshot(pid, requests, latency_counts, pool_size):
+    return {
+        'pid': pid,
+        'written_at': 0,
+        'counters': [
+            ['http_requests_total', [['method', 'GET'], ['route', '/health'], ['status', '200']], requests],
+        ],
+        'histograms': [
+            ['http_request_duration_seconds', [['method', 'GET'], ['route', '/health']], [0.1, 1.0], latency_counts, 0.5],
+        ],
+        'gauges': [['db_pool_connections', [['state', 'size']], pool_size]],
+    }
+
+
+class MetricsMergeTests(unittest.TestCase):
+    def test_worker_snapshots_are_summed(self):
+        counters, histograms, gauges = _merge([snapshot(1, 3, [2, 1, 0], 10), snapshot(2, 4, [0, 3, 1], 10)])
+        labels = (('method', 'GET'), ('route', '/health'))
+        self.assertEqual(counters[('http_requests_total', labels + (('status', '200'),))], 7)
+        histogram = histograms[('http_request_duration_seconds', labels)]
+        self.assertEqual(histogram['counts'], [2, 4, 1])
+        self.assertAlmostEqual(histogram['sum'], 1.0)
+        # Gauges are per worker rather than summed.
+        self.assertEqual(len(gauges), 2)
+
+    def test_hit_ratio(self):
+        counters = {
+            ('cache_requests_total', (('cache', 'facets'), ('result', 'hit'))): 3,
+            ('cache_requests_total', (('cache', 'facets'), ('result', 'miss'))): 1,
+        }
+        self.assertEqual(_hit_ratios(counters), {('cache_hit_ratio', (('cache', 'facets'),)): 0.75})
+
+    def test_label_values_are_escaped(self):
+        self.assertEqual(_labels((('route', 'a"b\\c'),)), '{route="a\\"b\\\\c"}')
+
+
+if __name__ == '__main__':
+    unittest.main()
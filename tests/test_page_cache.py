@@ -0,0 +1,53 @@
+import unittest
+
+from flask import template_rendered
+from jinja2 import DictLoader
+
+from helpers import make_app
+from page_cache import cached_page, clear_page_cache
+
+
+def cached_app():
+    app = make_app(None)
+    app.jinja_loader = DictLoader({
+        'landing.html': '<h1>{{ url_for("landing") }}</h1>',
+        'form.html': '<input name="csrf_token" value="{{ csrf_token }}">',
+    })
+    app.add_url_rule('/', 'landing', lambda: cached_page('landing.html'))
+    app.add_url_rule('/form', 'form', lambda: cached_page('form.html', csrf=True))
+    return app
+
+
+class PageCacheTests(unittest.TestCase):
+    def setUp(self):
+        clear_page_cache()
+        self.app = cached_app()
+        self.client = self.app.test_client()
+        self.renders = []
+        template_rendered.connect(self._rendered, self.app)
+
+    def _rendered(self, _app, template, context, **_extra):
+        self.renders.append(template.name)
+
+    def test_page_is_rendered_once(self):
+        first = self.client.get('/')
+        second = self.client.get('/')
+        self.assertEqual(first.get_data(), second.get_data())
+        self.assertEqual(self.renders, ['landing.html'])
+        self.assertEqual(first.headers['Cache-Control'], 'public, max-age=300')
+
+    def test_etag_revalidation(self):
+        etag = self.client.get('/').headers['ETag']
+        self.assertEqual(self.client.get('/', headers={'If-None-Match': etag}).status_code, 304)
+
+    def test_csrf_token_is_filled_in_per_session(self):
+        first = self.client.get('/form').get_data(as_text=True)
+        other = self.app.test_client().get('/form').get_data(as_text=True)
+        self.assertNotIn('__page_cache', first)
+        self.assertNotEqual(first, other)
+        self.assertEqual(self.renders, ['form.html'])
+        self.assertIn('private', self.client.get('/form').headers['Cache-Control'])
+
+
+if __name__ == '__main__':
+    unittest.main()
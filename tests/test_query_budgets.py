@@ -0,0 +1,290 @@
+import os
+import tempfile
+import threading
+import unittest
+from datetime import date, datetime, timedelta
+
+# The app reads its settings at import time, so point it at a throwaway
+# database before anything imports config.
+_TEMP_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_TEMP_DIR, 'budgets.db')
+os.environ['UPLOAD_FOLDER'] = os.path.join(_TEMP_DIR, 'uploads')
+os.environ['PERSON_CLUSTER_INTERVAL_SECONDS'] = '0'
+os.environ['MEETING_MAX_AGE_HOURS'] = '0'
+os.environ['EVENTS_BACKEND'] = 'local'
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+from app import app  # noqa: E402
+from crime_stats import configure_stats_cache  # noqa: E402
+from extensions import db  # noqa: E402
+from facets import invalidate_facets  # noqa: E402
+from helpers import make_accused  # noqa: E402
+from identity import cluster_pending  # noqa: E402
+from meetings import clear_meeting_cache  # noqa: E402
+from models import (  # noqa: E402
+    Accused,
+    Admin,
+    ComplaintDescription,
+    JudgeDecision,
+    MeetingLink,
+    SectionPunishment,
+    SuperAdminMessage,
+)
+from sql_profiler import raise_on_lazy_loads  # noqa: E402
+
+FIXTURE_CASES = 8
+
+# Most SQL statements one request may run against the fixtures below, with
+# every in-process cache cold. Every GET route needs an entry; raise a budget
+# only together with the change that needs it. The fixtures hold several
+# rows per table, so a per-row query blows the budget.
+QUERY_BUDGETS = {
+    'about_us': 0,
+    'accused_breakdown_analytics': 3,
+    'add_complaint_description': 1,
+    'add_it_team': 0,
+    'add_user': 0,
+    'add_user_complain': 0,
+    'admin_accused_details': 1,
+    'admin_accused_edit': 2,
+    'admin_activity_log': 2,
+    'admin_complaint_description': 0,
+    'admin_criminal_records': 1,
+    'admin_dashboard': 4,
+    'admin_login': 0,
+    'admin_logout': 0,
+    'admin_password_reset': 1,
+    'admin_section_management': 2,
+    'age_at_arrest_analytics': 3,
+    'api_accused': 1,
+    'api_complaints': 1,
+    'api_decisions': 1,
+    'api_meetings': 1,
+    'api_sections': 1,
+    'auth_center': 0,
+    'base': 0,
+    'case_number_autocomplete': 0,
+    'case_type_facets_route': 1,
+    'complaints': 0,
+    'contact_us': 0,
+    'criminal_records': 1,
+    'department': 2,
+    'fetch_report': 0,
+    'health': 1,
+    'health_pool': 0,
+    'home': 0,
+    'it_team_details': 1,
+    'judge_dashboard': 2,
+    'judge_login': 0,
+    'judge_logout': 0,
+    'judge_pending': 2,
+    'judge_solved': 1,
+    'lifecycle_metrics': 1,
+    'manage_sections': 2,
+    'manifest': 0,
+    'metrics': 0,
+    'person_cases': 1,
+    # One existence check, one insert and one section-code insert per
+    # built-in sample section.
+    'populate_sample_data': 15,
+    'pwa_test': 0,
+    'rollup_report_route': 1,
+    'search_record': 0,
+    # Totals, per-section stats, sentence buckets, statutory bounds, outlier count and rows.
+    'sentencing_analytics': 6,
+    'service_worker': 0,
+    'submit_complain': 0,
+    'submit_search': 0,
+    'super_accused': 1,
+    'super_accused_edit': 2,
+    'super_add_user': 0,
+    'super_admin_dashboard': 4,
+    'super_admin_judgements': 1,
+    'super_admin_lifecycle': 1,
+    'super_admin_login': 0,
+    'super_admin_logout': 0,
+    # Page, its decisions, counters, then marking the page read and its counter.
+    'super_admin_messages': 5,
+    'super_sections': 2,
+    'sw_js': 0,
+    'user_change_password': 1,
+    'user_complain': 1,
+    'user_details': 1,
+}
+
+# Read-only POST routes, checked with the form data from post_forms().
+POST_BUDGETS = {
+    'department': 2,
+    'submit_search': 1,
+    'fetch_report': 1,
+    # One lookup per requested section; the form asks for two.
+    'get_punishment_details': 2,
+    'check_case_number': 1,
+    'get_case_numbers': 1,
+    'get_meeting_link': 1,
+    'get_meeting_links': 1,
+}
+
+SKIPPED_ENDPOINTS = {
+    'static',
+    'uploaded_file',
+    # Server-Sent Event streams never finish.
+    'admin_events',
+    'super_admin_events',
+    'judge_events',
+}
+
+_COUNTER = {'thread': None, 'statements': 0}
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_statement(_conn, _cursor, _statement, _parameters, _context, _executemany):
+    # Background writers (activity log, event relay) run on other threads.
+    if threading.get_ident() == _COUNTER['thread']:
+        _COUNTER['statements'] += 1
+
+
+def seed_fixtures():
+    with app.app_context():
+        if Accused.query.first() is not None:
+            return
+        db.session.add(Admin(username='officer', password='x', mobile_no='9000000000', email='officer@example.com'))
+        for index in range(FIXTURE_CASES):
+            case_no = f'PS1-2025-{index:05d}'
+            db.session.add(
+                make_accused(
+                    username=f'Person {index % 5}',
+                    dob=date(1990, 1, 1 + index % 5),
+                    aadhaar_no=f'1234 5678 {index % 5:04d}',
+                    case_no=case_no,
+                    case_type='Theft' if index % 2 else 'Fraud',
+                    ps='PS1',
+                    date_of_arrest=date(2025, 1, 1) + timedelta(days=index),
+                    court_forward_date_time=datetime(2025, 1, 2) + timedelta(days=index),
+                )
+            )
+            db.session.add(ComplaintDescription(complain_type='Threat', description='Complaint', case_no=case_no))
+            db.session.add(SuperAdminMessage(case_type='Theft', case_no=case_no, message='Update?'))
+            if index % 3 == 0:
+                db.session.add(JudgeDecision(case_no=case_no, status='Solved' if index % 2 else 'Pending'))
+            if index % 2 == 0:
+                db.session.add(MeetingLink(case_no=case_no, link=f'https://meet.example.com/{index}'))
+            db.session.add(
+                SectionPunishment(
+                    category='Theft',
+                    article_section=str(379 + index),
+                    offense='Theft',
+                    possible_punishments='Imprisonment up to 3 years',
+                    minimum_fine='Rs. 1,000',
+                )
+            )
+        db.session.commit()
+        cluster_pending()
+
+
+def logged_in_client():
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session.update(
+            admin_logged_in=True,
+            admin_username='officer',
+            admin_id=1,
+            super_admin_logged_in=True,
+            super_admin_username='Super Admin',
+            judge_logged_in=True,
+            judge_username='Judge',
+        )
+    return client
+
+
+def url_arguments():
+    with app.app_context():
+        accused = Accused.query.order_by(Accused.id).first()
+        return {
+            'accused_id': accused.id,
+            'person_id': accused.person_id,
+            'field': 'gender',
+        }
+
+
+def post_forms():
+    return {
+        'department': {'case_type': 'Theft'},
+        'submit_search': {'username': 'Person 1', 'dob': '1990-01-02', 'aadhaar_no': '1234 5678 0001'},
+        'fetch_report': {'from_date': '2025-01-01', 'to_date': '2025-01-31'},
+        'get_punishment_details': {'section_id': '379, 380'},
+        'check_case_number': {'case_no': 'PS1-2025-00001'},
+        'get_case_numbers': {'case_type': 'Theft'},
+        'get_meeting_link': {'case_no': 'PS1-2025-00000'},
+        'get_meeting_links': {'case_nos': 'PS1-2025-00000,PS1-2025-00002,PS1-2025-00003'},
+    }
+
+
+def get_routes():
+    arguments = url_arguments()
+    adapter = app.url_map.bind('localhost')
+    routes = {}
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint in SKIPPED_ENDPOINTS or 'GET' not in rule.methods or rule.endpoint in routes:
+            continue
+        routes[rule.endpoint] = adapter.build(rule.endpoint, {name: arguments[name] for name in rule.arguments})
+    return routes
+
+
+def count_statements(method, path, data=None):
+    # Budgets are for the cold path, whatever ran before.
+    clear_meeting_cache()
+    invalidate_facets()
+    configure_stats_cache(app.config['ANALYTICS_CACHE_SECONDS'])
+    client = logged_in_client()
+    _COUNTER.update(thread=threading.get_ident(), statements=0)
+    try:
+        response = client.open(path, method=method, data=data)
+        response.get_data()
+    finally:
+        _COUNTER['thread'] = None
+    return response.status_code, _COUNTER['statements']
+
+
+class QueryBudgetTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        app.config.update(WTF_CSRF_ENABLED=False, TESTING=True)
+        seed_fixtures()
+
+    def test_every_get_route_has_a_budget(self):
+        missing = sorted(set(get_routes()) - set(QUERY_BUDGETS))
+        self.assertEqual(missing, [], 'declare a query budget for these routes')
+
+    def test_get_routes_stay_within_budget(self):
+        for endpoint, path in sorted(get_routes().items()):
+            with self.subTest(endpoint=endpoint):
+                status, statements = count_statements('GET', path)
+                self.assertLess(status, 500)
+                self.assertLessEqual(statements, QUERY_BUDGETS.get(endpoint, 0), path)
+
+    def test_post_routes_stay_within_budget(self):
+        forms = post_forms()
+        with app.test_request_context():
+            paths = {endpoint: app.url_for(endpoint) for endpoint in forms}
+        for endpoint, form in forms.items():
+            with self.subTest(endpoint=endpoint):
+                status, statements = count_statements('POST', paths[endpoint], form)
+                self.assertLess(status, 500)
+                self.assertLessEqual(statements, POST_BUDGETS.get(endpoint, 0), paths[endpoint])
+
+    def test_no_route_lazy_loads_relationships(self):
+        raise_on_lazy_loads()
+        try:
+            for endpoint, path in sorted(get_routes().items()):
+                with self.subTest(endpoint=endpoint):
+                    status, _ = count_statements('GET', path)
+                    self.assertLess(status, 500)
+        finally:
+            raise_on_lazy_loads(False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from datetime import date
+
+from extensions import db
+from helpers import make_accused, make_app
+from models import Accused, ComplaintDescription, DailyRollup, JudgeDecision
+from rollups import period_start, rebuild_rollups, retract_case_children
+
+
+class PeriodStartTests(unittest.TestCase):
+    def test_weeks_start_on_monday(self):
+        self.assertEqual(period_start(date(2025, 1, 1), 'week'), date(2024, 12, 30))
+        self.assertEqual(period_start(date(2025, 1, 6), 'week'), date(2025, 1, 6))
+
+    def test_months_and_days(self):
+        self.assertEqual(period_start(date(2025, 2, 28), 'month'), date(2025, 2, 1))
+        self.assertEqual(period_start(date(2025, 2, 28), 'day'), date(2025, 2, 28))
+
+
+class RollupDeltaTests(unittest.TestCase):
+    def setUp(self):
+        self.context = make_app('rollups.db').app_context()
+        self.context.push()
+        db.session.add_all(
+            [
+                make_accused(case_no='PS1-2025-00001', case_type='Theft', ps='PS1', date_of_arrest=date(2025, 1, 1)),
+                make_accused(case_no='PS2-2025-00001', case_type='Theft', ps='PS2', date_of_arrest=date(2025, 1, 2)),
+            ]
+        )
+        db.session.flush()
+        db.session.add_all(
+            [
+                ComplaintDescription(complain_type='Theft', description='Stolen bike', case_no='PS1-2025-00001'),
+                ComplaintDescription(complain_type='Civil', description='Land dispute', case_no='PS1-2025-00001'),
+                JudgeDecision(case_no='PS1-2025-00001', status='Pending'),
+                JudgeDecision(case_no='PS2-2025-00001', status='Solved'),
+            ]
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+
+    def counts(self):
+        return {
+            (row.dimension, row.day, row.value): row.total
+            for row in DailyRollup.query.filter(DailyRollup.total != 0)
+        }
+
+    def assertMatchesRebuild(self):
+        incremental = self.counts()
+        rebuild_rollups()
+        self.assertEqual(incremental, self.counts())
+        return incremental
+
+    def test_inserts(self):
+        counts = self.assertMatchesRebuild()
+        self.assertEqual(counts[('complaint_type', date(2025, 1, 1), 'Civil')], 1)
+        self.assertEqual(counts[('decision_status', date(2025, 1, 2), 'Solved')], 1)
+
+    def test_updates_move_the_case_and_its_children(self):
+        case = Accused.query.filter_by(case_no='PS1-2025-00001').one()
+        case.ps = 'PS3'
+        case.date_of_arrest = date(2025, 1, 5)
+        JudgeDecision.query.filter_by(case_no='PS1-2025-00001').one().status = 'Solved'
+        db.session.commit()
+        counts = self.assertMatchesRebuild()
+        self.assertNotIn(('ps', date(2025, 1, 1), 'PS1'), counts)
+        self.assertEqual(counts[('complaint_type', date(2025, 1, 5), 'Theft')], 1)
+
+    def test_orm_deletes(self):
+        db.session.delete(ComplaintDescription.query.filter_by(complain_type='Civil').one())
+        db.session.delete(JudgeDecision.query.filter_by(case_no='PS2-2025-00001').one())
+        db.session.commit()
+        counts = self.assertMatchesRebuild()
+        self.assertNotIn(('complaint_type', date(2025, 1, 1), 'Civil'), counts)
+
+    def test_retract_then_bulk_delete(self):
+        # The accused delete routes remove a case's children with query deletes.
+        retract_case_children('PS1-2025-00001')
+        ComplaintDescription.query.filter_by(case_no='PS1-2025-00001').delete(synchronize_session=False)
+        JudgeDecision.query.filter_by(case_no='PS1-2025-00001').delete(synchronize_session=False)
+        db.session.delete(Accused.query.filter_by(case_no='PS1-2025-00001').one())
+        db.session.commit()
+        counts = self.assertMatchesRebuild()
+        self.assertEqual({key[2] for key in counts}, {'Theft', 'PS2', '', 'Solved'})
+
+
+if __name__ == '__main__':
+    unittest.main()
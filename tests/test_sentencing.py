@@ -0,0 +1,94 @@
+import unittest
+from datetime import date
+
+from extensions import db
+from helpers import make_accused, make_app
+from models import CaseSection, JudgeDecision, SectionPunishment
+from sentencing import (
+    LIFE_IMPRISONMENT_DAYS,
+    parse_fine_paise,
+    parse_imprisonment_days,
+    parse_punishment_bounds,
+    sentencing_report,
+    split_sections,
+)
+
+
+class ParserTests(unittest.TestCase):
+    def test_fines(self):
+        self.assertEqual(parse_fine_paise('5000'), 500000)
+        self.assertEqual(parse_fine_paise('Rs. 1,000'), 100000)
+        self.assertEqual(parse_fine_paise('2 lakh'), 20000000)
+        self.assertEqual(parse_fine_paise('None'), 0)
+        self.assertIsNone(parse_fine_paise(''))
+        self.assertIsNone(parse_fine_paise('as per rules'))
+
+    def test_imprisonment(self):
+        self.assertEqual(parse_imprisonment_days('1-3 months'), 90)
+        self.assertEqual(parse_imprisonment_days('7 years'), 7 * 365)
+        self.assertEqual(parse_imprisonment_days('three years'), 3 * 365)
+        self.assertEqual(parse_imprisonment_days('Imprisonment for life'), LIFE_IMPRISONMENT_DAYS)
+        self.assertEqual(parse_imprisonment_days('None'), 0)
+
+    def test_statutory_bounds(self):
+        self.assertEqual(
+            parse_punishment_bounds('Rs. 1,000 or imprisonment up to 3 years', None),
+            {'min_fine_paise': 100000, 'max_fine_paise': None, 'min_imprisonment_days': None, 'max_imprisonment_days': 1095},
+        )
+        bounds = parse_punishment_bounds(
+            None, 'Imprisonment not less than seven years which may extend to ten years, and fine up to Rs. 50,000'
+        )
+        self.assertEqual((bounds['min_imprisonment_days'], bounds['max_imprisonment_days']), (7 * 365, 10 * 365))
+        self.assertEqual(bounds['max_fine_paise'], 5000000)
+
+    def test_sections(self):
+        self.assertEqual(split_sections('IPC 379, 380/34'), ['379', '380', '34'])
+        self.assertEqual(split_sections('498-A'), ['498A'])
+
+
+class SentencingReportTests(unittest.TestCase):
+    def setUp(self):
+        self.context = make_app('sentencing.db').app_context()
+        self.context.push()
+        db.session.add(
+            SectionPunishment(
+                category='Theft', article_section='379, 380', minimum_fine='Rs. 1,000 or imprisonment up to 3 years'
+            )
+        )
+        db.session.add_all(
+            [
+                make_accused(case_no='PS1-2025-00001', sections='379', date_of_arrest=date(2025, 1, 1)),
+                make_accused(case_no='PS1-2025-00002', sections='380, 411', date_of_arrest=date(2025, 1, 1)),
+            ]
+        )
+        db.session.add_all(
+            [
+                JudgeDecision(case_no='PS1-2025-00001', status='Solved', total_fine='5000', imprisonment='1 year'),
+                JudgeDecision(case_no='PS1-2025-00002', status='Solved', total_fine='500', imprisonment='7 years'),
+            ]
+        )
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+
+    def test_report(self):
+        self.assertEqual(CaseSection.query.count(), 3)
+        report = sentencing_report()
+        self.assertEqual(report['totals']['decisions'], 2)
+        self.assertEqual(report['totals']['total_fine_paise'], 550000)
+        sections = {row['section']: row for row in report['sections']}
+        self.assertEqual(sections['379']['imprisonment_distribution'], {'up to 1 year': 1})
+        self.assertEqual(sections['380']['statutory']['max_imprisonment_days'], 1095)
+        self.assertIsNone(sections['411']['statutory'])
+
+        # Section 411 has no catalog entry, so case 2 is only held to 380's bounds.
+        self.assertEqual(report['outlier_count'], 1)
+        [outlier] = report['outliers']
+        self.assertEqual(outlier['case_no'], 'PS1-2025-00002')
+        self.assertEqual(outlier['reasons'], ['fine below minimum', 'imprisonment above maximum'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from collections import Counter
+
+from flask import g
+
+from helpers import make_app
+from sql_profiler import _SETTINGS, _record_query, server_timing, slow_query_logger, statement_shape
+
+
+class StatementShapeTests(unittest.TestCase):
+    def test_literals_and_in_lists_collapse(self):
+        first = statement_shape("SELECT * FROM accused WHERE id = 5 AND ps = 'PS1' AND case_no IN (?, ?, ?)")
+        second = statement_shape("SELECT * FROM accused\n WHERE id = 12 AND ps = 'PS''2' AND case_no IN (?, ?)")
+        self.assertEqual(first, second)
+        self.assertEqual(first, 'SELECT * FROM accused WHERE id = ? AND ps = ? AND case_no IN (?, ...)')
+
+    def test_server_timing_header(self):
+        profile = {'queries': 3, 'db_seconds': 0.0125, 'render_seconds': 0.004}
+        self.assertEqual(
+            server_timing(profile, 0.02),
+            'db;dur=12.5;desc="3 queries", render;dur=4.0;desc="templates (includes lazy-load SQL)", total;dur=20.0',
+        )
+
+
+class SlowQueryLogTests(unittest.TestCase):
+    def setUp(self):
+        self.settings = dict(_SETTINGS)
+        _SETTINGS['slow_query_ms'] = 0.0
+
+    def tearDown(self):
+        _SETTINGS.update(self.settings)
+
+    def log_slow_query(self):
+        with make_app(None).test_request_context('/records'):
+            g.sql_profile = {'queries': 0, 'db_seconds': 0.0, 'shapes': Counter(), 'repeated': {}}
+            with self.assertLogs(slow_query_logger) as logs:
+                _record_query("SELECT * FROM accused WHERE aadhaar_no = ? AND ps = 'PS1'", ('123456789012',), 0.2)
+            self.assertEqual(g.sql_profile['queries'], 1)
+        return logs.output[0]
+
+    def test_parameters_are_left_out_by_default(self):
+        line = self.log_slow_query()
+        self.assertIn('SELECT * FROM accused WHERE aadhaar_no = ? AND ps = ?', line)
+        self.assertNotIn('123456789012', line)
+        self.assertNotIn('PS1', line)
+
+    def test_parameters_are_logged_when_enabled(self):
+        _SETTINGS['log_parameters'] = True
+        self.assertIn("params=('123456789012',)", self.log_slow_query())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+
+def increment_statement(dialect, table, key_values, column, delta):
+    # Single-statement "insert or add to counter" on backends that have one.
+    values = dict(key_values, **{column: delta})
+    if dialect in ('sqlite', 'postgresql'):
+        statement = (sqlite_insert if dialect == 'sqlite' else postgresql_insert)(table).values(**values)
+        return statement.on_conflict_do_update(
+            index_elements=list(key_values),
+            set_={column: table.c[column] + statement.excluded[column]},
+        )
+    if dialect == 'mysql':
+        statement = mysql_insert(table).values(**values)
+        return statement.on_duplicate_key_update({column: table.c[column] + statement.inserted[column]})
+    return None
+
+
+def increment(connection, table, key_values, column, delta):
+    statement = increment_statement(connection.dialect.name, table, key_values, column, delta)
+    if statement is not None:
+        connection.execute(statement)
+        return
+
+    updated = connection.execute(
+        table.update()
+        .where(*(table.c[name] == value for name, value in key_values.items()))
+        .values({column: table.c[column] + delta})
+    ).rowcount
+    if not updated:
+        connection.execute(table.insert().values(dict(key_values, **{column: delta})))
+
+
+def upsert_statement(dialect, table, key_columns, update_columns):
+    # "Insert or overwrite these columns"; executed with a list of rows it is
+    # one batched statement.
+    if dialect in ('sqlite', 'postgresql'):
+        statement = (sqlite_insert if dialect == 'sqlite' else postgresql_insert)(table)
+        return statement.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={column: statement.excluded[column] for column in update_columns},
+        )
+    if dialect == 'mysql':
+        statement = mysql_insert(table)
+        return statement.on_duplicate_key_update({column: statement.inserted[column] for column in update_columns})
+    return None
+
+
+def upsert(executor, dialect, table, key_columns, rows):
+    # executor is a Connection or a Session. Every row must have the same keys.
+    update_columns = [column for column in rows[0] if column not in key_columns]
+    statement = upsert_statement(dialect, table, key_columns, update_columns)
+    if statement is not None:
+        executor.execute(statement, rows)
+        return
+
+    for row in rows:
+        updated = executor.execute(
+            table.update()
+            .where(*(table.c[name] == row[name] for name in key_columns))
+            .values({column: row[column] for column in update_columns})
+        ).rowcount
+        if not updated:
+            executor.execute(table.insert().values(**row))